@@ -2,7 +2,10 @@
 from telegram import ParseMode
 from html import escape
 from paperradar.storage.users import get_user
-from paperradar.services.pipeline import build_ranked
+from paperradar.services.pipeline import build_ranked, ranked_cache_stats
+from paperradar.core.ranking import shortlist_stats
+from paperradar.storage import http_cache, paper_store
+from paperradar.fetchers.search_terms import owner_key, owner_terms
 try:
     # si existe utilitario para fecha, úsalo, si no, ignoramos este detalle
     from paperradar.core.filters import is_recent
@@ -42,6 +45,17 @@ def diag(update, context):
         return f"{sc:.3f} · {t}"
     tops = "\n".join(fmt(x) for x in ranked[:5]) or "(vacío)"
 
+    owner = owner_key(cid, u.get("active_profile", "default"))
+    own_terms = owner_terms([owner]).get(owner, [])
+    from_own = sum(1 for it, _ in ranked if owner in (it.get("query_owners") or []))
+    store = paper_store.stats()
+    cache = http_cache.stats()
+    hits = sum(st["hits"] + st["revalidated"] for st in cache["sources"].values())
+    misses = sum(st["misses"] for st in cache["sources"].values())
+    short = shortlist_stats()
+    recall = f"{short['recall_mean']:.2f}" if short["recall_mean"] is not None else "—"
+    rc = ranked_cache_stats()
+
     msg = (
         f"<b>Diag</b>\n"
         f"thr=<code>{thr:.2f}</code>  topN=<code>{topN}</code>  max_age_hours=<code>{max_h}</code>\n"
@@ -50,7 +64,12 @@ def diag(update, context):
         + (f"  └ recientes (aplica filtro max_age): <code>{len(recent)}</code>\n" if max_h else "")
         + (f"  └ no recientes: <code>{len(nonrec)}</code>\n" if max_h else "")
         + f"bloqueados por sent_ids: <code>{len(blocked_sent)}</code>\n"
-        f"candidatos a enviar ahora: <code>{len(candidates)}</code>\n\n"
+        f"candidatos a enviar ahora: <code>{len(candidates)}</code>\n"
+        f"términos propios: <code>{len(own_terms)}</code> · papers traídos por ellos: <code>{from_own}</code>\n"
+        f"store local: <code>{store['papers']}</code> papers (ingest {store['last_ingest'] or '—'})\n"
+        f"cache HTTP: <code>{hits}</code> hits / <code>{misses}</code> misses ({cache['entries']} entradas)\n"
+        f"lista corta: <code>{short['avg_candidates']}</code> candidatos/perfil · recall@{short['recall_at']} <code>{recall}</code>\n"
+        f"cache de ranking: <code>{rc['hits']}</code> hits / <code>{rc['misses']}</code> misses ({rc['entries']} perfiles) · re-rankeos <code>{rc['full']}</code> completos / <code>{rc['incremental']}</code> incrementales\n\n"
         f"<b>Top 5 (score · título):</b>\n{tops}"
     )
     context.bot.send_message(chat_id=cid, text=msg, parse_mode=ParseMode.HTML, disable_web_page_preview=True)
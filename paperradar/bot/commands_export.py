@@ -3,7 +3,7 @@ import os, io, zipfile, time
 from paperradar.storage.users import get_user, save_user
 from paperradar.storage.paths import user_path
 from paperradar.storage.history import user_history_json, user_history_csv
-from paperradar.core.llm import save_llm_cache
+from paperradar.storage import llm_cache
 
 def export(update, context):
     cid = update.effective_chat.id
@@ -58,12 +58,9 @@ def clear_history(update, context):
     update.message.reply_text("🧹 Cleared history files.")
 
 def clear_llmcache(update, context):
-    save_llm_cache()  # ensure file exists at least once
-    from paperradar.storage.paths import LLM_CACHE_PATH
     try:
-        if os.path.exists(LLM_CACHE_PATH):
-            os.remove(LLM_CACHE_PATH)
-        update.message.reply_text("🧠 LLM cache cleared.")
+        n = llm_cache.clear()
+        update.message.reply_text(f"🧠 LLM cache cleared ({n} entries).")
     except Exception as e:
         update.message.reply_text(f"Error clearing cache: {e}")
 
@@ -1,5 +1,6 @@
 # paperradar/bot/commands_feedback.py
 from paperradar.storage.users import get_user, save_user
+from paperradar.services.feedback import feedback_for
 from .utils import argstr
 
 def like(update, context):
@@ -13,6 +14,7 @@ def like(update, context):
     if pid in u["dislikes_global"]:
         u["dislikes_global"].remove(pid)
     save_user(cid)
+    feedback_for(u)  # resuelve el paper a su vector ahora, no en el próximo ranking
     context.bot.send_message(cid, f"👍 Liked {pid}")
 
 def dislike(update, context):
@@ -26,6 +28,7 @@ def dislike(update, context):
     if pid in u["likes_global"]:
         u["likes_global"].remove(pid)
     save_user(cid)
+    feedback_for(u)
     context.bot.send_message(cid, f"👎 Disliked {pid}")
 
 def likes(update, context):
@@ -1,7 +1,9 @@
 # paperradar/bot/commands_llm.py
-from paperradar.storage.users import get_user, save_user, add_sent_id
+from paperradar.storage.users import get_user, save_user, mark_item_sent
 from paperradar.storage.history import upsert_history_record
-from paperradar.services.pipeline import build_ranked, make_bullets
+from paperradar.services.pipeline import find_ranked, make_bullets
+from paperradar.core.openai_client import INTERACTIVE, note_ondemand, ondemand_left, ondemand_limit
+from paperradar.storage import paper_store
 from .utils import argstr
 
 def llm(update, context):
@@ -12,19 +14,24 @@ def llm(update, context):
     if not pid:
         update.message.reply_text("Usage: /llm <id> (use the ID shown under each item)"); return
 
-    ranked = build_ranked(u)
-    target = None
-    for it, sc in ranked:
-        key = (it.get("id") or it.get("url") or "")[:200]
-        if pid in key or key in pid:
-            target = (it, sc); break
-    if not target:
-        update.message.reply_text("ID not found in current ranking. Try /sample or ensure it has not expired."); return
+    if ondemand_left(u) <= 0:
+        update.message.reply_text(
+            f"On-demand LLM limit reached ({ondemand_limit(u)}/hour). Try again later."
+        ); return
+
+    # Busca en el store local; el score sale del ranking completo en cache (sin filtro de edad)
+    stored = paper_store.find_paper(pid)
+    if not stored:
+        update.message.reply_text("ID not found in the local paper store. Try /sample or ensure it has not expired."); return
+    skey = (stored.get("id") or stored.get("url") or "")[:200]
+    target = find_ranked(u, skey) or (stored, 0.0)
 
     it, sc = target
-    bullets = make_bullets(u, it, use_llm=True)
+    bullets = make_bullets(u, it, use_llm=True, priority=INTERACTIVE)
+    if bullets.get("tag") == "llm":
+        note_ondemand(u)
     from .handlers import send_paper
     send_paper(context.bot, cid, it, sc, bullets)
     upsert_history_record(cid, it, sc, bullets, note="llm_ondemand", profile=active_profile)
-    add_sent_id(u, (it.get("id") or it.get("url") or "")[:200])
+    mark_item_sent(u, it)
     save_user(cid)
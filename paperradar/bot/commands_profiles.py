@@ -5,10 +5,10 @@ from paperradar.storage.users import (
     get_user,
     save_user,
     clear_sent_ids_for_active_profile,
+    restore_profile_analysis,
 )
 from .utils import split_once, argstr
 from paperradar.services.profile_builder import analyze_text
-from paperradar.fetchers.search_terms import set_custom_terms
 
 
 def _apply_profile_analysis(u: dict, text: str, *, summary_override: str = None) -> str:
@@ -31,7 +31,6 @@ def _apply_profile_analysis(u: dict, text: str, *, summary_override: str = None)
         u["profile_summary"] = summary
         u["profile_topics"] = topics
         u["profile_topic_weights"] = weights
-        set_custom_terms(topics)
         return summary
 
     analysis = analyze_text(text, summary_override=summary_override)
@@ -46,7 +45,6 @@ def _apply_profile_analysis(u: dict, text: str, *, summary_override: str = None)
         u["profile_topics"] = []
         u["profile_topic_weights"] = {}
         result = fallback
-    set_custom_terms(u.get("profile_topics", []))
     return result
 
 def profile(update, context):
@@ -107,8 +105,10 @@ def puse(update, context):
         context.bot.send_message(cid, f"Profile '{escape(name)}' not found. Use /plist.", parse_mode=ParseMode.HTML)
         return
     u["active_profile"] = name
-    stored = u["profiles"].get(name, "")
-    u["profile"] = _apply_profile_analysis(u, stored, summary_override=stored)
+    # análisis guardado del perfil: el cambio es inmediato (sin re-analizar ni re-rankear)
+    if not restore_profile_analysis(u, name):
+        stored = u["profiles"].get(name, "")
+        u["profile"] = _apply_profile_analysis(u, stored, summary_override=stored)
     # Reinicia historial de enviados al cambiar de perfil (como pediste)
     from paperradar.storage.users import get_active_sent_ids
     _ = get_active_sent_ids(u)  # solo asegura la estructura, sin limpiar
@@ -146,8 +146,9 @@ def pdel(update, context):
     if u.get("active_profile") == name:
         new_active = next(iter(u["profiles"].keys()))
         u["active_profile"] = new_active
-        stored = u["profiles"].get(new_active, "")
-        u["profile"] = _apply_profile_analysis(u, stored, summary_override=stored)
+        if not restore_profile_analysis(u, new_active):
+            stored = u["profiles"].get(new_active, "")
+            u["profile"] = _apply_profile_analysis(u, stored, summary_override=stored)
         # Nota: NO limpiamos aquí el historial del nuevo activo (ya existía antes).
         # Si prefieres arrancar "en limpio", puedes llamar:
         # clear_sent_ids_for_active_profile(u)
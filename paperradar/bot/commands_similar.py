@@ -0,0 +1,27 @@
+# paperradar/bot/commands_similar.py
+from html import escape
+from telegram import ParseMode
+from paperradar.services.paper_embeddings import similar_papers
+from .utils import argstr
+
+SIMILAR_LIMIT = 8
+
+def similar(update, context):
+    cid = update.effective_chat.id
+    pid = (argstr(update) or "").strip()
+    if not pid:
+        update.message.reply_text("Usage: /similar <id> (use the ID shown under each item)"); return
+
+    # vecinos por embedding desde el índice ANN (sin red salvo que falte el vector del paper)
+    paper, neighbours = similar_papers(pid, SIMILAR_LIMIT)
+    if not paper:
+        update.message.reply_text("ID not found in the local paper store. Try /sample or ensure it has not expired."); return
+    if not neighbours:
+        update.message.reply_text("No embedding available for this paper yet (needs OPENAI_API_KEY)."); return
+
+    lines = [f"<b>Similar to:</b> {escape(paper.get('title', ''))[:120]}", ""]
+    for it, sc in neighbours:
+        pid_other = (it.get("id") or it.get("url") or "")[:80]
+        lines.append(f"{sc:.2f} · <a href=\"{escape(it.get('url', ''))}\">{escape(it.get('title', ''))[:110]}</a>\n<code>{escape(pid_other)}</code>")
+    lines.append("\n<i>Tip:</i> /llm &lt;id&gt; para analizar uno")
+    context.bot.send_message(chat_id=cid, text="\n".join(lines), parse_mode=ParseMode.HTML, disable_web_page_preview=True)
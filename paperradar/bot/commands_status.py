@@ -3,7 +3,9 @@ import datetime
 from html import escape
 from telegram import ParseMode
 
-from paperradar.storage.users import get_user, get_active_sent_ids
+from paperradar.storage.users import get_user, get_active_sent_ids, sent_paper_count
+from paperradar.services.corpus import current_snapshot
+from paperradar.core.openai_client import usage_for
 
 def _yesno(v):
     return "✅ ON" if v else "❌ OFF"
@@ -48,11 +50,13 @@ def status(update, context):
     llm_enabled = bool(u.get("llm_enabled", False))
     llm_thr = float(u.get("llm_threshold", 0.70))
     llm_budget = int(u.get("llm_max_per_tick", 2))
+    usage = usage_for(u, cid)
+    quota_txt = f" / {usage['daily_token_quota']}" if usage["daily_token_quota"] else ""
     likes_g = len(u.get("likes_global", []))
     dislikes_g = len(u.get("dislikes_global", []))
 
     # Historial por perfil activo
-    sent_cnt = len(get_active_sent_ids(u))
+    sent_cnt = sent_paper_count(get_active_sent_ids(u))
 
     # Info del scheduler (poll actual)
     job = _pick_tick_job(context.job_queue)
@@ -89,6 +93,11 @@ def status(update, context):
 
     idle_ticks = int(u.get("idle_ticks", 0))
 
+    # Snapshot del corpus: el usado en el último ranking de este chat y el vigente del proceso
+    snap = current_snapshot()
+    snap_txt = f"{snap.label()} ({len(snap.items)} items)" if snap else "(sin tick en este proceso)"
+    ranked_snap = u.get("last_corpus_snapshot") or "(never)"
+
     msg = (
         f"<b>📊 PaperRadar · Status</b>\n"
         f"<b>Chat ID:</b> <code>{cid}</code>\n\n"
@@ -105,13 +114,17 @@ def status(update, context):
         f"<b>LLM</b>\n"
         f"  • Estado: {_yesno(llm_enabled)}\n"
         f"  • llm_threshold: {llm_thr:.2f}\n"
-        f"  • llm_max_per_tick: {llm_budget}\n\n"
+        f"  • llm_max_per_tick: {llm_budget}\n"
+        f"  • Uso hoy: {usage['today']['requests']} llamadas, {usage['today']['tokens']}{quota_txt} tokens\n"
+        f"  • /llm disponibles esta hora: {usage['ondemand_left']}/{usage['ondemand_max_per_hour']}\n\n"
         f"<b>Feedback</b>\n"
         f"  • Likes: {likes_g}\n"
         f"  • Dislikes: {dislikes_g}\n\n"
         f"<b>Historial</b>\n"
         f"  • Items enviados (perfil activo): {sent_cnt}\n"
-        f"  • Último tick: {last_txt}\n\n"
+        f"  • Último tick: {last_txt}\n"
+        f"  • Snapshot rankeado: <code>{escape(ranked_snap)}</code>\n"
+        f"  • Snapshot vigente: <code>{escape(snap_txt)}</code>\n\n"
         f"<i>Comandos útiles:</i>\n"
         f"  • /sample — ranking heurístico\n"
         f"  • /ticknow — forzar ciclo manual\n"
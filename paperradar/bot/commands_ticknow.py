@@ -1,6 +1,7 @@
-from paperradar.storage.users import get_user, save_user, get_active_sent_ids, add_sent_id
+from paperradar.storage.users import get_user, save_user, get_active_sent_ids, is_item_sent, mark_item_sent
 from paperradar.storage.known_chats import register_chat
-from paperradar.services.pipeline import build_ranked, make_bullets
+from paperradar.services.pipeline import build_ranked, make_bullets_batch
+from paperradar.core.openai_client import INTERACTIVE
 from paperradar.storage.history import upsert_history_record
 
 def ticknow(update, context):
@@ -17,15 +18,19 @@ def ticknow(update, context):
     thr  = float(u.get("sim_threshold", 0.55))
 
     already = get_active_sent_ids(u)
+    to_send = []
     for it, sc in ranked_full:
-        if sent >= topN or sc < thr:
+        if len(to_send) >= topN or sc < thr:
             continue
-        pk = (it.get("id") or it.get("url") or "")[:200]
-        if pk in already:  # evita duplicar
+        if is_item_sent(already, it):  # evita duplicar (id o cluster)
             continue
+        to_send.append((it, sc))
 
-        use_llm = u.get("llm_enabled", False) and used_llm < llm_budget and sc >= u.get("llm_threshold", 0.70)
-        bullets = make_bullets(u, it, use_llm=use_llm)
+    llm_flags = [u.get("llm_enabled", False) and sc >= u.get("llm_threshold", 0.70) for it, sc in to_send]
+    # los papers que van al LLM se piden en lote (LLM_BATCH_SIZE por llamada)
+    bullets_all = make_bullets_batch(u, [it for it, _ in to_send], llm_flags, llm_budget, priority=INTERACTIVE)
+
+    for (it, sc), bullets in zip(to_send, bullets_all):
         if bullets.get("tag") in ("llm", "llm_cache"):
             used_llm += 1
 
@@ -33,8 +38,7 @@ def ticknow(update, context):
         from .handlers import send_paper
         send_paper(context.bot, cid, it, sc, bullets)
 
-        add_sent_id(u, pk)
-        already.add(pk)
+        mark_item_sent(u, it)
         upsert_history_record(cid, it, sc, bullets, note="ticknow", profile=active_profile)
         sent += 1
 
@@ -24,7 +24,7 @@ def start(update, context):
             "PaperRadar ready.\n"
             "Usa /profile <abstract> o /pnew <topic> <abstract>.\n"
             "Comandos: /status /pnew /puse /pdel /plist /pview /like /dislike /likes /dislikes "
-            "/llm /tune /age /poll /topn /llmbudget /llmlimit /export /backup "
+            "/llm /similar /tune /age /poll /topn /llmbudget /llmlimit /export /backup "
             "/clear_history /clear_llmcache /clear_likes /clear_dislikes /forgetme /sample /flush"
         ),
     )
@@ -100,6 +100,7 @@ def main():
     from .commands_feedback import like, dislike, likes, dislikes
     from .commands_tuning import tune, age, topn, llmbudget, llmlimit  # (sin poll aquí)
     from .commands_llm import llm
+    from .commands_similar import similar
     from .commands_export import export, backup, clear_history, clear_llmcache, clear_likes, clear_dislikes
     from .commands_misc import forgetme as cmd_forgetme, flush, flushall
     from .commands_ticknow import ticknow
@@ -132,6 +133,7 @@ def main():
     dp.add_handler(CommandHandler("llmlimit", llmlimit))
 
     dp.add_handler(CommandHandler("llm", llm))
+    dp.add_handler(CommandHandler("similar", similar))
 
     dp.add_handler(CommandHandler("export", export))
     dp.add_handler(CommandHandler("backup", backup))
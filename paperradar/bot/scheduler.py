@@ -3,13 +3,15 @@ import logging
 import datetime
 from telegram import ChatAction
 
-from paperradar.services.pipeline import build_ranked, make_bullets
+from paperradar.services.pipeline import BulletsBatch, build_ranked, rank_users
+from paperradar.services.corpus import refresh_snapshot, register_chats
 from paperradar.storage.users import (
     get_user,
     save_user,
     get_active_sent_ids,
-    add_sent_id,
     clear_sent_ids_for_active_profile,
+    is_item_sent,
+    mark_item_sent,
 )
 from paperradar.storage.known_chats import KNOWN_CHATS
 from paperradar.storage.history import upsert_history_record
@@ -41,9 +43,33 @@ def tick(context):
     - Soft-relax del umbral en el ciclo si está muy alto
     - Fallback digest para no quedar en silencio absoluto
     - Marca last_lucky_ts para que /status muestre actividad del tick
+    - Descarga el corpus UNA vez por tick y rankea todos los chats contra ese snapshot
+    - Encola el trabajo LLM de todos los chats antes de esperar y enviar el primero
     """
     try:
-        for cid in _target_chat_ids():
+        chat_ids = _target_chat_ids()
+        users = []
+        loaded_ids = []
+        for cid in chat_ids:
+            try:
+                users.append(get_user(cid))
+                loaded_ids.append(cid)
+            except Exception as load_exc:
+                logging.exception(f"[tick] cid={cid} load error: {load_exc}")
+        active = [(cid, u) for cid, u in zip(loaded_ids, users) if u.get("profile")]
+        # el planificador une los términos de todos los perfiles activos: cada término se consulta una vez
+        owners = register_chats(zip(loaded_ids, users))
+        snapshot = refresh_snapshot(owners) if active else None
+        if snapshot is not None:
+            logging.info(f"[tick] snapshot={snapshot.label()} items={len(snapshot.items)} chats={len(active)}")
+        # todos los chats activos se rankean juntos (una matriz de items, un producto disperso)
+        ranked_by_cid = {}
+        if snapshot is not None:
+            ranked_by_cid = dict(zip([cid for cid, _ in active], rank_users([u for _, u in active], snapshot)))
+
+        # 1) por chat: qué enviar y qué va al LLM; el trabajo LLM queda encolado
+        pending = []
+        for cid in chat_ids:
             try:
                 u = get_user(cid)
 
@@ -55,11 +81,12 @@ def tick(context):
                     save_user(cid)  # guarda la marca de tiempo
                     continue
 
-                active_profile = u.get("active_profile", "default")
-                ranked_full = build_ranked(u)
+                ranked_full = ranked_by_cid.get(cid)
+                if ranked_full is None:
+                    ranked_full = build_ranked(u, snapshot=snapshot)
+                if snapshot is not None:
+                    u["last_corpus_snapshot"] = snapshot.label()
                 llm_budget  = int(u.get("llm_max_per_tick", 2))
-                used_llm    = 0
-                sent        = 0
                 topN        = int(u.get("topn", 12))
                 thr         = float(u.get("sim_threshold", 0.55))
 
@@ -69,11 +96,11 @@ def tick(context):
                 # Candidatos "nuevos" por encima del umbral
                 abovethr_new = [
                     (it, sc) for it, sc in ranked_full
-                    if sc >= thr and ((it.get("id") or it.get("url") or "")[:200]) not in already
+                    if sc >= thr and not is_item_sent(already, it)
                 ]
 
                 logging.info(
-                    f"[tick] cid={cid} topN={topN} thr={thr:.2f} "
+                    f"[tick] cid={cid} snapshot={snapshot.version if snapshot is not None else 'local'} topN={topN} thr={thr:.2f} "
                     f"ranked={len(ranked_full)} abovethr_new={len(abovethr_new)} "
                     f"sent_ids={len(already)} idle_ticks={u.get('idle_ticks', 0)}"
                 )
@@ -95,7 +122,7 @@ def tick(context):
                         already = get_active_sent_ids(u)
                         abovethr_new = [
                             (it, sc) for it, sc in ranked_full
-                            if sc >= thr and ((it.get("id") or it.get("url") or "")[:200]) not in already
+                            if sc >= thr and not is_item_sent(already, it)
                         ]
 
                     # 2) Soft-relax del umbral solo para este ciclo
@@ -104,7 +131,7 @@ def tick(context):
                         logging.info(f"[tick] cid={cid} soft-relax thr {thr:.2f} → {soft_thr:.2f}")
                         abovethr_new = [
                             (it, sc) for it, sc in ranked_full
-                            if sc >= soft_thr and ((it.get("id") or it.get("url") or "")[:200]) not in already
+                            if sc >= soft_thr and not is_item_sent(already, it)
                         ]
                         thr = soft_thr  # solo efecto en este ciclo (no se persiste)
 
@@ -116,22 +143,43 @@ def tick(context):
                     in_fallback_digest = True
 
                 # --- Envío ---
+                # Primero se eligen los papers a enviar (evita repetidos por id o cluster
+                # de casi-duplicados, solo en modo normal) y cuáles van al LLM (hasta el presupuesto)
+                to_send = []
                 for it, sc in abovethr_new:
-                    if sent >= topN:
+                    if len(to_send) >= topN:
                         break
+                    if is_item_sent(already, it) and not in_fallback_digest:
+                        continue
+                    to_send.append((it, sc))
+                llm_flags = [
+                    u.get("llm_enabled", False) and sc >= u.get("llm_threshold", 0.70)
+                    for it, sc in to_send
+                ]
+                # una sola llamada al LLM por cada LLM_BATCH_SIZE papers (el perfil va una vez)
+                pending.append((cid, u, to_send, in_fallback_digest,
+                                BulletsBatch(u, [it for it, _ in to_send], llm_flags, llm_budget)))
+
+            except Exception as per_chat_exc:
+                # No dejes que un error por chat frene todo el ciclo
+                logging.exception(f"[tick] cid={cid} error: {per_chat_exc}")
 
-                    pk = (it.get("id") or it.get("url") or "")[:200]
+        # los digests de todos los chats ya están en curso; ahora se encolan sus bullets
+        for cid, _, _, _, batch in pending:
+            try:
+                batch.submit()
+            except Exception as submit_exc:
+                logging.exception(f"[tick] cid={cid} llm submit error: {submit_exc}")
 
-                    # Evita repetidos solo en modo normal (no en digest)
-                    if pk in already and not in_fallback_digest:
-                        continue
+        # 2) por chat: se espera su lote (los demás siguen corriendo) y se envía
+        for cid, u, to_send, in_fallback_digest, batch in pending:
+            try:
+                active_profile = u.get("active_profile", "default")
+                used_llm = 0
+                sent = 0
+                bullets_all = batch.result()
 
-                    use_llm = (
-                        u.get("llm_enabled", False)
-                        and used_llm < llm_budget
-                        and sc >= u.get("llm_threshold", 0.70)
-                    )
-                    bullets = make_bullets(u, it, use_llm=use_llm)
+                for (it, sc), bullets in zip(to_send, bullets_all):
                     if bullets.get("tag") in ("llm", "llm_cache"):
                         used_llm += 1
 
@@ -145,7 +193,7 @@ def tick(context):
 
                     # Marca como enviado SOLO si no es digest (para no bloquear)
                     if not in_fallback_digest:
-                        add_sent_id(u, pk)
+                        mark_item_sent(u, it)
 
                     upsert_history_record(cid, it, sc, bullets, note="tick", profile=active_profile)
                     sent += 1
@@ -30,6 +30,17 @@ OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-l
 DEFAULT_LLM_THRESHOLD    = float(os.getenv("LLM_THRESHOLD", "0.70"))
 DEFAULT_LLM_MAX_PER_TICK = int(os.getenv("LLM_MAX_PER_TICK", "2"))
 DEFAULT_LLM_ONDEMAND_MAX_PER_HOUR = int(os.getenv("LLM_ONDEMAND_MAX_PER_HOUR", "5"))
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "4"))  # papers per bullets request in a tick (1 = one call per paper)
+LLM_PAPER_DIGEST = os.getenv("LLM_PAPER_DIGEST", "1") == "1"  # bullets from a shared per-paper digest instead of the abstract
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))  # LLM calls in flight per process (shared by tick, web, journals)
+LLM_DEADLINE_SEC    = float(os.getenv("LLM_DEADLINE_SEC", "45"))   # callers stop waiting after this; the call still fills the cache
+
+# OpenAI budget: rate buckets per process, daily token quotas shared through data/openai_usage.sqlite3 (0 = unlimited)
+OPENAI_RPM               = float(os.getenv("OPENAI_RPM", "500"))
+OPENAI_TPM               = float(os.getenv("OPENAI_TPM", "200000"))
+OPENAI_DAILY_TOKENS      = int(os.getenv("OPENAI_DAILY_TOKENS", "0"))
+OPENAI_USER_DAILY_TOKENS = int(os.getenv("OPENAI_USER_DAILY_TOKENS", "0"))
+OPENAI_BACKGROUND_SHARE  = float(os.getenv("OPENAI_BACKGROUND_SHARE", "0.8"))  # tick work stops at this fraction of the daily quota
 DEFAULT_JOURNAL_TOPN = int(os.getenv("JOURNAL_TOP_N", "9"))
 DEFAULT_JOURNAL_LLM_TOP = int(os.getenv("JOURNAL_LLM_TOP", "4"))
 DEFAULT_PAPER_EMBED_MAX = int(os.getenv("PAPER_EMBED_MAX", "12"))
@@ -58,3 +69,82 @@ ENABLE_CROSSREF = os.getenv("ENABLE_CROSSREF", "true").strip().lower() in ("1",
 ENABLE_SEMANTIC = os.getenv("ENABLE_SEMANTIC", "true").strip().lower() in ("1", "true", "yes", "on")
 ENABLE_SPRINGER = os.getenv("ENABLE_SPRINGER", "true").strip().lower() in ("1", "true", "yes", "on")
 ENABLE_SCHOLAR  = os.getenv("ENABLE_SCHOLAR", "true").strip().lower() in ("1", "true", "yes", "on")
+
+# Parallel fetch engine: pool size, overall deadline and per-source concurrency
+FETCH_MAX_WORKERS  = int(os.getenv("FETCH_MAX_WORKERS", "12"))
+FETCH_DEADLINE_SEC = float(os.getenv("FETCH_DEADLINE_SEC", "60"))
+FETCH_CONCURRENCY = {
+    "arxiv":    int(os.getenv("FETCH_CONCURRENCY_ARXIV", "3")),
+    "crossref": int(os.getenv("FETCH_CONCURRENCY_CROSSREF", "6")),
+    "semantic": int(os.getenv("FETCH_CONCURRENCY_SEMANTIC", "2")),
+    "springer": int(os.getenv("FETCH_CONCURRENCY_SPRINGER", "3")),
+    "scholar":  int(os.getenv("FETCH_CONCURRENCY_SCHOLAR", "4")),
+}
+
+# Shared HTTP client: pooled keep-alive sessions per host, retry/backoff
+HTTP_POOL_SIZE        = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_MAX_ATTEMPTS     = int(os.getenv("HTTP_MAX_ATTEMPTS", "3"))
+HTTP_BACKOFF_BASE     = float(os.getenv("HTTP_BACKOFF_BASE", "0.8"))
+HTTP_RETRY_AFTER_MAX  = float(os.getenv("HTTP_RETRY_AFTER_MAX", "30"))
+
+# Persistent HTTP response cache for fetcher queries (TTL in seconds per source)
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+HTTP_CACHE_MAX_MB  = float(os.getenv("HTTP_CACHE_MAX_MB", "64"))
+HTTP_CACHE_TTL = {
+    "arxiv":    int(os.getenv("HTTP_CACHE_TTL_ARXIV", "600")),
+    "crossref": int(os.getenv("HTTP_CACHE_TTL_CROSSREF", "900")),
+    "semantic": int(os.getenv("HTTP_CACHE_TTL_SEMANTIC", "1800")),
+    "springer": int(os.getenv("HTTP_CACHE_TTL_SPRINGER", "1800")),
+    "scholar":  int(os.getenv("HTTP_CACHE_TTL_SCHOLAR", "1800")),
+}
+
+# LLM bullet cache (SQLite, shared by bot and web)
+LLM_CACHE_TTL_DAYS    = float(os.getenv("LLM_CACHE_TTL_DAYS", "30"))  # 0 = never expire
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))  # least recently used evicted first
+
+# Query planner: terms of every chat are unioned (capped) and OR-packed per source
+QUERY_MAX_TERMS = int(os.getenv("QUERY_MAX_TERMS", "40"))
+QUERY_MAX_CHARS = {
+    "arxiv":    int(os.getenv("QUERY_MAX_CHARS_ARXIV", "300")),
+    "springer": int(os.getenv("QUERY_MAX_CHARS_SPRINGER", "250")),
+    "scholar":  int(os.getenv("QUERY_MAX_CHARS_SCHOLAR", "200")),
+}
+
+# Incremental fetching (per-query watermarks) and the retained corpus window
+FETCH_INCREMENTAL     = os.getenv("FETCH_INCREMENTAL", "true").strip().lower() in ("1", "true", "yes", "on")
+ARXIV_PAGE_SIZE       = int(os.getenv("ARXIV_PAGE_SIZE", "25"))
+CROSSREF_MAX_PAGES    = int(os.getenv("CROSSREF_MAX_PAGES", "4"))  # pages read forward from the mark per query and tick
+CORPUS_RETENTION_DAYS = float(os.getenv("CORPUS_RETENTION_DAYS", "14"))
+CORPUS_MAX_ITEMS      = int(os.getenv("CORPUS_MAX_ITEMS", "5000"))
+STORE_STALE_MIN       = float(os.getenv("STORE_STALE_MIN", "30"))  # interactive reads trigger a background ingest past this age
+
+# Ranking features: hashed 1-3 grams cached across ticks (bounded LRU)
+FEATURE_HASH_BITS       = int(os.getenv("FEATURE_HASH_BITS", "20"))
+FEATURE_CACHE_MAX_ITEMS = int(os.getenv("FEATURE_CACHE_MAX_ITEMS", "20000"))
+
+# Two-stage ranking: inverted-index shortlist per profile, then full rerank (size 0 = score everything)
+RANK_SHORTLIST_SIZE      = int(os.getenv("RANK_SHORTLIST_SIZE", "400"))
+RANK_SHORTLIST_MIN_SCORE = float(os.getenv("RANK_SHORTLIST_MIN_SCORE", "0.02"))
+RANK_PREFILTER_TERMS     = int(os.getenv("RANK_PREFILTER_TERMS", "64"))
+RANK_RECALL_SAMPLE_EVERY = int(os.getenv("RANK_RECALL_SAMPLE_EVERY", "20"))  # every N batches, score everything and measure recall
+RANK_RECALL_AT           = int(os.getenv("RANK_RECALL_AT", "20"))
+
+# Incremental ranking between ticks: only new items are scored and merged into each profile's kept list
+RANK_INCREMENTAL       = os.getenv("RANK_INCREMENTAL", "1") == "1"
+RANK_INCREMENTAL_DRIFT = float(os.getenv("RANK_INCREMENTAL_DRIFT", "0.25"))  # added+removed items / snapshot size since the last full rescore
+
+# Hybrid ranking: blend of TF-IDF similarity and embedding cosine for papers with stored vectors
+RANK_EMBED_WEIGHT    = float(os.getenv("RANK_EMBED_WEIGHT", "0.4"))  # 0 = lexical only
+RANK_EMBED_SHORTLIST = int(os.getenv("RANK_EMBED_SHORTLIST", "100"))  # nearest papers by embedding added to the shortlist
+PAPER_EMBED_INGEST_MAX = int(os.getenv("PAPER_EMBED_INGEST_MAX", "200"))  # papers embedded per ingest, newest first (0 = off)
+
+# ANN index over paper embeddings (IVF: k-means lists, probe the closest ones)
+ANN_NLIST     = int(os.getenv("ANN_NLIST", "0"))        # 0 = sqrt(n)
+ANN_NPROBE    = int(os.getenv("ANN_NPROBE", "8"))       # higher = better recall, slower
+ANN_MIN_ITEMS = int(os.getenv("ANN_MIN_ITEMS", "2000"))  # below this the search is exhaustive
+
+# Near-duplicate clustering (MinHash/LSH over title + abstract)
+NEAR_DUP_ENABLED      = os.getenv("NEAR_DUP_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+NEAR_DUP_THRESHOLD    = float(os.getenv("NEAR_DUP_THRESHOLD", "0.7"))
+MINHASH_PERMUTATIONS  = int(os.getenv("MINHASH_PERMUTATIONS", "64"))
+MINHASH_BANDS         = int(os.getenv("MINHASH_BANDS", "16"))
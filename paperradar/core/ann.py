@@ -0,0 +1,197 @@
+"""
+Approximate nearest neighbours over unit vectors (IVF-Flat, NumPy only).
+
+Vectors are partitioned by spherical k-means into ``nlist`` inverted lists.
+A query scores the centroids, scans only the ``nprobe`` closest lists and
+ranks those members by exact cosine, so ``nprobe`` is the recall/latency
+knob (``nprobe == nlist`` is exhaustive). New vectors are appended to the
+list of their nearest centroid; once the index has grown well past the
+size it was trained on, the partitions are retrained.
+"""
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_KMEANS_ITERS = 12
+_TRAIN_SAMPLE = 20000
+_RETRAIN_GROWTH = 2.0
+
+
+def _unit_rows(X: np.ndarray) -> np.ndarray:
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return X / norms
+
+
+def _kmeans(X: np.ndarray, k: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means; returns (k x dim) unit centroids."""
+    rng = np.random.default_rng(seed)
+    if len(X) > _TRAIN_SAMPLE:
+        X = X[rng.choice(len(X), _TRAIN_SAMPLE, replace=False)]
+    C = X[rng.choice(len(X), k, replace=False)].copy()
+    for _ in range(_KMEANS_ITERS):
+        assign = np.argmax(X @ C.T, axis=1)
+        sums = np.zeros_like(C)
+        np.add.at(sums, assign, X)
+        counts = np.bincount(assign, minlength=k)
+        empty = counts == 0
+        if empty.any():
+            # centroides vacíos: se reinician en puntos al azar
+            sums[empty] = X[rng.choice(len(X), int(empty.sum()), replace=False)]
+        C = _unit_rows(sums)
+    return C
+
+
+class IVFIndex:
+    def __init__(self, dim: int, nlist: int = 0, min_train: int = 2000):
+        self.dim = dim
+        self.nlist = nlist  # 0 = sqrt(n) al entrenar
+        self.min_train = min_train
+        self.ids: List[str] = []
+        self.tags: List[str] = []
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.centroids = np.zeros((0, dim), dtype=np.float32)
+        self.trained_size = 0
+        self._rows: Dict[str, int] = {}
+        self._lists: Optional[List[np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def trained(self) -> bool:
+        return len(self.centroids) > 0
+
+    def _reindex(self) -> None:
+        self._rows = {key: i for i, key in enumerate(self.ids)}
+        self._lists = None
+
+    def _inverted_lists(self) -> List[np.ndarray]:
+        if self._lists is None:
+            order = np.argsort(self.assign, kind="stable")
+            bounds = np.searchsorted(self.assign[order], np.arange(len(self.centroids) + 1))
+            self._lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+        return self._lists
+
+    def train(self) -> None:
+        """(Re)partition every stored vector; below ``min_train`` the index stays exhaustive."""
+        n = len(self.ids)
+        if n < max(self.min_train, 2):
+            self.centroids = np.zeros((0, self.dim), dtype=np.float32)
+            self.assign = np.zeros(n, dtype=np.int32)
+            self.trained_size = 0
+        else:
+            k = self.nlist or int(math.sqrt(n))
+            k = max(1, min(k, n))
+            self.centroids = _kmeans(self.vectors, k)
+            self.assign = self._nearest_list(self.vectors)
+            self.trained_size = n
+        self._lists = None
+
+    def _nearest_list(self, V: np.ndarray) -> np.ndarray:
+        if not self.trained or not len(V):
+            return np.zeros(len(V), dtype=np.int32)
+        return np.argmax(V @ self.centroids.T, axis=1).astype(np.int32)
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray, tags: Optional[Sequence[str]] = None) -> int:
+        """Insert (or replace) vectors; returns how many were added or updated."""
+        if not len(ids):
+            return 0
+        V = _unit_rows(np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim))
+        tags = list(tags) if tags is not None else [""] * len(ids)
+        fresh_ids, fresh_tags, fresh_rows = [], [], []
+        for i, key in enumerate(ids):
+            row = self._rows.get(key)
+            if row is None:
+                fresh_ids.append(key)
+                fresh_tags.append(tags[i])
+                fresh_rows.append(i)
+            else:
+                self.vectors[row] = V[i]
+                self.tags[row] = tags[i]
+                self.assign[row] = self._nearest_list(V[i:i + 1])[0]
+        if fresh_rows:
+            fresh = V[fresh_rows]
+            self.vectors = np.ascontiguousarray(np.vstack([self.vectors, fresh]))
+            self.assign = np.concatenate([self.assign, self._nearest_list(fresh)])
+            self.ids.extend(fresh_ids)
+            self.tags.extend(fresh_tags)
+        self._reindex()
+        n = len(self.ids)
+        if (not self.trained and n >= self.min_train) or (self.trained and n > _RETRAIN_GROWTH * self.trained_size):
+            self.train()
+        return len(ids)
+
+    def remove(self, ids: Sequence[str]) -> int:
+        drop = {self._rows[k] for k in ids if k in self._rows}
+        if not drop:
+            return 0
+        keep = np.array([i for i in range(len(self.ids)) if i not in drop], dtype=np.int64)
+        self.ids = [self.ids[i] for i in keep]
+        self.tags = [self.tags[i] for i in keep]
+        self.vectors = np.ascontiguousarray(self.vectors[keep]) if len(keep) else np.zeros((0, self.dim), dtype=np.float32)
+        self.assign = self.assign[keep] if len(keep) else np.zeros(0, dtype=np.int32)
+        self._reindex()
+        return len(drop)
+
+    def tag_of(self, key: str) -> Optional[str]:
+        row = self._rows.get(key)
+        return self.tags[row] if row is not None else None
+
+    def vector_of(self, key: str) -> Optional[np.ndarray]:
+        row = self._rows.get(key)
+        return self.vectors[row] if row is not None else None
+
+    def search(self, query: Sequence[float], k: int = 10, nprobe: int = 8,
+               exclude: Sequence[str] = ()) -> List[Tuple[str, float]]:
+        """Top ``k`` (id, cosine) among the members of the ``nprobe`` closest lists."""
+        if not len(self.ids) or k <= 0:
+            return []
+        q = np.asarray(query, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(q))
+        if q.size != self.dim or norm == 0.0:
+            return []
+        q = q / norm
+        if self.trained and nprobe < len(self.centroids):
+            probe = np.argpartition(-(self.centroids @ q), nprobe)[:nprobe]
+            lists = self._inverted_lists()
+            cand = np.concatenate([lists[c] for c in probe])
+        else:
+            cand = np.arange(len(self.ids))
+        skip = {self._rows[key] for key in exclude if key in self._rows}
+        if skip:
+            cand = cand[~np.isin(cand, list(skip))]
+        if not len(cand):
+            return []
+        scores = self.vectors[cand] @ q
+        top = np.argpartition(-scores, min(k, len(cand)) - 1)[:k] if len(cand) > k else np.arange(len(cand))
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[cand[i]], float(scores[i])) for i in top]
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "ids": np.array(self.ids, dtype=str),
+            "tags": np.array(self.tags, dtype=str),
+            "vectors": self.vectors,
+            "assign": self.assign,
+            "centroids": self.centroids,
+            "meta": np.array([self.dim, self.nlist, self.min_train, self.trained_size], dtype=np.int64),
+        }
+
+    @classmethod
+    def from_arrays(cls, data) -> "IVFIndex":
+        dim, nlist, min_train, trained_size = (int(x) for x in data["meta"])
+        index = cls(dim, nlist, min_train)
+        index.ids = [str(x) for x in data["ids"]]
+        index.tags = [str(x) for x in data["tags"]]
+        index.vectors = np.ascontiguousarray(data["vectors"], dtype=np.float32).reshape(len(index.ids), dim)
+        index.assign = np.asarray(data["assign"], dtype=np.int32)
+        index.centroids = np.asarray(data["centroids"], dtype=np.float32).reshape(-1, dim)
+        index.trained_size = trained_size
+        index._reindex()
+        return index
@@ -0,0 +1,131 @@
+"""
+Stable item features shared across ticks.
+
+Items are vectorized with a ``HashingVectorizer`` (1-3 grams), whose feature
+space does not depend on the corpus, so a cached row stays valid from one
+snapshot to the next. Rows are keyed by paper id + a fingerprint of the text
+(edited abstracts are re-vectorized) and only new papers are hashed.
+Document frequencies are maintained incrementally over the cached rows and
+turned into IDF weights on demand.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from paperradar.config import FEATURE_CACHE_MAX_ITEMS, FEATURE_HASH_BITS
+
+
+def _hasher(n_features: int) -> HashingVectorizer:
+    return HashingVectorizer(
+        n_features=n_features,
+        stop_words="english",
+        ngram_range=(1, 3),
+        lowercase=True,
+        alternate_sign=False,
+        norm=None,
+    )
+
+
+def _sublinear(X: sparse.csr_matrix) -> sparse.csr_matrix:
+    X = X.tocsr().astype(np.float64)
+    X.data = 1.0 + np.log(X.data)
+    return X
+
+
+def smoothed_idf(n: float, df: np.ndarray, min_df: int = 2) -> np.ndarray:
+    """Smoothed IDF (as TfidfVectorizer computes it); features below ``min_df`` get 0."""
+    idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+    if n > 1 and min_df > 1:
+        idf[df < min_df] = 0.0
+    return idf
+
+
+def text_key(item_id: str, text: str) -> str:
+    h = hashlib.sha1(text.encode("utf-8", "ignore")).hexdigest()[:16]
+    return f"{item_id}\0{h}"
+
+
+class FeatureCache:
+    """LRU cache of sublinear-tf hashed rows plus rolling document frequencies."""
+
+    def __init__(self, n_features: int = 1 << 20, max_items: int = 20000):
+        self.n_features = n_features
+        self.max_items = max_items
+        self._hasher = _hasher(n_features)
+        self._rows: "OrderedDict[str, sparse.csr_matrix]" = OrderedDict()
+        self._df = np.zeros(n_features, dtype=np.float64)
+        self._lock = threading.Lock()
+        self.hashed = 0
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def counts(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """Raw n-gram counts for arbitrary texts (not cached)."""
+        return self._hasher.transform(list(texts)).tocsr().astype(np.float64)
+
+    def transform(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """Sublinear-tf hashed rows for arbitrary texts (not cached)."""
+        return _sublinear(self._hasher.transform(list(texts)))
+
+    def _add(self, key: str, row: sparse.csr_matrix) -> None:
+        self._rows[key] = row
+        self._df[row.indices] += 1.0
+
+    def _drop(self, key: str) -> None:
+        row = self._rows.pop(key)
+        self._df[row.indices] -= 1.0
+
+    def rows(self, keyed_texts: Sequence[Tuple[str, str]]) -> sparse.csr_matrix:
+        """Stack rows for (key, text) pairs, hashing only the ones not cached."""
+        with self._lock:
+            missing = [(k, t) for k, t in keyed_texts if k not in self._rows]
+            if missing:
+                fresh = self.transform([t for _, t in missing])
+                for i, (k, _) in enumerate(missing):
+                    self._add(k, fresh.getrow(i))
+                self.hashed += len(missing)
+            self.hits += len(keyed_texts) - len(missing)
+            out: List[sparse.csr_matrix] = []
+            for k, _ in keyed_texts:
+                self._rows.move_to_end(k)
+                out.append(self._rows[k])
+            while len(self._rows) > self.max_items:
+                self._drop(next(iter(self._rows)))
+        if not out:
+            return sparse.csr_matrix((0, self.n_features))
+        return sparse.vstack(out).tocsr()
+
+    def retain(self, keys: Iterable[str]) -> int:
+        """Evict every cached row whose key is not in ``keys`` (aged-out papers)."""
+        keep = set(keys)
+        with self._lock:
+            stale = [k for k in self._rows if k not in keep]
+            for k in stale:
+                self._drop(k)
+        return len(stale)
+
+    def frequencies(self) -> Tuple[int, np.ndarray]:
+        """(documents, document frequency per feature) over the cached rows."""
+        with self._lock:
+            return len(self._rows), self._df.copy()
+
+    def idf(self, min_df: int = 2) -> np.ndarray:
+        """Smoothed IDF over the cached documents; features below ``min_df`` get 0."""
+        n, df = self.frequencies()
+        return smoothed_idf(n, df, min_df)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"items": len(self._rows), "hashed": self.hashed, "hits": self.hits}
+
+
+FEATURES = FeatureCache(1 << FEATURE_HASH_BITS, FEATURE_CACHE_MAX_ITEMS)
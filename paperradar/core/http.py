@@ -0,0 +1,217 @@
+"""
+Shared HTTP client for fetchers, LLM and embedding calls.
+
+One pooled ``requests.Session`` per host keeps TCP/TLS connections alive
+between calls. ``request`` adds retry with exponential backoff (honouring
+``Retry-After``) and records per-host latency counters. ``get(..., cache=source)``
+serves repeated queries from the on-disk response cache, revalidating stale
+entries with ETag / Last-Modified when the upstream provides them.
+"""
+from __future__ import annotations
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from typing import Dict, Iterable, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from paperradar.config import (
+    HTTP_BACKOFF_BASE,
+    HTTP_CACHE_ENABLED,
+    HTTP_CACHE_TTL,
+    HTTP_MAX_ATTEMPTS,
+    HTTP_POOL_SIZE,
+    HTTP_RETRY_AFTER_MAX,
+)
+from paperradar.storage import http_cache
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_SESSIONS: Dict[str, requests.Session] = {}
+_STATS: Dict[str, Dict[str, float]] = {}
+_LOCK = threading.Lock()
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def session_for(url: str) -> requests.Session:
+    """Return the pooled session for the URL's host, creating it on first use."""
+    host = _host(url)
+    with _LOCK:
+        sess = _SESSIONS.get(host)
+        if sess is None:
+            sess = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+            sess.mount("https://", adapter)
+            sess.mount("http://", adapter)
+            _SESSIONS[host] = sess
+    return sess
+
+
+def _retry_after(resp: requests.Response) -> float | None:
+    value = (resp.headers.get("Retry-After") or "").strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+        return max(0.0, when.timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def _record(host: str, elapsed_ms: float, *, status: int = 0, error: bool = False, retry: bool = False) -> None:
+    with _LOCK:
+        st = _STATS.setdefault(
+            host,
+            {"requests": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0, "last_status": 0},
+        )
+        st["requests"] += 1
+        st["total_ms"] += elapsed_ms
+        st["max_ms"] = max(st["max_ms"], elapsed_ms)
+        st["last_ms"] = elapsed_ms
+        st["last_status"] = status
+        if error or status >= 400:
+            st["errors"] += 1
+        if retry:
+            st["retries"] += 1
+
+
+def request(
+    method: str,
+    url: str,
+    *,
+    attempts: int | None = None,
+    backoff: float | None = None,
+    jitter: Tuple[float, float] = (0.0, 0.5),
+    retry_statuses: Iterable[int] = RETRY_STATUSES,
+    **kwargs,
+) -> requests.Response:
+    """
+    Perform an HTTP request on the host's pooled session.
+
+    Connection errors, timeouts and ``retry_statuses`` are retried up to
+    ``attempts`` in total. The last response is returned as-is, so callers
+    keep using ``raise_for_status`` for error handling.
+    """
+    attempts = max(1, attempts or HTTP_MAX_ATTEMPTS)
+    base = HTTP_BACKOFF_BASE if backoff is None else backoff
+    retry_statuses = frozenset(retry_statuses)
+    host = _host(url)
+    sess = session_for(url)
+    for attempt in range(attempts):
+        last = attempt == attempts - 1
+        t0 = time.monotonic()
+        try:
+            resp = sess.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            _record(host, (time.monotonic() - t0) * 1000, error=True, retry=not last)
+            if last:
+                raise
+            delay = base * (2 ** attempt) + random.uniform(*jitter)
+            logging.debug("[http] %s %s -> %s (retry in %.1fs)", method, host, exc, delay)
+            time.sleep(delay)
+            continue
+        elapsed_ms = (time.monotonic() - t0) * 1000
+        if resp.status_code in retry_statuses and not last:
+            delay = _retry_after(resp)
+            if delay is None:
+                delay = base * (2 ** attempt) + random.uniform(*jitter)
+            if delay <= HTTP_RETRY_AFTER_MAX:
+                _record(host, elapsed_ms, status=resp.status_code, retry=True)
+                logging.debug("[http] %s %s -> %s (retry in %.1fs)", method, host, resp.status_code, delay)
+                time.sleep(delay)
+                continue
+        _record(host, elapsed_ms, status=resp.status_code)
+        return resp
+    raise RuntimeError("unreachable")
+
+
+def _from_cache(url: str, entry: dict) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = entry["status"]
+    resp.headers = CaseInsensitiveDict(entry["headers"])
+    resp._content = entry["body"]
+    resp._content_consumed = True
+    resp.encoding = get_encoding_from_headers(resp.headers) or "utf-8"
+    resp.url = url
+    return resp
+
+
+def _store_when_consumed(resp: requests.Response, key: str, source: str, url: str) -> None:
+    """Tee a streamed body into the cache once the caller has read all of it."""
+    original = resp.iter_content
+
+    def iter_content(chunk_size: int = 1, decode_unicode: bool = False):
+        chunks = []
+        for chunk in original(chunk_size, decode_unicode):
+            chunks.append(chunk)
+            yield chunk
+        if not decode_unicode:
+            http_cache.store(key, source, url, 200, resp.headers, b"".join(chunks))
+
+    resp.iter_content = iter_content
+
+
+def _cached_get(url: str, source: str, **kwargs) -> requests.Response:
+    ttl = HTTP_CACHE_TTL.get(source, 0)
+    key = http_cache.cache_key("GET", url, kwargs.get("params"))
+    entry = http_cache.lookup(key)
+    if entry and time.time() - entry["stored_at"] < ttl:
+        http_cache.record(source, "hits")
+        return _from_cache(url, entry)
+    headers = dict(kwargs.pop("headers", None) or {})
+    if entry:
+        if entry["headers"].get("ETag"):
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if entry["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+    resp = request("GET", url, headers=headers, **kwargs)
+    if resp.status_code == 304 and entry:
+        resp.close()
+        http_cache.touch(key)
+        http_cache.record(source, "revalidated")
+        return _from_cache(url, entry)
+    http_cache.record(source, "misses")
+    if resp.status_code == 200 and ttl > 0:
+        normalized = http_cache.normalize_url(url, kwargs.get("params"))
+        if kwargs.get("stream"):
+            _store_when_consumed(resp, key, source, normalized)
+        else:
+            http_cache.store(key, source, normalized, 200, resp.headers, resp.content)
+    return resp
+
+
+def get(url: str, *, cache: str | None = None, **kwargs) -> requests.Response:
+    """GET on the pooled session; ``cache`` names the source whose TTL applies."""
+    if cache and HTTP_CACHE_ENABLED:
+        return _cached_get(url, cache, **kwargs)
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def host_stats() -> Dict[str, Dict[str, float]]:
+    """Snapshot of per-host counters with the average latency filled in."""
+    with _LOCK:
+        out = {host: dict(st) for host, st in _STATS.items()}
+    for st in out.values():
+        st["avg_ms"] = round(st["total_ms"] / st["requests"], 1) if st["requests"] else 0.0
+        st["total_ms"] = round(st["total_ms"], 1)
+        st["max_ms"] = round(st["max_ms"], 1)
+        st["last_ms"] = round(st["last_ms"], 1)
+    return out
@@ -1,22 +1,9 @@
-import hashlib, json, logging, random, time, requests, re
-from paperradar.config import OPENAI_API_KEY, LLM_MODEL
-from paperradar.storage.paths import LLM_CACHE_PATH
-
-LLM_CACHE = {}
-LLM_MAX_RETRIES=3; LLM_BACKOFF_BASE=0.8; LLM_BACKOFF_JITTER=(0.0,0.6)
-
-def load_llm_cache():
-    global LLM_CACHE
-    try:
-        import os
-        if os.path.exists(LLM_CACHE_PATH):
-            LLM_CACHE = json.load(open(LLM_CACHE_PATH,"r",encoding="utf-8"))
-            logging.info(f"[llm] cache loaded: {len(LLM_CACHE)}")
-    except Exception as ex:
-        logging.warning(f"[llm] cache load failed: {ex}")
-
-def save_llm_cache():
-    json.dump(LLM_CACHE, open(LLM_CACHE_PATH,"w",encoding="utf-8"), ensure_ascii=False)
+import hashlib, json, logging, re
+from paperradar.config import OPENAI_API_KEY, LLM_BATCH_SIZE, LLM_PAPER_DIGEST
+from paperradar.core.llm_executor import LLM_EXECUTOR, deadline
+from paperradar.core.matcher import matcher_for
+from paperradar.core.openai_client import BACKGROUND, chat_json
+from paperradar.storage import llm_cache
 
 def _key(summary, topics, title, abstract):
     h = hashlib.sha256()
@@ -25,14 +12,23 @@ def _key(summary, topics, title, abstract):
         h.update(s.encode("utf-8"))
     return h.hexdigest()
 
+def _digest_key(title, abstract):
+    h = hashlib.sha256()
+    for s in (title or "", abstract or ""):
+        h.update(s.encode("utf-8")); h.update(b"\0")
+    return llm_cache.DIGEST_PREFIX + h.hexdigest()
+
 def _tokenize(text: str):
     return re.findall(r"[a-zA-ZÁÉÍÓÚáéíóúñü]{4,}", (text or "").lower())
 
 def heuristics(summary, topics, title, abstract):
     pf_tokens = set(_tokenize(summary))
     pf_tokens.update(t.lower() for t in (topics or []))
-    paper_tokens = set(_tokenize((title or "") + " " + (abstract or "")))
-    overlap = sorted(pf_tokens.intersection(paper_tokens))
+    paper_text = (title or "") + " " + (abstract or "")
+    paper_tokens = set(_tokenize(paper_text))
+    # topics de varias palabras: se buscan como frase en el texto del paper
+    phrases = matcher_for(topics or []).matched_topics(paper_text)
+    overlap = phrases + [t for t in sorted(pf_tokens.intersection(paper_tokens)) if t not in {p.lower() for p in phrases}]
     sims = []
     if overlap:
         sims.append("The paper references shared themes: " + ", ".join(overlap[:4]))
@@ -48,16 +44,111 @@ def heuristics(summary, topics, title, abstract):
         ideas.append("Identify a concrete follow-up experiment inspired by this paper.")
     return {"similarities": sims[:3], "ideas": ideas[:2], "tag": "heur"}
 
-load_llm_cache()
+def _bullets(parsed):
+    return {"similarities":list(parsed.get("similarities",[]))[:3], "ideas":list(parsed.get("ideas",[]))[:2], "tag":"llm"}
+
+def _paper_text(abstract, digest):
+    if not digest:
+        return f"Abstract: {abstract}"
+    return (f"Key findings: {'; '.join(digest['findings'])}\n"
+            f"Methods: {'; '.join(digest['methods'])}\n"
+            f"Keywords: {', '.join(digest['keywords'])}")
+
+def _numbered(content, n, fields):
+    """Entries of a numbered "papers" answer as {position: entry}; only entries with one of ``fields`` count."""
+    try:
+        entries = json.loads(content).get("papers") or []
+    except (ValueError, AttributeError) as e:
+        logging.warning(f"[llm] batch parse failed -> {e}")
+        return {}
+    out = {}
+    for pos, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            continue
+        try:
+            k = int(entry.get("id", pos + 1))
+        except (TypeError, ValueError):
+            continue
+        if 1 <= k <= n and k - 1 not in out and any(entry.get(f) for f in fields):
+            out[k - 1] = entry
+    return out
 
-def ideas(summary, topics, title, abstract):
+def _digest_prompt(papers):
+    blocks = "\n".join(f"[{i}] Title: {title}\nAbstract: {abstract}\n" for i, (title, abstract) in enumerate(papers, 1))
+    return f"""You summarize new research papers for readers with different interests.
+Respond in JSON with a "papers" list holding one object per paper, in order, each with:
+- id: the number of the paper
+- findings: 2-3 short bullets with the main results or claims
+- methods: 1-3 short bullets with the methods, data or setting
+- keywords: 3-6 keywords
+Papers:
+{blocks}"""
+
+def _complete_digests(keys, prompt, priority):
+    # el digest no depende del perfil: se comparte entre usuarios y no se carga a la cuota de ningún chat
+    content = chat_json(prompt, priority=priority, purpose="digest")
+    out = {}
+    for i, entry in _numbered(content, len(keys), ("findings", "methods")).items():
+        out[keys[i]] = {
+            "findings": [str(x) for x in list(entry.get("findings") or [])[:3]],
+            "methods": [str(x) for x in list(entry.get("methods") or [])[:3]],
+            "keywords": [str(x) for x in list(entry.get("keywords") or [])[:6]],
+        }
+        llm_cache.put(keys[i], out[keys[i]])
+    return out
+
+def _submit_digests(papers, priority=BACKGROUND):
+    """Queue the digests of ``papers`` not cached yet: (keys, cached digests, {key: future})."""
+    keys = [_digest_key(title, abstract) for title, abstract in papers]
+    out = [llm_cache.get(key) for key in keys]
+    futures = {}
     if not OPENAI_API_KEY:
-        out = heuristics(summary, topics, title, abstract); out["tag"]="heur"; return out
-    key = _key(summary, topics, title, abstract)
-    if key in LLM_CACHE:
-        out = LLM_CACHE[key]; out["tag"]="llm_cache"; return out
+        return keys, out, futures
+    fresh = []
+    for i, key in enumerate(keys):
+        if out[i] is not None or key in futures:
+            continue
+        futures[key] = LLM_EXECUTOR.in_flight(key)
+        if futures[key] is None:
+            fresh.append(i)
+    size = max(1, LLM_BATCH_SIZE)
+    for start in range(0, len(fresh), size):
+        chunk = fresh[start:start + size]
+        chunk_keys = [keys[i] for i in chunk]
+        batch_key = llm_cache.DIGEST_PREFIX + hashlib.sha256("|".join(chunk_keys).encode("utf-8")).hexdigest()
+        future = LLM_EXECUTOR.submit(batch_key, _complete_digests, chunk_keys,
+                                     _digest_prompt([papers[i] for i in chunk]), priority,
+                                     aliases=chunk_keys, priority=priority)
+        for key in chunk_keys:
+            futures[key] = future
+    return keys, out, futures
+
+def _collect_digests(keys, out, futures, dl):
+    if not futures:
+        return out
+    results = {key: LLM_EXECUTOR.wait(future, dl) for key, future in futures.items()}
+    for i, key in enumerate(keys):
+        if out[i] is None:
+            ok, res = results[key]
+            if ok and key in res:
+                out[i] = res[key]
+            else:
+                logging.warning(f"[llm] digest unavailable, using the abstract -> {'missing from the answer' if ok else res}")
+    return out
+
+def digests(papers, dl=None, priority=BACKGROUND):
+    """
+    Profile-independent digest (findings, methods, keywords) of each
+    (title, abstract), or None where none arrived before ``dl``. Digests are
+    cached for every user and requested LLM_BATCH_SIZE papers per call; a
+    paper already being digested for someone else waits for that call.
+    """
+    keys, out, futures = _submit_digests(papers, priority)
+    return _collect_digests(keys, out, futures, deadline() if dl is None else dl)
+
+def _single_prompt(summary, topics, title, abstract, digest=None):
     topics_str = ", ".join(topics or [])
-    prompt = f"""You compare a researcher's interests with new papers.
+    return f"""You compare a researcher's interests with new papers.
 Respond in JSON with:
 - similarities: 2-3 concise bullets describing concrete commonalities
 - ideas: 1-2 actionable bullets proposing next steps or integrations
@@ -66,23 +157,152 @@ Research summary:
 Key topics: {topics_str or 'n/a'}
 Paper title:
 {title}
-Paper abstract:
-{abstract}
+{_paper_text(abstract, digest)}
 """
-    headers={"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type":"application/json"}
-    body={"model": LLM_MODEL, "messages":[{"role":"user","content":prompt}], "temperature":0.1, "response_format":{"type":"json_object"}}
-    last=None
-    for attempt in range(LLM_MAX_RETRIES):
-        try:
-            resp = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, data=json.dumps(body), timeout=30)
-            if resp.status_code==429 or 500<=resp.status_code<600: raise requests.HTTPError(f"{resp.status_code} {resp.text[:120]}")
-            resp.raise_for_status()
-            parsed = json.loads(resp.json()["choices"][0]["message"]["content"])
-            out={"similarities":parsed.get("similarities",[])[:3], "ideas":parsed.get("ideas",[])[:2], "tag":"llm"}
-            LLM_CACHE[key]=out; save_llm_cache(); return out
-        except Exception as e:
-            last=e
-            delay = (LLM_BACKOFF_BASE*(2**attempt))+random.uniform(*LLM_BACKOFF_JITTER)
-            time.sleep(delay)
-    logging.warning(f"[llm] failed -> {last}")
+
+def _complete_one(key, prompt, chat_id, priority):
+    out = _bullets(json.loads(chat_json(prompt, chat_id=chat_id, priority=priority, purpose="bullets")))
+    llm_cache.put(key, out)
+    return {key: out}
+
+def _submit_one(key, summary, topics, title, abstract, chat_id=None, priority=BACKGROUND, digest=None):
+    # mismo paper ya en curso (individual o dentro de un lote): se espera esa llamada
+    return LLM_EXECUTOR.submit(key, _complete_one, key, _single_prompt(summary, topics, title, abstract, digest),
+                               chat_id, priority, priority=priority)
+
+def _failed(summary, topics, title, abstract, reason):
+    logging.warning(f"[llm] failed -> {reason if reason is not None else 'deadline exceeded'}")
     out = heuristics(summary, topics, title, abstract); out["tag"]="llm_fail"; return out
+
+def ideas(summary, topics, title, abstract, chat_id=None, priority=BACKGROUND):
+    if not OPENAI_API_KEY:
+        out = heuristics(summary, topics, title, abstract); out["tag"]="heur"; return out
+    key = _key(summary, topics, title, abstract)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        cached["tag"]="llm_cache"; return cached
+    dl = deadline()
+    digest = None
+    if LLM_PAPER_DIGEST:
+        # un solo paper: esperar su digest serían dos llamadas seguidas; se usa el del cache o el
+        # abstract, y el digest se encola en segundo plano para los lotes que lo incluyan después
+        digest = _submit_digests([(title, abstract)], BACKGROUND)[1][0]
+    ok, res = LLM_EXECUTOR.wait(_submit_one(key, summary, topics, title, abstract, chat_id, priority, digest), dl)
+    if ok and key not in res:
+        # era un lote que no devolvió este paper
+        ok, res = LLM_EXECUTOR.wait(_submit_one(key, summary, topics, title, abstract, chat_id, priority, digest), dl)
+    if ok and key in res:
+        return res[key]
+    return _failed(summary, topics, title, abstract, "missing from the answer" if ok else res)
+
+def _batch_prompt(summary, topics, papers, paper_digests=None):
+    topics_str = ", ".join(topics or [])
+    paper_digests = paper_digests or [None] * len(papers)
+    blocks = "\n".join(f"[{i}] Title: {title}\n{_paper_text(abstract, digest)}\n"
+                       for i, ((title, abstract), digest) in enumerate(zip(papers, paper_digests), 1))
+    return f"""You compare a researcher's interests with new papers.
+Respond in JSON with a "papers" list holding one object per paper, in order, each with:
+- id: the number of the paper
+- similarities: 2-3 concise bullets describing concrete commonalities
+- ideas: 1-2 actionable bullets proposing next steps or integrations
+Research summary:
+{summary}
+Key topics: {topics_str or 'n/a'}
+Papers:
+{blocks}"""
+
+def _complete_batch(keys, prompt, chat_id, priority):
+    content = chat_json(prompt, chat_id=chat_id, priority=priority, purpose="bullets")
+    out = {}
+    for i, entry in _numbered(content, len(keys), ("similarities", "ideas")).items():
+        out[keys[i]] = _bullets(entry)
+        llm_cache.put(keys[i], out[keys[i]])
+    return out
+
+class IdeasBatch:
+    """
+    ``ideas_batch`` in steps, so several batches (e.g. one per chat in a
+    tick) can be in flight together: creating it queues the digests,
+    ``submit`` waits for them and queues the bullet requests, ``result``
+    waits for the answers. Each step runs the previous one if needed.
+    """
+
+    def __init__(self, summary, topics, papers, batch_size=None, chat_id=None, priority=BACKGROUND):
+        self.summary, self.topics, self.papers = summary, topics, list(papers)
+        self.size = max(1, batch_size or LLM_BATCH_SIZE)
+        self.chat_id, self.priority = chat_id, priority
+        self.out = [None] * len(self.papers)
+        self.keys = [_key(summary, topics, title, abstract) for title, abstract in self.papers]
+        self.todo = []
+        self.futures = None
+        self.digest = {}
+        self._digests = None
+        if not OPENAI_API_KEY:
+            return
+        for i, key in enumerate(self.keys):
+            cached = llm_cache.get(key)
+            if cached is not None:
+                cached["tag"]="llm_cache"; self.out[i] = cached
+            else:
+                self.todo.append(i)
+        self.dl = deadline()
+        if self.todo and LLM_PAPER_DIGEST:
+            self._digests = _submit_digests([self.papers[i] for i in self.todo], priority)
+
+    def submit(self):
+        if self.futures is not None or not OPENAI_API_KEY:
+            return
+        summary, topics, papers, keys, chat_id, priority = (self.summary, self.topics, self.papers, self.keys,
+                                                            self.chat_id, self.priority)
+        if self._digests is not None:
+            self.digest = dict(zip(self.todo, _collect_digests(*self._digests, self.dl)))
+        digest = self.digest
+        futures = {}
+        fresh = [i for i in self.todo if LLM_EXECUTOR.in_flight(keys[i]) is None]
+        for start in range(0, len(fresh), self.size):
+            chunk = fresh[start:start + self.size]
+            if len(chunk) < 2:
+                continue  # un solo paper: llamada individual
+            chunk_keys = [keys[i] for i in chunk]
+            batch_key = hashlib.sha256("|".join(chunk_keys).encode("utf-8")).hexdigest()
+            future = LLM_EXECUTOR.submit(batch_key, _complete_batch, chunk_keys,
+                                         _batch_prompt(summary, topics, [papers[i] for i in chunk],
+                                                       [digest.get(i) for i in chunk]), chat_id, priority,
+                                         aliases=chunk_keys, priority=priority)
+            for i in chunk:
+                futures[i] = future
+        for i in self.todo:
+            if i not in futures:
+                futures[i] = _submit_one(keys[i], summary, topics, *papers[i], chat_id, priority, digest.get(i))
+        self.futures = futures
+
+    def result(self):
+        summary, topics, papers, keys, chat_id, priority = (self.summary, self.topics, self.papers, self.keys,
+                                                            self.chat_id, self.priority)
+        if not OPENAI_API_KEY:
+            return [ideas(summary, topics, title, abstract, chat_id, priority) for title, abstract in papers]
+        self.submit()
+        out, dl, digest = list(self.out), self.dl, self.digest
+        results = {}
+        for i in self.todo:
+            results[i] = LLM_EXECUTOR.wait(self.futures[i], dl)
+        # papers que el lote no devolvió: una llamada cada uno (también en paralelo)
+        retry = {i: _submit_one(keys[i], summary, topics, *papers[i], chat_id, priority, digest.get(i))
+                 for i in self.todo if results[i][0] and keys[i] not in results[i][1]}
+        for i, future in retry.items():
+            results[i] = LLM_EXECUTOR.wait(future, dl)
+        for i in self.todo:
+            ok, res = results[i]
+            out[i] = res[keys[i]] if ok and keys[i] in res else _failed(summary, topics, *papers[i], "missing from the answer" if ok else res)
+        return out
+
+def ideas_batch(summary, topics, papers, batch_size=None, chat_id=None, priority=BACKGROUND):
+    """
+    Bullets for several (title, abstract) papers: the profile goes once per
+    request with up to ``batch_size`` papers, and the requests run in
+    parallel on the LLM executor. With LLM_PAPER_DIGEST the papers go in as
+    their shared digests rather than full abstracts. Each result is cached
+    under the same key as ``ideas``; papers missing from an unparseable
+    answer fall back to one call each.
+    """
+    return IdeasBatch(summary, topics, papers, batch_size, chat_id, priority).result()
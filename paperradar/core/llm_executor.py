@@ -0,0 +1,117 @@
+"""
+Bounded, deduplicating executor for LLM calls.
+
+Every upstream completion runs on one process-wide pool of
+``LLM_MAX_CONCURRENCY`` workers, so the tick, the web API and the journal
+recommender share a single concurrency limit and a slow retry loop only
+ties up a worker, not the caller. Queued calls start in priority order
+(interactive before background, see ``openai_client``), then FIFO.
+Calls are submitted under a cache key:
+while a key is in flight, submitting it again returns the same future
+(singleflight), and a batched call can register the keys of every paper it
+covers as aliases. Callers wait with a deadline; a call that misses it keeps
+running and still fills the cache for the next request.
+"""
+from __future__ import annotations
+
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from paperradar.config import LLM_DEADLINE_SEC, LLM_MAX_CONCURRENCY
+from paperradar.core.openai_client import BACKGROUND
+
+
+class LLMExecutor:
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._workers: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._stats = {"submitted": 0, "coalesced": 0, "done": 0, "failed": 0, "timed_out": 0}
+
+    def _start_workers(self) -> None:
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, name=f"llm-{len(self._workers)}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _work(self) -> None:
+        while True:
+            _, _, future, keys, fn, args = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._call(keys, fn, args))
+            except BaseException as exc:
+                future.set_exception(exc)
+
+    def in_flight(self, key: str) -> Optional[Future]:
+        with self._lock:
+            return self._in_flight.get(key)
+
+    def submit(self, key: str, fn: Callable, *args, aliases: Sequence[str] = (), priority: int = BACKGROUND) -> Future:
+        """
+        Run ``fn(*args)`` on the pool, or return the future already running
+        under ``key``. ``aliases`` (e.g. per-paper keys of a batch) point at
+        the same future unless they are in flight themselves.
+        """
+        with self._lock:
+            running = self._in_flight.get(key)
+            if running is not None:
+                self._stats["coalesced"] += 1
+                return running
+            self._start_workers()
+            keys = [key] + [a for a in dict.fromkeys(aliases) if a != key and a not in self._in_flight]
+            future: Future = Future()
+            for k in keys:
+                self._in_flight[k] = future
+            self._queue.put((priority, next(self._seq), future, keys, fn, args))
+            self._stats["submitted"] += 1
+        return future
+
+    def _call(self, keys, fn, args):
+        ok = False
+        try:
+            result = fn(*args)
+            ok = True
+            return result
+        finally:
+            # las claves se liberan antes de publicar el resultado: quien llegue después lanza su propia llamada
+            with self._lock:
+                for k in keys:
+                    self._in_flight.pop(k, None)
+                self._stats["done" if ok else "failed"] += 1
+
+    def wait(self, future: Future, deadline: float) -> Tuple[bool, object]:
+        """(True, result) if ``future`` finished before the monotonic ``deadline``; (False, error or None) otherwise."""
+        try:
+            return True, future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            with self._lock:
+                self._stats["timed_out"] += 1
+            return False, None
+        except Exception as exc:
+            return False, exc
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            st = dict(self._stats)
+            st["in_flight"] = len(set(map(id, self._in_flight.values())))
+        st["workers"] = self.max_workers
+        st["queued"] = self._queue.qsize()
+        return st
+
+
+LLM_EXECUTOR = LLMExecutor(LLM_MAX_CONCURRENCY)
+
+
+def deadline(seconds: float | None = None) -> float:
+    """Monotonic deadline ``seconds`` from now (LLM_DEADLINE_SEC by default)."""
+    return time.monotonic() + (LLM_DEADLINE_SEC if seconds is None else seconds)
+
@@ -0,0 +1,131 @@
+"""
+Aho-Corasick multi-pattern matcher for profile topics.
+
+One automaton per topic list finds every topic occurring in a text in a
+single pass (substring semantics, case-insensitive, like ``topic in text``).
+Matchers are cached on the fingerprint of their topic list, and each one
+memoizes the hit set per text key, so across ticks only papers it has not
+seen before are scanned.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+_MAX_MATCHERS = 64
+_MAX_MEMO = 50000
+
+
+class TopicMatcher:
+    def __init__(self, topics: Sequence[str]):
+        self.topics = list(topics)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        for idx, topic in enumerate(self.topics):
+            self._insert(topic.lower(), idx)
+        self._build()
+        self._memo: "OrderedDict[str, Tuple[int, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _insert(self, pattern: str, idx: int) -> None:
+        if not pattern:
+            return
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        self._out[node] = self._out[node] + (idx,)
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> Tuple[int, ...]:
+        """Sorted indices of the topics that occur in ``text``."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        found = set()
+        for ch in (text or "").lower():
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return tuple(sorted(found))
+
+    def find_cached(self, key: str, text: str) -> Tuple[int, ...]:
+        with self._lock:
+            hit = self._memo.get(key)
+            if hit is not None:
+                self._memo.move_to_end(key)
+                return hit
+        hit = self.find(text)
+        with self._lock:
+            self._memo[key] = hit
+            while len(self._memo) > _MAX_MEMO:
+                self._memo.popitem(last=False)
+        return hit
+
+    def matched_topics(self, text: str) -> List[str]:
+        return [self.topics[i] for i in self.find(text)]
+
+    def hit_matrix(self, texts: Sequence[str], keys: Optional[Sequence[str]] = None) -> sparse.csr_matrix:
+        """Binary (texts x topics) CSR matrix of topic occurrences."""
+        indptr = [0]
+        indices: List[int] = []
+        for i, text in enumerate(texts):
+            hits = self.find_cached(keys[i], text) if keys is not None else self.find(text)
+            indices.extend(hits)
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.float64)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(texts), len(self.topics)))
+
+
+_CACHE: "OrderedDict[str, TopicMatcher]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def topics_fingerprint(topics: Sequence[str]) -> str:
+    h = hashlib.sha1()
+    for t in topics:
+        h.update(str(t).lower().encode("utf-8", "ignore"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def matcher_for(topics: Sequence[str]) -> TopicMatcher:
+    """Compiled matcher for a topic list, reused while the list is unchanged."""
+    topics = [str(t) for t in topics]
+    fp = topics_fingerprint(topics)
+    with _CACHE_LOCK:
+        m = _CACHE.get(fp)
+        if m is not None:
+            _CACHE.move_to_end(fp)
+            return m
+    m = TopicMatcher(topics)
+    with _CACHE_LOCK:
+        _CACHE[fp] = m
+        while len(_CACHE) > _MAX_MATCHERS:
+            _CACHE.popitem(last=False)
+    return m
@@ -0,0 +1,66 @@
+"""
+MinHash signatures and LSH banding for near-duplicate detection.
+
+Texts are folded to lowercase ASCII words and shingled into word 3-grams
+(single words for very short texts). Signatures are computed with numpy as
+``min((a * h + b) mod p)`` over the shingle hashes, one row per permutation.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+import zlib
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+_PRIME = np.uint64((1 << 31) - 1)
+_SHINGLE = 3
+
+
+def _params(num_perm: int, seed: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def _words(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return re.findall(r"[a-z0-9]+", text)
+
+
+def shingles(text: str, k: int = _SHINGLE) -> set:
+    words = _words(text)
+    if len(words) < k:
+        return set(words)
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._a, self._b = _params(num_perm)
+
+    def signature(self, text: str) -> np.ndarray | None:
+        """uint32 signature of the text, or None when it has no shingles."""
+        sh = shingles(text)
+        if not sh:
+            return None
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in sh), dtype=np.uint64, count=len(sh))
+        mixed = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME
+        return mixed.min(axis=1).astype(np.uint32)
+
+    def band_keys(self, sig: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            yield band, sig[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    @staticmethod
+    def similarity(a: np.ndarray, b: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return float(np.mean(a == b))
@@ -0,0 +1,258 @@
+"""
+Single entry point for OpenAI requests (chat completions and embeddings).
+
+Every call goes through one scheduler shared by all threads of the process:
+
+* token buckets for requests/minute (``OPENAI_RPM``) and tokens/minute
+  (``OPENAI_TPM``); a call reserves an estimate up front and the bucket is
+  corrected with the usage reported by the response;
+* daily token quotas, global (``OPENAI_DAILY_TOKENS``) and per chat
+  (``OPENAI_USER_DAILY_TOKENS``), read from the usage ledger that the bot and
+  the web process share; background work stops at
+  ``OPENAI_BACKGROUND_SHARE`` of the global quota so interactive requests
+  keep a reserve;
+* two priority classes: when the buckets are empty, waiting interactive
+  requests (``/llm``, web, profile analysis) are served before background
+  tick work.
+
+Retries follow one policy (``MAX_RETRIES`` through the shared HTTP client).
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from paperradar.config import (
+    DEFAULT_LLM_ONDEMAND_MAX_PER_HOUR,
+    LLM_MODEL,
+    OPENAI_API_KEY,
+    OPENAI_BACKGROUND_SHARE,
+    OPENAI_DAILY_TOKENS,
+    OPENAI_RPM,
+    OPENAI_TPM,
+    OPENAI_USER_DAILY_TOKENS,
+)
+from paperradar.core import http
+from paperradar.storage import openai_usage
+
+INTERACTIVE = 0
+BACKGROUND = 1
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+OPENAI_CHAT_URL = "https://api.openai.com/v1/chat/completions"
+OPENAI_EMBEDDINGS_URL = "https://api.openai.com/v1/embeddings"
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.8
+BACKOFF_JITTER = (0.0, 0.6)
+_COMPLETION_ALLOWANCE = 400  # tokens de respuesta reservados antes de conocer el uso real
+
+
+class QuotaExceeded(RuntimeError):
+    """The daily token quota (global or of the chat) is spent."""
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.stamp = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_time(self, n: float) -> float:
+        """Seconds until ``n`` units are available (requests larger than the bucket wait for a full one)."""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        n = min(n, self.capacity)
+        return 0.0 if self.level >= n else (n - self.level) / self.rate
+
+    def take(self, n: float) -> None:
+        if not self.unlimited:
+            self.level -= n
+
+    def adjust(self, n: float) -> None:
+        """Charge (or refund, if negative) ``n`` units after the fact."""
+        if not self.unlimited:
+            self._refill()
+            self.level = min(self.capacity, self.level - n)
+
+
+class Scheduler:
+    """Grants (1 request, n tokens) in priority order, then FIFO within a class."""
+
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._cond = threading.Condition()
+        self._waiting: List[tuple] = []
+        self._seq = itertools.count()
+        self._stats = {name: {"granted": 0, "waited_sec": 0.0, "rejected": 0} for name in _PRIORITY_NAMES.values()}
+
+    def acquire(self, tokens: int, priority: int = BACKGROUND) -> float:
+        """Block until the call may start; returns the seconds waited."""
+        started = time.monotonic()
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            while True:
+                if self._waiting[0] == ticket:
+                    delay = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                    if delay <= 0:
+                        heapq.heappop(self._waiting)
+                        self.requests.take(1)
+                        self.tokens.take(tokens)
+                        waited = time.monotonic() - started
+                        st = self._stats[_PRIORITY_NAMES[priority]]
+                        st["granted"] += 1
+                        st["waited_sec"] = round(st["waited_sec"] + waited, 3)
+                        self._cond.notify_all()
+                        return waited
+                    self._cond.wait(timeout=delay)
+                else:
+                    self._cond.wait()
+
+    def settle(self, reserved: int, used: int) -> None:
+        with self._cond:
+            self.tokens.adjust(used - reserved)
+            self._cond.notify_all()
+
+    def reject(self, priority: int) -> None:
+        with self._cond:
+            self._stats[_PRIORITY_NAMES[priority]]["rejected"] += 1
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            self.requests.wait_time(0)
+            self.tokens.wait_time(0)
+            return {
+                "rpm": self.requests.capacity,
+                "tpm": self.tokens.capacity,
+                "requests_available": round(self.requests.level, 1),
+                "tokens_available": round(self.tokens.level),
+                "waiting": len(self._waiting),
+                "priorities": {name: dict(st) for name, st in self._stats.items()},
+            }
+
+
+SCHEDULER = Scheduler(OPENAI_RPM, OPENAI_TPM)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text or "") // 4)
+
+
+def _check_quota(chat_id: Optional[int], priority: int) -> None:
+    if OPENAI_DAILY_TOKENS > 0:
+        limit = OPENAI_DAILY_TOKENS if priority == INTERACTIVE else OPENAI_DAILY_TOKENS * OPENAI_BACKGROUND_SHARE
+        if openai_usage.tokens_today() >= limit:
+            SCHEDULER.reject(priority)
+            raise QuotaExceeded(f"daily OpenAI token quota reached ({_PRIORITY_NAMES[priority]})")
+    if chat_id is not None and OPENAI_USER_DAILY_TOKENS > 0:
+        if openai_usage.tokens_today(chat_id) >= OPENAI_USER_DAILY_TOKENS:
+            SCHEDULER.reject(priority)
+            raise QuotaExceeded(f"daily OpenAI token quota reached for chat {chat_id}")
+
+
+def _post(url: str, body: dict, timeout: float) -> dict:
+    headers = {"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"}
+    resp = http.post(url, headers=headers, data=json.dumps(body), timeout=timeout,
+                     attempts=MAX_RETRIES, backoff=BACKOFF_BASE, jitter=BACKOFF_JITTER)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def chat_json(prompt: str, *, temperature: float = 0.1, timeout: float = 30,
+              priority: int = BACKGROUND, chat_id: Optional[int] = None, purpose: str = "chat") -> str:
+    """JSON-mode chat completion; returns the message content."""
+    if not OPENAI_API_KEY:
+        raise RuntimeError("OPENAI_API_KEY no configurada.")
+    _check_quota(chat_id, priority)
+    prompt_estimate = estimate_tokens(prompt)
+    reserved = prompt_estimate + _COMPLETION_ALLOWANCE
+    SCHEDULER.acquire(reserved, priority)
+    prompt_tokens = completion_tokens = 0
+    try:
+        payload = _post(OPENAI_CHAT_URL, {
+            "model": LLM_MODEL,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "response_format": {"type": "json_object"},
+        }, timeout)
+        usage = payload.get("usage") or {}
+        prompt_tokens = int(usage.get("prompt_tokens") or prompt_estimate)
+        completion_tokens = int(usage.get("completion_tokens") or 0)
+    finally:
+        # una llamada fallida devuelve su reserva y queda registrada como intento sin tokens
+        SCHEDULER.settle(reserved, prompt_tokens + completion_tokens)
+        openai_usage.record(chat_id, purpose, prompt_tokens, completion_tokens)
+    return payload["choices"][0]["message"]["content"]
+
+
+def embedding(text: str, model: str, *, timeout: float = 30, priority: int = BACKGROUND,
+              chat_id: Optional[int] = None, purpose: str = "embedding") -> list:
+    """Embedding vector of ``text``."""
+    if not OPENAI_API_KEY:
+        raise RuntimeError("OPENAI_API_KEY no configurada.")
+    _check_quota(chat_id, priority)
+    reserved = estimate_tokens(text)
+    SCHEDULER.acquire(reserved, priority)
+    used = 0
+    try:
+        payload = _post(OPENAI_EMBEDDINGS_URL, {"input": text, "model": model}, timeout)
+        used = int((payload.get("usage") or {}).get("prompt_tokens") or reserved)
+    finally:
+        SCHEDULER.settle(reserved, used)
+        openai_usage.record(chat_id, purpose, used, 0)
+    return payload["data"][0]["embedding"]
+
+
+def ondemand_limit(u: dict) -> int:
+    """On-demand LLM calls allowed per hour (the chat's setting or the default)."""
+    return int(u.get("llm_ondemand_max_per_hour", DEFAULT_LLM_ONDEMAND_MAX_PER_HOUR) or 0)
+
+
+def ondemand_left(u: dict) -> int:
+    """On-demand LLM calls left in the last hour (``ondemand_limit``); prunes old stamps."""
+    cutoff = time.time() - 3600
+    recent = [t for t in u.get("llm_ondemand_times", []) if isinstance(t, (int, float)) and t > cutoff]
+    u["llm_ondemand_times"] = recent
+    return max(0, ondemand_limit(u) - len(recent))
+
+
+def note_ondemand(u: dict) -> None:
+    u.setdefault("llm_ondemand_times", []).append(time.time())
+
+
+def usage_for(u: dict, chat_id: Optional[int] = None) -> Dict[str, object]:
+    """Today's usage of one chat plus its quotas, for ``/status`` and the API."""
+    if chat_id is None:
+        chat_id = u.get("chat_id")
+    today = openai_usage.summary(openai_usage.NO_CHAT if chat_id is None else chat_id)
+    return {
+        "today": today,
+        "daily_token_quota": OPENAI_USER_DAILY_TOKENS or None,
+        "ondemand_left": ondemand_left(u),
+        "ondemand_max_per_hour": ondemand_limit(u),
+    }
+
+
+def stats() -> Dict[str, object]:
+    st = SCHEDULER.stats()
+    st["today"] = openai_usage.summary()
+    st["daily_token_quota"] = OPENAI_DAILY_TOKENS or None
+    st["background_share"] = OPENAI_BACKGROUND_SHARE
+    return st
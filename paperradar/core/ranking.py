@@ -1,12 +1,32 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from paperradar.config import (
+    ANN_NPROBE,
+    RANK_EMBED_SHORTLIST,
+    RANK_EMBED_WEIGHT,
+    RANK_PREFILTER_TERMS,
+    RANK_RECALL_AT,
+    RANK_RECALL_SAMPLE_EVERY,
+    RANK_SHORTLIST_MIN_SCORE,
+    RANK_SHORTLIST_SIZE,
+)
+from paperradar.core.ann import IVFIndex
+from paperradar.core.features import FEATURES, FeatureCache, smoothed_idf, text_key
+from paperradar.core.matcher import matcher_for
+from paperradar.core.vectors import VectorMatrix, unit
 
 BETA_DISLIKE = 0.40
+LIKE_WEIGHT = 0.5
 PRIOR_SCALE = 0.5
 
 
-def _mix_title_abstract(it):
+def item_text(it):
     return (" " + (it.get("title", "") or "") + " ") * 3 + " " + (it.get("abstract") or "")
 
 
@@ -26,66 +46,432 @@ def _boost_profile(profile_text: str, topic_weights: dict) -> str:
     return profile_text
 
 
-def _boost_item(item_text: str, topic_weights: dict) -> str:
-    if not topic_weights:
-        return item_text
-    lower = item_text.lower()
-    additions = []
-    for term, weight in topic_weights.items():
-        if term.lower() in lower:
-            repeats = 2 if weight > 0.1 else 1
-            additions.extend([term] * repeats)
-    if additions:
-        return f"{item_text} {' '.join(additions)}"
-    return item_text
+def _item_repeats(weight: float) -> int:
+    return 2 if weight > 0.1 else 1
 
 
-def _topic_prior(item_text: str, topic_weights: dict) -> float:
-    if not topic_weights:
-        return 0.0
-    lower = item_text.lower()
-    score = sum(weight for term, weight in topic_weights.items() if term.lower() in lower)
-    return float(PRIOR_SCALE * score)
+def profile_document(profile_text: str, topic_weights: dict, likes: Sequence[str] = ()) -> str:
+    """Text a profile is vectorized from: profile (+ liked texts) with its topics repeated by weight."""
+    base = f"{profile_text} {' '.join(likes)}" if likes else profile_text
+    return _boost_profile(base, topic_weights or {})
+
+
+@dataclass
+class FeedbackVectors:
+    """Precomputed feedback: mean sublinear-tf rows (hashed space) and mean like embedding."""
+    likes: Optional[sparse.csr_matrix] = None
+    dislikes: Optional[sparse.csr_matrix] = None
+    like_embedding: Optional[np.ndarray] = None
+
+
+@dataclass
+class RankRequest:
+    profile_text: str
+    likes: list = field(default_factory=list)
+    dislikes: list = field(default_factory=list)
+    topic_weights: dict = field(default_factory=dict)
+    embedding: Optional[np.ndarray] = None  # unit profile vector (hybrid scoring)
+    feedback: Optional[FeedbackVectors] = None  # replaces likes/dislikes texts when set
+
+
+class ItemIndex:
+    """
+    TF-IDF matrix of a corpus snapshot, built once and shared by every
+    profile ranked against that snapshot.
+
+    Item rows come from the cross-tick hashed feature cache (only papers not
+    seen before are vectorized); IDF weights come from its rolling document
+    frequencies plus the profiles ranked so far, counted as one more
+    document (``include_profiles``), so a term shared by a profile and a
+    single paper keeps its weight as it did when the vectorizer was fitted
+    on profile + items. ``retain=True`` evicts cached rows of papers that are
+    no longer in ``items`` (use it for full snapshots, not for subsets).
+    Stored paper embeddings (and their ANN index) can be attached with
+    ``attach_vectors``.
+    """
+
+    def __init__(self, items: Sequence[dict], features: FeatureCache = FEATURES, retain: bool = False):
+        self.items = list(items)
+        self.features = features
+        self.texts = [item_text(it) for it in self.items]
+        self.keys = [text_key((it.get("id") or it.get("url") or "")[:200], t) for it, t in zip(self.items, self.texts)]
+        self._tf = features.rows(list(zip(self.keys, self.texts)))
+        if retain:
+            features.retain(self.keys)
+        self._n, self._df = features.frequencies()
+        self._min_df = 2 if len(self.items) > 1 else 1
+        self._profile_cols = np.zeros(0, dtype=np.int64)
+        self.generation = 0
+        self.lock = threading.RLock()
+        self._postings: Optional[sparse.csc_matrix] = None
+        self._reweigh()
+        self._lower: Optional[List[str]] = None
+        self.vectors: Optional[VectorMatrix] = None
+        self.vector_rows: Optional[np.ndarray] = None
+        self.ann: Optional[IVFIndex] = None
+        self._vector_items: Dict[str, int] = {}
+        self._dense_block: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _reweigh(self) -> None:
+        df, n = self._df, self._n
+        if len(self._profile_cols):
+            df = df.copy()
+            df[self._profile_cols] += 1.0
+            n += 1
+        self.idf = smoothed_idf(n, df, self._min_df)
+        U = self._weigh(self._tf)
+        # norma de cada fila antes de normalizar: hace falta para re-normalizar los items con topics
+        self.norms = np.sqrt(np.asarray(U.multiply(U).sum(axis=1)).ravel())
+        self.X = normalize(U).tocsr()
+        self._postings = None
+
+    def include_profiles(self, texts: Sequence[str]) -> bool:
+        """
+        Count the features of ``texts`` (profile documents) in the document
+        frequencies; re-weighs the matrix and bumps ``generation`` when they
+        bring features not counted yet.
+        """
+        cols = np.unique(self.features.transform(list(texts)).indices) if texts else self._profile_cols
+        with self.lock:
+            merged = np.union1d(self._profile_cols, cols)
+            if len(merged) == len(self._profile_cols):
+                return False
+            self._profile_cols = merged
+            self._reweigh()
+            self.generation += 1
+            return True
+
+    def attach_vectors(self, vectors: VectorMatrix, keys: Sequence[str], ann: Optional[IVFIndex] = None) -> int:
+        """Map each item (by its embedding key) to its row in ``vectors``; returns how many have one."""
+        self.vectors = vectors
+        self.ann = ann
+        self.vector_rows = vectors.lookup(keys)
+        has = np.flatnonzero(self.vector_rows >= 0)
+        self._vector_items = {keys[i]: int(i) for i in has}
+        # bloque contiguo con los vectores de los items del snapshot (producto único por perfil)
+        self._dense_block = vectors.data[self.vector_rows[has]] if len(has) else None
+        return len(has)
+
+    def dense_scores(self, embedding: Optional[np.ndarray], rows: np.ndarray) -> Optional[np.ndarray]:
+        """Embedding cosine for ``rows`` (NaN where the item has no vector); None if not applicable."""
+        if embedding is None or self._dense_block is None or embedding.size != self.vectors.dim:
+            return None
+        out = np.full(len(rows), np.nan)
+        if len(rows) == len(self.items):
+            out[self.vector_rows >= 0] = self._dense_block @ embedding
+            return out
+        vr = self.vector_rows[rows]
+        has = vr >= 0
+        if has.any():
+            out[has] = self.vectors.data[vr[has]] @ embedding
+        return out
+
+    def nearest(self, embedding: Optional[np.ndarray], k: int) -> Optional[np.ndarray]:
+        """Rows of the ``k`` items closest to ``embedding`` (ANN index when trained, else exhaustive)."""
+        if embedding is None or self._dense_block is None or k <= 0:
+            return None
+        if self.ann is not None and self.ann.trained:
+            # el índice cubre todo el store; se pide de más para compensar papers fuera del snapshot
+            hits = self.ann.search(embedding, 2 * k, ANN_NPROBE)
+            rows = [self._vector_items[key] for key, _ in hits if key in self._vector_items]
+            return np.array(rows[:k], dtype=np.int64)
+        dense = self.dense_scores(embedding, np.arange(len(self.items)))
+        if dense is None:
+            return None
+        known = np.flatnonzero(~np.isnan(dense))
+        if len(known) > k:
+            known = known[np.argpartition(dense[known], -k)[-k:]]
+        return known
+
+    def _weigh(self, tf: sparse.csr_matrix) -> sparse.csr_matrix:
+        # escala columna a columna sin armar una diagonal de 2^bits features
+        out = tf.tocsr(copy=True)
+        out.data = out.data * self.idf[out.indices]
+        out.eliminate_zeros()
+        return out
+
+    def transform(self, texts: List[str]) -> sparse.csr_matrix:
+        return self._weigh(self.features.transform(texts))
+
+    def topic_hits(self, topics: List[str]) -> sparse.csr_matrix:
+        """Binary (items x topics) matrix: topic occurs in the item's text."""
+        if self._lower is None:
+            # el título va repetido en texts; para buscar topics basta una vez
+            self._lower = [((it.get("title") or "") + " " + (it.get("abstract") or "")).lower() for it in self.items]
+        return matcher_for(topics).hit_matrix(self._lower, self.keys)
+
+    @property
+    def postings(self) -> sparse.csc_matrix:
+        """Inverted index: column f lists the items containing feature f."""
+        if self._postings is None:
+            self._postings = self.X.tocsc()
+        return self._postings
+
+    def shortlist(self, query: sparse.csr_matrix, prior: Optional[np.ndarray], size: int,
+                  floor: float = RANK_SHORTLIST_MIN_SCORE, max_terms: int = RANK_PREFILTER_TERMS,
+                  extra: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Candidate rows for one profile vector: items whose partial score over
+        the profile's ``max_terms`` heaviest terms reaches ``floor``, plus items
+        with a topic hit; the best ``size`` of them by partial score + prior.
+        ``extra`` rows (nearest items by embedding) are added on top.
+        """
+        cols, weights = query.indices, query.data
+        if len(cols) > max_terms:
+            top = np.argpartition(weights, -max_terms)[-max_terms:]
+            cols, weights = cols[top], weights[top]
+        partial = np.asarray(self.postings[:, cols] @ weights).ravel()
+        keep = partial >= floor
+        if prior is not None:
+            partial = partial + prior
+            keep |= prior > 0
+        rows = np.flatnonzero(keep)
+        if len(rows) > size:
+            rows = rows[np.argpartition(partial[rows], -size)[-size:]]
+        if extra is not None and len(extra):
+            rows = np.union1d(rows, extra)
+        return np.sort(rows)
+
+
+_STATS_LOCK = threading.Lock()
+_SHORTLIST_STATS = {
+    "batches": 0,
+    "profiles": 0,
+    "shortlisted": 0,
+    "scored_full": 0,
+    "recall_samples": 0,
+    "recall_sum": 0.0,
+    "recall_min": None,
+}
+
+
+def shortlist_stats() -> dict:
+    """Counters of the candidate stage (average shortlist size and sampled recall@k)."""
+    with _STATS_LOCK:
+        st = dict(_SHORTLIST_STATS)
+    profiles = st["profiles"] or 1
+    samples = st["recall_samples"]
+    return {
+        "size": RANK_SHORTLIST_SIZE,
+        "batches": st["batches"],
+        "avg_candidates": round(st["shortlisted"] / profiles, 1),
+        "avg_fraction": round(st["shortlisted"] / max(1, st["scored_full"]), 4),
+        "recall_at": RANK_RECALL_AT,
+        "recall_samples": samples,
+        "recall_mean": round(st["recall_sum"] / samples, 4) if samples else None,
+        "recall_min": st["recall_min"],
+    }
+
+
+def _topic_boost(index: ItemIndex, rows: np.ndarray, tw: dict, Hr: sparse.csr_matrix):
+    """
+    How the TF-IDF row (before normalization) of each item in ``rows`` changes
+    when the profile topics it contains are appended to its text, repeated by
+    weight, as the original ranker boosted items: (positions in ``rows``,
+    sparse delta rows), or (positions, None) when no item has a topic.
+    """
+    hit = np.flatnonzero(Hr.getnnz(axis=1))
+    if not len(hit):
+        return hit, None
+    # el texto agregado depende solo de qué topics tiene el item: se cuenta una vez por combinación
+    topics = [(t, _item_repeats(float(w))) for t, w in tw.items()]
+    Hh = Hr[hit].tocsr()
+    combos: Dict[tuple, int] = {}
+    which = [combos.setdefault(tuple(Hh.indices[Hh.indptr[i]:Hh.indptr[i + 1]]), len(combos)) for i in range(len(hit))]
+    texts = [" ".join(topics[t][0] for t in combo for _ in range(topics[t][1])) for combo in combos]
+    A = index.features.counts(texts)[which].tocoo()
+    # tf sublineal del item en esas columnas -> cuentas crudas, se suman las del topic y se vuelve a 1 + log
+    old = np.asarray(index._tf[rows[hit][A.row], A.col]).ravel()
+    raw = np.where(old > 0, np.exp(old - 1.0), 0.0)
+    delta = index.idf[A.col] * (1.0 + np.log(raw + A.data) - old)
+    return hit, sparse.csr_matrix((delta, (A.row, A.col)), shape=(len(hit), index.X.shape[1]))
+
+
+def _score(index: ItemIndex, rows: np.ndarray, sim: np.ndarray, pen: Optional[np.ndarray],
+           p: sparse.csr_matrix, c: Optional[sparse.csr_matrix], tw: dict, H: Optional[sparse.csr_matrix],
+           dense: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Final scores of ``rows`` from their cosine with the profile (``sim``) and
+    with the dislike centroid (``pen``): items holding profile topics get
+    both cosines recomputed against their boosted row, then the embedding
+    term, the dislike penalty and the topic prior are applied.
+    """
+    sim = np.array(sim, dtype=np.float64)
+    pen = None if pen is None else np.array(pen, dtype=np.float64)
+    Hr = None
+    if tw:
+        Hr = H if len(rows) == len(index) else H[rows]
+        hit, D = _topic_boost(index, rows, tw, Hr)
+        if D is not None:
+            n = index.norms[rows[hit]]
+            ud = n * np.asarray(index.X[rows[hit]].multiply(D).sum(axis=1)).ravel()
+            dd = np.asarray(D.multiply(D).sum(axis=1)).ravel()
+            boosted = np.sqrt(np.maximum(n * n + 2.0 * ud + dd, 1e-12))
+            sim[hit] = (n * sim[hit] + (D @ p.T).toarray().ravel()) / boosted
+            if pen is not None:
+                pen[hit] = (n * pen[hit] + (D @ c.T).toarray().ravel()) / boosted
+    scores = sim
+    if dense is not None:
+        # híbrido: el coseno denso tiene otra escala; se lleva a la media/dispersión del TF-IDF de
+        # las mismas filas antes de mezclar, así tener vector no sube ni baja el score por sí solo
+        has = np.flatnonzero(~np.isnan(dense))
+        if len(has) > 1 and dense[has].std() > 1e-9:
+            d, lex = dense[has], scores[has]
+            calibrated = lex.mean() + (d - d.mean()) * (lex.std() / d.std())
+            scores[has] = (1.0 - RANK_EMBED_WEIGHT) * lex + RANK_EMBED_WEIGHT * calibrated
+    if pen is not None:
+        scores = scores - BETA_DISLIKE * pen
+    if tw:
+        # prior: suma de pesos de los topics presentes en el item
+        scores = scores + PRIOR_SCALE * (Hr @ np.array([float(w) for w in tw.values()]))
+    return scores
+
+
+def _score_rows(index: ItemIndex, rows: np.ndarray, p: sparse.csr_matrix, c: Optional[sparse.csr_matrix],
+                tw: dict, H: Optional[sparse.csr_matrix], dense: Optional[np.ndarray] = None) -> np.ndarray:
+    X = index.X if len(rows) == len(index) else index.X[rows]
+    sim = (X @ p.T).toarray().ravel()
+    pen = (X @ c.T).toarray().ravel() if c is not None else None
+    return _score(index, rows, sim, pen, p, c, tw, H, dense)
+
+
+def _recall(short_rows, short_scores, full_scores, k) -> float:
+    top_full = set(np.argsort(-full_scores)[:k].tolist())
+    if not top_full:
+        return 1.0
+    top_short = set(short_rows[np.argsort(-short_scores)[:k]].tolist())
+    return len(top_full & top_short) / len(top_full)
+
+
+def rank_batch(index: ItemIndex, requests: Sequence[RankRequest], shortlist_size: int = RANK_SHORTLIST_SIZE,
+               rows: Optional[Sequence[int]] = None) -> List[List[tuple]]:
+    """
+    Score every request against the shared item matrix.
+
+    Profile vectors and dislike centroids are built in one pass each; with
+    ``feedback`` set, the precomputed like/dislike centroids are used instead
+    of vectorizing the feedback lists. Requests
+    carrying an ``embedding`` get a hybrid similarity on items with attached
+    vectors (the embedding cosine, rescaled to the TF-IDF mean and spread of
+    those items, blended with it), and their nearest items (ANN index) join
+    the shortlist. With a
+    corpus larger than ``shortlist_size`` every profile first retrieves its
+    candidates from the inverted index (``ItemIndex.shortlist``) and only
+    those are fully scored; items left out are absent from its ranking.
+    Every ``RANK_RECALL_SAMPLE_EVERY`` batches all items are scored too, to
+    measure how many of the true top-k the shortlist kept. Passing ``rows``
+    scores only those items (no shortlist), e.g. the new items of a snapshot.
+    All profile vectors go through one sparse product against the scored
+    rows (every row, ``rows``, or the union of the shortlists), and the
+    dislike centroids through a second one.
+    """
+    out: List[List[tuple]] = [[] for _ in requests]
+    n = len(index)
+    if not n:
+        return out
+    active = [k for k, r in enumerate(requests) if r.profile_text]
+    if not active or (rows is not None and not len(rows)):
+        return out
+
+    profile_texts = [profile_document(requests[k].profile_text, requests[k].topic_weights,
+                                      requests[k].likes if requests[k].feedback is None else ())
+                     for k in active]
+    with index.lock:
+        index.include_profiles(profile_texts)
+        return _rank_active(index, requests, active, profile_texts, shortlist_size, rows, out)
+
+
+def _rank_active(index: ItemIndex, requests: Sequence[RankRequest], active: List[int], profile_texts: List[str],
+                 shortlist_size: int, rows: Optional[Sequence[int]], out: List[List[tuple]]) -> List[List[tuple]]:
+    """Body of ``rank_batch`` for the requests in ``active``, run under ``index.lock``."""
+    n = len(index)
+    P = normalize(index.transform(profile_texts)).tocsr()
+    liked = [j for j, k in enumerate(active) if requests[k].feedback is not None and requests[k].feedback.likes is not None]
+    if liked:
+        # centroide de likes ya vectorizado: solo se re-pondera con el IDF actual
+        L = normalize(index._weigh(sparse.vstack([requests[active[j]].feedback.likes for j in liked])))
+        pos = {j: i for i, j in enumerate(liked)}
+        P = normalize(sparse.vstack([P[j] + LIKE_WEIGHT * L[pos[j]] if j in pos else P[j] for j in range(len(active))])).tocsr()
+
+    cents: Dict[int, sparse.csr_matrix] = {}
+    for j, k in enumerate(active):
+        r = requests[k]
+        if r.feedback is not None:
+            if r.feedback.dislikes is not None:
+                cents[j] = normalize(index._weigh(r.feedback.dislikes))
+        elif r.dislikes:
+            D = normalize(index.transform([_boost_profile(t, r.topic_weights or {}) for t in r.dislikes]))
+            cents[j] = normalize(sparse.csr_matrix(D.mean(axis=0)))
+
+    use_shortlist = rows is None and 0 < shortlist_size < n
+    sample = False
+    if use_shortlist:
+        with _STATS_LOCK:
+            _SHORTLIST_STATS["batches"] += 1
+            sample = RANK_RECALL_SAMPLE_EVERY > 0 and _SHORTLIST_STATS["batches"] % RANK_RECALL_SAMPLE_EVERY == 0
+    all_rows = np.arange(n) if rows is None else np.asarray(rows, dtype=np.int64)
+
+    plans = []
+    for j, k in enumerate(active):
+        r = requests[k]
+        tw = r.topic_weights or {}
+        H = prior = None
+        if tw:
+            H = index.topic_hits(list(tw.keys()))
+            prior = PRIOR_SCALE * (H @ np.array([float(w) for w in tw.values()]))
+        emb = r.embedding if RANK_EMBED_WEIGHT > 0 else None
+        if emb is not None and r.feedback is not None and r.feedback.like_embedding is not None:
+            like_emb = unit(r.feedback.like_embedding)
+            if like_emb is not None and like_emb.size == emb.size:
+                emb = unit(emb + LIKE_WEIGHT * like_emb)
+        if use_shortlist:
+            cand = index.shortlist(P[j], prior, shortlist_size, extra=index.nearest(emb, RANK_EMBED_SHORTLIST))
+        else:
+            cand = all_rows
+        plans.append((tw, H, emb, cand))
+
+    # un producto para todos los perfiles (y otro para los dislikes) sobre la unión de sus candidatos
+    union = np.unique(np.concatenate([plan[3] for plan in plans])) if use_shortlist else all_rows
+    X = index.X if len(union) == n else index.X[union]
+    sims = (X @ P.T).toarray()  # filas de union x perfiles
+    with_dislikes = sorted(cents)
+    pens = {}
+    if with_dislikes:
+        pens = dict(zip(with_dislikes, (X @ sparse.vstack([cents[j] for j in with_dislikes]).T).toarray().T))
+
+    for j, k in enumerate(active):
+        tw, H, emb, cand = plans[j]
+        p, c = P[j], cents.get(j)
+        pos = np.searchsorted(union, cand) if use_shortlist else slice(None)
+        pen = pens[j][pos] if j in pens else None
+        scores = _score(index, cand, sims[pos, j], pen, p, c, tw, H, index.dense_scores(emb, cand))
+        if use_shortlist:
+            recall = None
+            if sample:
+                full = _score_rows(index, all_rows, p, c, tw, H, index.dense_scores(emb, all_rows))
+                recall = _recall(cand, scores, full, RANK_RECALL_AT)
+            with _STATS_LOCK:
+                _SHORTLIST_STATS["profiles"] += 1
+                _SHORTLIST_STATS["shortlisted"] += len(cand)
+                _SHORTLIST_STATS["scored_full"] += n
+                if recall is not None:
+                    _SHORTLIST_STATS["recall_samples"] += 1
+                    _SHORTLIST_STATS["recall_sum"] += recall
+                    prev = _SHORTLIST_STATS["recall_min"]
+                    _SHORTLIST_STATS["recall_min"] = round(recall if prev is None else min(prev, recall), 4)
+        ranked = [(index.items[i], float(sc)) for i, sc in zip(cand.tolist(), scores)]
+        ranked.sort(key=lambda x: x[1], reverse=True)
+        out[k] = ranked
+    return out
 
 
 def rank_items_for_user(profile_text: str, likes: list, dislikes: list, items: list, topic_weights: dict = None):
     if not profile_text or not items:
         return []
-    topic_weights = topic_weights or {}
-    corpus = [_boost_profile(profile_text, topic_weights)]
-    for it in items:
-        item_text = _boost_item(_mix_title_abstract(it), topic_weights)
-        corpus.append(item_text)
-    if likes:
-        like_text = " ".join(likes)
-        corpus[0] = _boost_profile(f"{profile_text} {like_text}", topic_weights)
-    vectorizer = TfidfVectorizer(
-        stop_words="english",
-        max_features=100_000,
-        ngram_range=(1, 3),
-        lowercase=True,
-        sublinear_tf=True,
-        min_df=2,
-    )
-    X = vectorizer.fit_transform(corpus)
-    prof_vec = X[0]
-    item_vecs = X[1:]
-    sims = cosine_similarity(prof_vec, item_vecs).ravel()
-    penalty = np.zeros_like(sims)
-    if dislikes:
-        try:
-            dislike_corpus = [_boost_profile(t, topic_weights) for t in dislikes]
-            D = vectorizer.transform(dislike_corpus)
-            dcent = D.mean(axis=0)
-            penalty = cosine_similarity(item_vecs, dcent).ravel()
-        except Exception:
-            pass
-    ranked = []
-    for idx, (it, s_pos) in enumerate(zip(items, sims)):
-        item_text = corpus[idx + 1]
-        prior = _topic_prior(item_text, topic_weights)
-        s_neg = penalty[idx] if len(dislikes) else 0.0
-        final = float(s_pos) - BETA_DISLIKE * float(s_neg) + prior
-        ranked.append((it, float(final)))
-    ranked.sort(key=lambda x: x[1], reverse=True)
-    return ranked
+    req = RankRequest(profile_text, likes or [], dislikes or [], topic_weights or {})
+    # caché propia: una lista suelta no debe entrar al DF ni al LRU compartidos
+    features = FeatureCache(FEATURES.n_features, max_items=max(1, len(items)))
+    return rank_batch(ItemIndex(items, features=features), [req])[0]
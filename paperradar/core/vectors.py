@@ -0,0 +1,75 @@
+"""
+Dense vectors packed for batch scoring.
+
+``VectorMatrix`` keeps L2-normalized embeddings in one contiguous float32
+matrix with an id -> row map, so scoring every stored paper against a query
+is a single matrix-vector product instead of a per-record cosine loop.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def unit(vector: Sequence[float]) -> Optional[np.ndarray]:
+    """float32 copy of ``vector`` scaled to unit length; None for empty/zero vectors."""
+    if vector is None:
+        return None
+    arr = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(arr)) if arr.size else 0.0
+    if norm == 0.0 or not np.isfinite(norm):
+        return None
+    return arr / norm
+
+
+class VectorMatrix:
+    def __init__(self, ids: List[str], data: np.ndarray, model: str = ""):
+        self.ids = ids
+        self.data = np.ascontiguousarray(data, dtype=np.float32)
+        self.rows: Dict[str, int] = {key: i for i, key in enumerate(ids)}
+        self.model = model
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[Tuple[str, Sequence[float]]], model: str = "") -> "VectorMatrix":
+        """Build from (id, vector); zero vectors and vectors of another dimension are skipped."""
+        ids: List[str] = []
+        vecs: List[np.ndarray] = []
+        dim = 0
+        for key, vector in pairs:
+            v = unit(vector)
+            if v is None:
+                continue
+            if not dim:
+                dim = v.size
+            if v.size != dim:
+                continue
+            ids.append(key)
+            vecs.append(v)
+        data = np.vstack(vecs) if vecs else np.zeros((0, dim), dtype=np.float32)
+        return cls(ids, data, model)
+
+    @classmethod
+    def from_mapping(cls, vectors: Mapping[str, Sequence[float]], model: str = "") -> "VectorMatrix":
+        return cls.from_pairs(vectors.items(), model)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dim(self) -> int:
+        return int(self.data.shape[1]) if self.data.ndim == 2 else 0
+
+    def row_of(self, key: str) -> int:
+        return self.rows.get(key, -1)
+
+    def lookup(self, keys: Sequence[str]) -> np.ndarray:
+        """Row of each key, -1 where the key has no vector."""
+        return np.fromiter((self.rows.get(k, -1) for k in keys), dtype=np.int64, count=len(keys))
+
+    def cosine(self, query: Sequence[float]) -> np.ndarray:
+        """Cosine of ``query`` against every row (zeros if the query is unusable)."""
+        q = unit(query)
+        if q is None or q.size != self.dim:
+            return np.zeros(len(self), dtype=np.float32)
+        return self.data @ q
@@ -1,7 +1,10 @@
-import urllib.parse, xml.etree.ElementTree as ET, requests, logging
+import urllib.parse, xml.etree.ElementTree as ET, logging
+from paperradar.core import http
 from paperradar.core.model import Item
 from paperradar.core.filters import english_only, sanitize_text, year_from_date
 from paperradar.fetchers.search_terms import get_search_terms, DEFAULT_TERMS
+from paperradar.config import ARXIV_PAGE_SIZE, FETCH_INCREMENTAL
+from paperradar.storage import watermarks
 
 
 def pass_hard_filters(blob: str) -> bool:
@@ -11,6 +14,10 @@ def pass_hard_filters(blob: str) -> bool:
 
 
 NS = {"a": "http://www.w3.org/2005/Atom", "ar": "http://arxiv.org/schemas/atom"}
+_A = "{%s}" % NS["a"]
+_AR = "{%s}" % NS["ar"]
+_ENTRY = _A + "entry"
+_CHUNK_SIZE = 64 * 1024
 
 _BASE_QUERIES = [
     '("operational modal analysis" OR OMA OR "stochastic subspace" OR SSI-Data OR FDD OR EFDD OR "Bayesian OMA") AND (bridge OR building OR "reinforced concrete" OR masonry OR "steel girder" OR "cable-stayed")',
@@ -23,77 +30,167 @@ _BASE_QUERIES = [
 _MAX_DYNAMIC_TERMS = 20
 
 
-def _iter_queries():
+def available():
+    return True
+
+
+def base_queries():
+    """Fixed domain queries fetched on every run, independent of user terms."""
+    out = []
     seen = set()
     for base in _BASE_QUERIES:
         q = base.strip()
-        if not q:
-            continue
-        key = q.lower()
-        if key in seen:
-            continue
-        seen.add(key)
-        yield q
-    dynamic = (get_search_terms() or list(DEFAULT_TERMS))[:_MAX_DYNAMIC_TERMS]
-    for term in dynamic:
-        expr = str(term or "").strip()
-        if not expr:
-            continue
-        if not (expr.startswith("(") and expr.endswith(")")):
-            expr = f"({expr})"
-        key = expr.lower()
-        if key in seen:
-            continue
-        seen.add(key)
-        yield expr
+        if q and q.lower() not in seen:
+            seen.add(q.lower())
+            out.append(q)
+    return out
 
 
-def fetch(max_results=100):
+def to_query(term):
+    expr = str(term or "").strip()
+    if expr and not (expr.startswith("(") and expr.endswith(")")):
+        expr = f"({expr})"
+    return expr
+
+
+def queries():
+    out = base_queries()
+    seen = {q.lower() for q in out}
+    for term in (get_search_terms() or list(DEFAULT_TERMS))[:_MAX_DYNAMIC_TERMS]:
+        expr = to_query(term)
+        if expr and expr.lower() not in seen:
+            seen.add(expr.lower())
+            out.append(expr)
+    return out
+
+
+def _query_url(q, start, size):
+    return (
+        "https://export.arxiv.org/api/query?"
+        f"search_query=all:{urllib.parse.quote(q)}&start={start}&max_results={size}"
+        "&sortBy=submittedDate&sortOrder=descending"
+    )
+
+
+def _iter_entries(chunks):
+    """
+    Yield Atom <entry> elements as soon as each one is fully parsed.
+
+    Each entry is cleared after the consumer is done with it (and detached
+    from the feed root), so memory stays bounded by a single entry.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+
+    def _drain():
+        nonlocal root
+        for event, elem in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+            if elem.tag == _ENTRY:
+                yield elem
+                elem.clear()
+                if root is not None:
+                    root.clear()
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from _drain()
+    parser.close()
+    yield from _drain()
+
+
+def _entry_item(entry, entry_id, published):
+    title = sanitize_text(entry.findtext(_A + "title", default=""))
+    summary = sanitize_text(entry.findtext(_A + "summary", default=""))
+    blob = f"{title} {summary}"
+    if not english_only(blob):
+        return None
+    if not pass_hard_filters(blob):
+        return None
+    link = ""
+    for l in entry.iterfind(_A + "link"):
+        if l.get("type") == "text/html":
+            link = l.get("href")
+            break
+    authors = [
+        sanitize_text(a.findtext(_A + "name", default=""))
+        for a in entry.iterfind(_A + "author")
+    ]
+    journal_ref = sanitize_text(entry.findtext(_AR + "journal_ref", default=""))
+    return Item(
+        id=entry_id or link,
+        title=title,
+        abstract=summary,
+        url=link or entry_id,
+        published=published,
+        source="arxiv",
+        authors=[x for x in authors if x],
+        venue=journal_ref,
+        year=str(year_from_date(published)) if published else "",
+    ).__dict__
+
+
+def fetch_query(q, max_results=100):
+    """
+    Fetch one query, newest first.
+
+    The Atom feed is parsed incrementally from the response stream and items
+    are built entry by entry. With a watermark the query is paged in
+    ARXIV_PAGE_SIZE chunks and stops as soon as an entry older than the
+    watermark shows up, so steady-state ticks only parse new submissions.
+    """
+    mark = watermarks.get_watermark("arxiv", q) if FETCH_INCREMENTAL else None
+    mark_published = (mark or {}).get("stamp") or ""
+    page_size = min(max_results, ARXIV_PAGE_SIZE) if mark else max_results
     items = []
-    queries = list(_iter_queries())
-    logging.debug(f"[arXiv] using {len(queries)} search terms")
-    for q in queries:
-        url = (
-            "https://export.arxiv.org/api/query?"
-            f"search_query=all:{urllib.parse.quote(q)}&start=0&max_results={max_results}"
-            "&sortBy=submittedDate&sortOrder=descending"
-        )
+    seen = []
+    start = 0
+    while start < max_results:
+        size = min(page_size, max_results - start)
+        r = http.get(_query_url(q, start, size), timeout=20, cache="arxiv", stream=True)
         try:
-            r = requests.get(url, timeout=20)
             r.raise_for_status()
-            root = ET.fromstring(r.text)
+            chunks = r.iter_content(chunk_size=_CHUNK_SIZE)
+            count = 0
+            reached_seen = False
+            for entry in _iter_entries(chunks):
+                count += 1
+                entry_id = sanitize_text(entry.findtext(_A + "id", default=""))
+                published = sanitize_text(entry.findtext(_A + "published", default=""))
+                if mark_published and published and published < mark_published:
+                    reached_seen = True
+                    break
+                if watermarks.is_seen(mark, published, entry_id):
+                    continue
+                seen.append((published, entry_id))
+                item = _entry_item(entry, entry_id, published)
+                if item:
+                    items.append(item)
+            # read the rest of the page so the connection is reusable and the
+            # response cache gets the full body
+            for _ in chunks:
+                pass
+        finally:
+            r.close()
+        if reached_seen or not mark or count < size:
+            break
+        start += size
+    watermarks.propose("arxiv", q, seen)
+    return items
+
+
+def fetch(max_results=100):
+    items = []
+    qs = queries()
+    logging.debug(f"[arXiv] using {len(qs)} search terms")
+    for q in qs:
+        try:
+            items.extend(fetch_query(q, max_results))
         except Exception as ex:
             logging.warning(f"[arXiv] fail {q[:40]}... -> {ex}")
             continue
-        for entry in root.findall("a:entry", NS):
-            title = sanitize_text(entry.findtext("a:title", default="", namespaces=NS))
-            summary = sanitize_text(entry.findtext("a:summary", default="", namespaces=NS))
-            blob = f"{title} {summary}"
-            if not english_only(blob):
-                continue
-            if not pass_hard_filters(blob):
-                continue
-            link = ""
-            for l in entry.findall("a:link", NS):
-                if l.get("type") == "text/html":
-                    link = l.get("href")
-                    break
-            published = sanitize_text(entry.findtext("a:published", default="", namespaces=NS))
-            authors = [
-                sanitize_text(a.findtext("a:name", default="", namespaces=NS))
-                for a in entry.findall("a:author", NS)
-            ]
-            journal_ref = sanitize_text(entry.findtext("ar:journal_ref", default="", namespaces=NS))
-            items.append(Item(
-                id=sanitize_text(entry.findtext("a:id", default="", namespaces=NS)) or link,
-                title=title,
-                abstract=summary,
-                url=link or sanitize_text(entry.findtext("a:id", default="", namespaces=NS)),
-                published=published,
-                source="arxiv",
-                authors=[x for x in authors if x],
-                venue=journal_ref,
-                year=str(year_from_date(published)) if published else "",
-            ).__dict__)
     logging.info(f"[arXiv] total_filtered={len(items)}")
     return items
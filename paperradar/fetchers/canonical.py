@@ -0,0 +1,147 @@
+"""
+Cross-source canonicalization of fetched records.
+
+The same paper usually arrives several times: arXiv (arXiv id), Crossref
+(DOI), Semantic Scholar and Springer (their own URLs). Records are linked
+when they share a merge key, an extracted DOI, an arXiv id or a normalized
+title + first-author fingerprint; every connected group collapses into the
+first record of the group, enriched with the metadata of the others.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+from typing import Dict, Iterable, List
+
+_DOI_RE = re.compile(r"\b(10\.\d{4,9}/[^\s\"<>]+)", re.I)
+_ARXIV_DOI_RE = re.compile(r"^10\.48550/arxiv\.(.+)$", re.I)
+_ARXIV_URL_RE = re.compile(r"arxiv\.org/(?:abs|pdf)/([^\s?#]+?)(?:v\d+)?(?:\.pdf)?$", re.I)
+_ARXIV_ID_RE = re.compile(r"^(?:arxiv:)?(\d{4}\.\d{4,5}|[a-z\-]+(?:\.[a-z]{2})?/\d{7})(?:v\d+)?$", re.I)
+_MIN_TITLE_CHARS = 24
+
+
+def merge_key(it: dict) -> str:
+    pid = (it.get("id") or it.get("url") or "")
+    if not pid:
+        base = (it.get("title", "") + it.get("abstract", ""))[:400]
+        pid = hashlib.sha1(base.encode("utf-8", "ignore")).hexdigest()
+    return pid[:200]
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+
+def extract_doi(it: dict) -> str:
+    for value in (it.get("doi"), it.get("id"), it.get("url")):
+        m = _DOI_RE.search(value or "")
+        if m:
+            return m.group(1).rstrip(".,;)").lower()
+    return ""
+
+
+def extract_arxiv_id(it: dict) -> str:
+    if it.get("arxiv_id"):
+        return str(it["arxiv_id"]).lower()
+    m = _ARXIV_DOI_RE.match(extract_doi(it))
+    if m:
+        return m.group(1).lower()
+    for value in (it.get("id"), it.get("url")):
+        value = (value or "").strip()
+        m = _ARXIV_URL_RE.search(value) or _ARXIV_ID_RE.match(value)
+        if m:
+            return re.sub(r"v\d+$", "", m.group(1)).lower()
+    return ""
+
+
+def title_fingerprint(it: dict) -> str:
+    """Normalized title + first author's last name; empty when too weak to trust."""
+    title = _fold(it.get("title", ""))
+    authors = it.get("authors") or []
+    if len(title) < _MIN_TITLE_CHARS or not authors:
+        return ""
+    last = _fold(str(authors[0])).split()
+    if not last:
+        return ""
+    return f"{title}|{last[-1]}"
+
+
+def _link_keys(it: dict) -> List[str]:
+    keys = [f"id:{merge_key(it)}"]
+    doi = extract_doi(it)
+    if doi:
+        keys.append(f"doi:{doi}")
+    arxiv_id = extract_arxiv_id(it)
+    if arxiv_id:
+        keys.append(f"arxiv:{arxiv_id}")
+    fp = title_fingerprint(it)
+    if fp:
+        keys.append(f"fp:{fp}")
+    return keys
+
+
+def _merge_group(group: List[dict]) -> dict:
+    merged = dict(group[0])
+    sources = []
+    alt_ids = []
+    for it in group:
+        src = it.get("source") or ""
+        if src and src not in sources:
+            sources.append(src)
+        key = merge_key(it)
+        if key != merge_key(group[0]) and key not in alt_ids:
+            alt_ids.append(key)
+        for field in ("url", "published", "venue", "year"):
+            if not merged.get(field) and it.get(field):
+                merged[field] = it[field]
+        if len(it.get("abstract") or "") > len(merged.get("abstract") or ""):
+            merged["abstract"] = it["abstract"]
+        if len(it.get("authors") or []) > len(merged.get("authors") or []):
+            merged["authors"] = list(it["authors"])
+        for field, value in (("doi", extract_doi(it)), ("arxiv_id", extract_arxiv_id(it))):
+            if value and not merged.get(field):
+                merged[field] = value
+        if it.get("query_owners"):
+            merged["query_owners"] = sorted(set(merged.get("query_owners") or []) | set(it["query_owners"]))
+        for key in it.get("alt_ids") or []:
+            if key != merge_key(group[0]) and key not in alt_ids:
+                alt_ids.append(key)
+    if len(group) > 1 or merged.get("sources"):
+        merged["sources"] = list(dict.fromkeys((merged.get("sources") or []) + sources))
+    if alt_ids:
+        merged["alt_ids"] = alt_ids
+    return merged
+
+
+def canonicalize(items: Iterable[dict]) -> List[dict]:
+    """
+    Collapse records that describe the same paper.
+
+    The first record of each group keeps its id (so sent ids and history
+    stay valid); order follows the first appearance of each group.
+    """
+    items = list(items)
+    parent = list(range(len(items)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    owner: Dict[str, int] = {}
+    for idx, it in enumerate(items):
+        for key in _link_keys(it):
+            other = owner.setdefault(key, idx)
+            if other != idx:
+                a, b = find(other), find(idx)
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+
+    groups: Dict[int, List[dict]] = {}
+    for idx, it in enumerate(items):
+        groups.setdefault(find(idx), []).append(it)
+    return [_merge_group(groups[root]) for root in sorted(groups)]
@@ -1,9 +1,10 @@
-import requests
 import logging
 
+from paperradar.core import http
 from paperradar.core.filters import english_only, sanitize_text, year_from_date
-from paperradar.config import CROSSREF_MAILTO
+from paperradar.config import CROSSREF_MAILTO, CROSSREF_MAX_PAGES, FETCH_INCREMENTAL
 from paperradar.fetchers.search_terms import get_search_terms, DEFAULT_TERMS
+from paperradar.storage import watermarks
 
 
 def pass_hard_filters(blob: str) -> bool:
@@ -13,61 +14,118 @@ def pass_hard_filters(blob: str) -> bool:
 
 
 BASE_URL = "https://api.crossref.org/works"
+MAX_OFFSET = 10000  # deep paging limit of the REST API
 USER_AGENT = f"paperradar-bot/1.0 (mailto:{CROSSREF_MAILTO})" if CROSSREF_MAILTO else "paperradar-bot/1.0"
 
 
+def available():
+    return True
+
+
+def queries():
+    return get_search_terms() or list(DEFAULT_TERMS)
+
+
+def _doi(it):
+    link = it.get("URL", "")
+    return it.get("DOI", link) or link
+
+
+def _indexed(it):
+    return (it.get("indexed") or {}).get("date-time", "")
+
+
+def fetch_query(term, max_results=50):
+    """
+    Fetch one query.
+
+    Without a watermark the newest ``max_results`` records by publication date
+    are fetched. With one (newest ``indexed`` timestamp seen) the request is
+    narrowed server-side with ``from-index-date`` and read oldest-indexed
+    first, page by page (up to CROSSREF_MAX_PAGES pages with new records), so
+    the mark only moves over records that were actually returned; whatever
+    does not fit is picked up from there on the next tick. The filter only
+    has day resolution: records of the mark's day at or before the watermark
+    are skipped before parsing, and pages holding nothing else do not count
+    against the page limit.
+    """
+    headers = {"User-Agent": USER_AGENT}
+    params = {
+        "query": term,
+        "rows": max_results,
+        "sort": "published",
+        "order": "desc",
+    }
+    if CROSSREF_MAILTO:
+        params["mailto"] = CROSSREF_MAILTO
+    mark = watermarks.get_watermark("crossref", term) if FETCH_INCREMENTAL else None
+    pages = 1
+    if mark and mark.get("stamp"):
+        params.update({"filter": f"from-index-date:{mark['stamp'][:10]}", "sort": "indexed", "order": "asc"})
+        pages = max(1, CROSSREF_MAX_PAGES)
+    fresh = []
+    offset = new_pages = 0
+    while True:
+        if offset:
+            params["offset"] = offset
+        r = http.get(BASE_URL, params=params, headers=headers, timeout=20, cache="crossref")
+        r.raise_for_status()
+        batch = r.json().get("message", {}).get("items", [])
+        new = [it for it in batch if not watermarks.is_seen(mark, _indexed(it), _doi(it))]
+        fresh.extend(new)
+        new_pages += bool(new)
+        offset += len(batch)
+        if len(batch) < max_results or new_pages >= pages or offset >= MAX_OFFSET:
+            break
+    items = []
+    seen = []
+    for it in fresh:
+        link = it.get("URL", "")
+        doi = _doi(it)
+        seen.append((_indexed(it), doi))
+        title = sanitize_text(" ".join(it.get("title", [])))
+        abstr = sanitize_text(it.get("abstract", "") or (it.get("subtitle") or [""])[0])
+        if not title:
+            continue
+        if not english_only(title + " " + abstr):
+            continue
+        if not pass_hard_filters(title + " " + abstr):
+            continue
+        issued = it.get("issued", {}).get("date-parts", [[]])
+        year = str(issued[0][0]) if issued and issued[0] else ""
+        if not year:
+            created = it.get("created", {}).get("date-time", "")
+            year = str(year_from_date(created)) if created else ""
+        venue_list = it.get("container-title", [])
+        authors = []
+        for a in it.get("author", []) or []:
+            nm = (sanitize_text(a.get("given", "")) + " " + sanitize_text(a.get("family", ""))).strip() or sanitize_text(a.get("name", ""))
+            if nm:
+                authors.append(nm)
+        items.append({
+            "id": doi,
+            "title": title,
+            "abstract": abstr,
+            "url": link,
+            "published": it.get("created", {}).get("date-time", "") or it.get("issued", {}).get("date-time", ""),
+            "source": "crossref",
+            "authors": authors,
+            "venue": " ".join(venue_list) if venue_list else "",
+            "year": year,
+        })
+    watermarks.propose("crossref", term, seen)
+    return items
+
+
 def fetch(max_results=50):
     items = []
-    headers = {"User-Agent": USER_AGENT}
-    terms = get_search_terms() or list(DEFAULT_TERMS)
+    terms = queries()
     logging.debug(f"[crossref] using {len(terms)} search terms")
     for term in terms:
-        params = {
-            "query": term,
-            "rows": max_results,
-            "sort": "published",
-            "order": "desc",
-        }
-        if CROSSREF_MAILTO:
-            params["mailto"] = CROSSREF_MAILTO
         try:
-            r = requests.get(BASE_URL, params=params, headers=headers, timeout=20)
-            r.raise_for_status()
-            data = r.json()
+            items.extend(fetch_query(term, max_results))
         except Exception as ex:
             logging.warning(f"[crossref] fail {term}: {ex}")
             continue
-        for it in data.get("message", {}).get("items", []):
-            title = sanitize_text(" ".join(it.get("title", [])))
-            abstr = sanitize_text(it.get("abstract", "") or (it.get("subtitle") or [""])[0])
-            link = it.get("URL", "")
-            if not title:
-                continue
-            if not english_only(title + " " + abstr):
-                continue
-            if not pass_hard_filters(title + " " + abstr):
-                continue
-            issued = it.get("issued", {}).get("date-parts", [[]])
-            year = str(issued[0][0]) if issued and issued[0] else ""
-            if not year:
-                created = it.get("created", {}).get("date-time", "")
-                year = str(year_from_date(created)) if created else ""
-            venue_list = it.get("container-title", [])
-            authors = []
-            for a in it.get("author", []) or []:
-                nm = (sanitize_text(a.get("given", "")) + " " + sanitize_text(a.get("family", ""))).strip() or sanitize_text(a.get("name", ""))
-                if nm:
-                    authors.append(nm)
-            items.append({
-                "id": it.get("DOI", link) or link,
-                "title": title,
-                "abstract": abstr,
-                "url": link,
-                "published": it.get("created", {}).get("date-time", "") or it.get("issued", {}).get("date-time", ""),
-                "source": "crossref",
-                "authors": authors,
-                "venue": " ".join(venue_list) if venue_list else "",
-                "year": year,
-            })
     logging.info(f"[crossref] total={len(items)}")
     return items
@@ -0,0 +1,117 @@
+"""
+Parallel fan-out for fetcher queries.
+
+Every (source, query) pair becomes a task. Tasks run on a bounded thread pool
+while a per-source limit caps how many requests hit the same upstream at once.
+An overall deadline bounds the wall-clock time: whatever finished by then is
+returned and the remaining work is abandoned. Abandoned tasks that already
+started are not interrupted; they finish in the background and their results
+are dropped, so callers must not trust side effects they make after the run.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Tuple
+
+
+@dataclass
+class FetchTask:
+    source: str
+    query: str
+    fn: Callable[[], list]
+
+
+def _empty_stats() -> Dict[str, int]:
+    return {"queries": 0, "done": 0, "failed": 0, "timed_out": 0, "items": 0}
+
+
+def run_tasks(
+    tasks: Sequence[FetchTask],
+    *,
+    max_workers: int,
+    source_limits: Dict[str, int] | None = None,
+    deadline_sec: float | None = None,
+) -> Tuple[List[dict], Dict[str, object]]:
+    """
+    Execute fetch tasks concurrently and return (items, stats).
+
+    Items keep the order of ``tasks`` regardless of completion order so the
+    downstream merge stays deterministic. ``stats["completed"]`` lists the
+    (source, query) pairs whose results were kept.
+    """
+    started = time.monotonic()
+    source_limits = source_limits or {}
+    per_source: Dict[str, Dict[str, int]] = {}
+    queues: Dict[str, deque] = {}
+    for idx, task in enumerate(tasks):
+        queues.setdefault(task.source, deque()).append(idx)
+        per_source.setdefault(task.source, _empty_stats())["queries"] += 1
+
+    results: Dict[int, list] = {}
+    running: Dict[object, Tuple[int, str]] = {}
+    in_flight: Dict[str, int] = {name: 0 for name in queues}
+    completed: List[Tuple[str, str]] = []
+    if not tasks:
+        return [], {"elapsed_sec": 0.0, "sources": per_source, "partial": False, "completed": completed}
+
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="fetch")
+
+    def _fill() -> None:
+        for name, queue in queues.items():
+            limit = max(1, int(source_limits.get(name) or max_workers))
+            while queue and in_flight[name] < limit:
+                idx = queue.popleft()
+                future = pool.submit(tasks[idx].fn)
+                running[future] = (idx, name)
+                in_flight[name] += 1
+
+    partial = False
+    try:
+        _fill()
+        while running:
+            timeout = None
+            if deadline_sec:
+                timeout = deadline_sec - (time.monotonic() - started)
+                if timeout <= 0:
+                    partial = True
+                    break
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                partial = True
+                break
+            for future in done:
+                idx, name = running.pop(future)
+                in_flight[name] -= 1
+                stats = per_source[name]
+                try:
+                    results[idx] = future.result() or []
+                    completed.append((name, tasks[idx].query))
+                    stats["done"] += 1
+                    stats["items"] += len(results[idx])
+                except Exception as exc:
+                    stats["failed"] += 1
+                    logging.warning("[fetch] %s fail %s: %s", name, tasks[idx].query[:60], exc)
+            _fill()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if partial:
+        for idx, name in running.values():
+            per_source[name]["timed_out"] += 1
+        for name, queue in queues.items():
+            per_source[name]["timed_out"] += len(queue)
+        logging.warning(
+            "[fetch] deadline %.1fs reached: %d queries abandoned",
+            deadline_sec or 0,
+            sum(s["timed_out"] for s in per_source.values()),
+        )
+
+    items: List[dict] = []
+    for idx in range(len(tasks)):
+        items.extend(results.get(idx, []))
+    elapsed = round(time.monotonic() - started, 3)
+    return items, {"elapsed_sec": elapsed, "sources": per_source, "partial": partial, "completed": completed}
@@ -4,9 +4,8 @@ import logging
 from collections import Counter, defaultdict
 from typing import Dict, Iterable, List, Sequence, Tuple
 
-import requests
-
 from paperradar.config import CROSSREF_MAILTO, ENABLE_CROSSREF
+from paperradar.core import http
 
 BASE_URL = "https://api.crossref.org"
 USER_AGENT = (
@@ -50,7 +49,7 @@ def _request(path: str, params: Dict[str, object] | None = None) -> Dict:
         params.setdefault("mailto", CROSSREF_MAILTO)
     headers = {"User-Agent": USER_AGENT}
     url = f"{BASE_URL.rstrip('/')}/{path.lstrip('/')}"
-    resp = requests.get(url, params=params, headers=headers, timeout=30)
+    resp = http.get(url, params=params, headers=headers, timeout=30)
     resp.raise_for_status()
     data = resp.json()
     return data.get("message", data)
@@ -1,8 +1,12 @@
-from .arxiv import fetch as fetch_arxiv
-from .crossref import fetch as fetch_crossref
-from .semantic_scholar import fetch as fetch_semantic
-from .springer import fetch as fetch_springer
-from .scholar import fetch as fetch_scholar
+import logging
+from dataclasses import replace
+from functools import partial
+
+from . import arxiv, crossref, semantic_scholar, springer, scholar
+from .canonical import canonicalize
+from .engine import FetchTask, run_tasks
+from .planner import DEFAULT_OWNER, plan
+from paperradar.storage import watermarks
 from paperradar.config import (
     MAX_ARXIV_RESULTS,
     MAX_CROSSREF_RESULTS,
@@ -14,47 +18,92 @@ from paperradar.config import (
     ENABLE_SEMANTIC,
     ENABLE_SPRINGER,
     ENABLE_SCHOLAR,
+    FETCH_MAX_WORKERS,
+    FETCH_DEADLINE_SEC,
+    FETCH_CONCURRENCY,
 )
 
+_last_stats = {}
+
 
-def fetch_entries():
+def _enabled_sources():
     sources = []
     if ENABLE_ARXIV:
-        sources.append(("arxiv", lambda: fetch_arxiv(MAX_ARXIV_RESULTS)))
+        sources.append(("arxiv", arxiv, MAX_ARXIV_RESULTS))
     if ENABLE_CROSSREF:
-        sources.append(("crossref", lambda: fetch_crossref(MAX_CROSSREF_RESULTS)))
+        sources.append(("crossref", crossref, MAX_CROSSREF_RESULTS))
     if ENABLE_SEMANTIC:
-        sources.append(("semantic", lambda: fetch_semantic(MAX_SEMANTIC_SCHOLAR_RESULTS)))
+        sources.append(("semantic", semantic_scholar, MAX_SEMANTIC_SCHOLAR_RESULTS))
     if ENABLE_SPRINGER:
-        sources.append(("springer", lambda: fetch_springer(MAX_SPRINGER_RESULTS)))
+        sources.append(("springer", springer, MAX_SPRINGER_RESULTS))
     if ENABLE_SCHOLAR:
-        sources.append(("scholar", lambda: fetch_scholar(MAX_SCHOLAR_RESULTS)))
-
-    items = []
-    for name, fn in sources:
-        try:
-            cur = fn() or []
-        except Exception:
-            cur = []
-        items.extend(cur)
+        sources.append(("scholar", scholar, MAX_SCHOLAR_RESULTS))
+    return sources
+
+
+def _fetch_for(fetch_query, query, max_results, owners):
+    """Run one query and tag its records with the owners whose terms it carries."""
+    items = fetch_query(query, max_results) or []
+    for it in items:
+        it["query_owners"] = sorted(set(it.get("query_owners") or []) | set(owners))
+    return items
+
+
+def build_tasks(owners=None):
+    """
+    One task per planned query. The planner unions the terms of ``owners``
+    (all registered owners by default) so each term is fetched once.
+    """
+    sources = [(name, module, max_results) for name, module, max_results in _enabled_sources() if module.available()]
+    planned = plan([name for name, _, _ in sources], owners)
+    tasks = []
+    for name, module, max_results in sources:
+        queries = [(q, [DEFAULT_OWNER]) for q in getattr(module, "base_queries", list)()]
+        to_query = getattr(module, "to_query", str)
+        for p in planned[name]:
+            # marcas por término: reagrupar los términos entre ticks no las pierde
+            watermarks.register_query(name, to_query(p.query), p.terms)
+            queries.append((to_query(p.query), p.owners))
+        seen = set()
+        for q, q_owners in queries:
+            if not q or q.lower() in seen:
+                continue
+            seen.add(q.lower())
+            fn = partial(_fetch_for, module.fetch_query, q, max_results, q_owners)
+            tasks.append(FetchTask(source=name, query=q, fn=fn))
+    return tasks
+
+
+def fetch_entries(owners=None):
+    global _last_stats
+    # las consultas abandonadas siguen corriendo: sus propuestas quedan en su
+    # corrida y el commit de esta no las toma
+    run = watermarks.begin_run()
+    tasks = [replace(t, fn=partial(watermarks.in_run, run, t.fn)) for t in build_tasks(owners)]
+    items, stats = run_tasks(
+        tasks,
+        max_workers=FETCH_MAX_WORKERS,
+        source_limits=FETCH_CONCURRENCY,
+        deadline_sec=FETCH_DEADLINE_SEC,
+    )
+    _last_stats = stats
+    watermarks.commit(stats["completed"], run)
+    per_source = " ".join(
+        f"{name}={s['items']}({s['done']}/{s['queries']})" for name, s in stats["sources"].items()
+    )
+    logging.info(
+        f"[fetch] {len(tasks)} queries in {stats['elapsed_sec']:.1f}s "
+        f"partial={stats['partial']} {per_source}"
+    )
     return _merge_multi(items)
 
 
+def last_fetch_stats():
+    return dict(_last_stats)
+
+
 def _merge_multi(items):
-    def key(it):
-        pid = (it.get("id") or it.get("url") or "")
-        if not pid:
-            base = (it.get("title", "") + it.get("abstract", ""))[:400]
-            import hashlib
-            pid = hashlib.sha1(base.encode("utf-8", "ignore")).hexdigest()
-        return pid[:200]
-
-    seen = set()
-    out = []
-    for it in items:
-        k = key(it)
-        if k in seen:
-            continue
-        seen.add(k)
-        out.append(it)
+    out = canonicalize(items)
+    if len(out) < len(items):
+        logging.info(f"[fetch] canonicalized {len(items)} records -> {len(out)} papers")
     return out
@@ -0,0 +1,87 @@
+"""
+Query planner: one fetch per term per tick, shared by every chat.
+
+The planner takes the terms registered by each owner (``<chat_id>:<profile>``),
+builds their deduplicated union (round-robin so every owner is represented
+before the cap), and packs terms into OR-combined queries that fit each
+source's query-length limit. Each planned query remembers which owners asked
+for its terms so results can be mapped back to them.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from paperradar.config import QUERY_MAX_CHARS, QUERY_MAX_TERMS
+from paperradar.fetchers.search_terms import DEFAULT_TERMS, get_legacy_terms, interleave, owner_terms
+
+DEFAULT_OWNER = "*"
+
+# Sources whose query syntax supports OR; the others get one term per query
+# (Crossref and Semantic Scholar treat "OR" as a plain word).
+_OR_SYNTAX = {
+    "arxiv": lambda terms: "(" + " OR ".join(f"({t})" for t in terms) + ")",
+    "springer": lambda terms: " OR ".join(f"({t})" for t in terms),
+    "scholar": lambda terms: " OR ".join(terms),
+}
+
+
+@dataclass
+class PlannedQuery:
+    query: str
+    terms: List[str] = field(default_factory=list)
+    owners: List[str] = field(default_factory=list)
+
+
+def _key(term: str) -> str:
+    return " ".join(term.lower().replace('"', "").split())
+
+
+def term_owners(owners: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+    """Deduplicated union {term: [owners]} in planning order, capped at QUERY_MAX_TERMS."""
+    registry = owner_terms(owners)
+    if not registry:
+        registry = {DEFAULT_OWNER: get_legacy_terms()}
+    ordered = interleave([registry[k] for k in sorted(registry)] + [list(DEFAULT_TERMS)])
+    if QUERY_MAX_TERMS > 0:
+        ordered = ordered[:QUERY_MAX_TERMS]
+    by_key: Dict[str, List[str]] = {_key(t): [] for t in ordered}
+    for owner, terms in registry.items():
+        for t in terms:
+            if _key(t) in by_key:
+                by_key[_key(t)].append(owner)
+    for t in DEFAULT_TERMS:
+        if _key(t) in by_key and not by_key[_key(t)]:
+            by_key[_key(t)].append(DEFAULT_OWNER)
+    return {t: sorted(set(by_key[_key(t)])) for t in ordered}
+
+
+def pack(source: str, union: Dict[str, List[str]]) -> List[PlannedQuery]:
+    """Greedily pack terms into as few queries as the source's limit allows."""
+    build = _OR_SYNTAX.get(source)
+    limit = int(QUERY_MAX_CHARS.get(source) or 0)
+    plans: List[PlannedQuery] = []
+    current: List[str] = []
+
+    def flush() -> None:
+        if current:
+            owners = sorted({o for t in current for o in union[t]})
+            query = build(current) if build and len(current) > 1 else current[0]
+            plans.append(PlannedQuery(query=query, terms=list(current), owners=owners))
+            current.clear()
+
+    for term in union:
+        if build is None or limit <= 0:
+            current.append(term)
+            flush()
+            continue
+        if current and len(build(current + [term])) > limit:
+            flush()
+        current.append(term)
+    flush()
+    return plans
+
+
+def plan(sources: Iterable[str], owners: Optional[Iterable[str]] = None) -> Dict[str, List[PlannedQuery]]:
+    union = term_owners(owners)
+    return {name: pack(name, union) for name in sources}
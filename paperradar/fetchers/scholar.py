@@ -1,4 +1,5 @@
-import requests, logging
+import logging
+from paperradar.core import http
 from paperradar.core.filters import english_only, sanitize_text
 from paperradar.core.model import Item
 from paperradar.config import SERPAPI_API_KEY
@@ -9,41 +10,59 @@ from paperradar.fetchers.search_terms import get_search_terms, DEFAULT_TERMS
 BASE_URL = "https://serpapi.com/search.json"
 
 
+def available():
+    return bool(SERPAPI_API_KEY)
+
+
+def queries():
+    if not available():
+        return []
+    return get_search_terms() or list(DEFAULT_TERMS)
+
+
+def fetch_query(term, max_results=50):
+    if not SERPAPI_API_KEY:
+        return []
+    params = {
+        "engine": "google_scholar",
+        "q": term,
+        "num": max_results,
+        "hl": "en",
+        "api_key": SERPAPI_API_KEY,
+    }
+    r = http.get(BASE_URL, params=params, timeout=20, cache="scholar")
+    r.raise_for_status()
+    data = r.json()
+    out = []
+    for it in data.get("organic_results", []) or []:
+        title = sanitize_text(it.get("title", ""))
+        link = sanitize_text(it.get("link", ""))
+        snippet = sanitize_text(it.get("snippet", ""))
+        if not title:
+            continue
+        if not english_only(f"{title} {snippet}"):
+            continue
+        year = sanitize_text(str(it.get("publication_info", {}).get("year") or ""))
+        authors = []
+        # SerpAPI no expone autores limpios; dejamos vacío.
+        out.append(Item(
+            id=link or title, title=title, abstract=snippet, url=link,
+            published="", source="scholar", authors=authors, venue="", year=year
+        ).__dict__)
+    return out
+
+
 def fetch(max_results=50):
     if not SERPAPI_API_KEY:
         return []
     out = []
-    terms = get_search_terms() or list(DEFAULT_TERMS)
+    terms = queries()
     logging.debug(f"[scholar] using {len(terms)} search terms")
     for term in terms:
-        params = {
-            "engine": "google_scholar",
-            "q": term,
-            "num": max_results,
-            "hl": "en",
-            "api_key": SERPAPI_API_KEY,
-        }
         try:
-            r = requests.get(BASE_URL, params=params, timeout=20)
-            r.raise_for_status()
-            data = r.json()
+            out.extend(fetch_query(term, max_results))
         except Exception as ex:
             logging.warning(f"[scholar] fail {term}: {ex}")
             continue
-        for it in data.get("organic_results", []) or []:
-            title = sanitize_text(it.get("title", ""))
-            link = sanitize_text(it.get("link", ""))
-            snippet = sanitize_text(it.get("snippet", ""))
-            if not title:
-                continue
-            if not english_only(f"{title} {snippet}"):
-                continue
-            year = sanitize_text(str(it.get("publication_info", {}).get("year") or ""))
-            authors = []
-            # SerpAPI no expone autores limpios; dejamos vacío.
-            out.append(Item(
-                id=link or title, title=title, abstract=snippet, url=link,
-                published="", source="scholar", authors=authors, venue="", year=year
-            ).__dict__)
     logging.info(f"[scholar] total={len(out)}")
     return out
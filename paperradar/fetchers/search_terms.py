@@ -1,9 +1,10 @@
 """
 Utilities to manage dynamic search terms used by fetchers.
 
-The default engineering terms remain the baseline. When a user uploads a new
-profile (for example via PDF), we extract the key topics and persist them so the
-fetchers can query domain-specific keywords on the next run.
+The default engineering terms remain the baseline. Each chat's active profile
+registers its own topics under an owner key (``<chat_id>:<profile>``) in
+``search_terms.json``; the query planner fetches the union of all owners'
+terms once per tick and maps results back to the owners that asked for them.
 """
 from __future__ import annotations
 
@@ -11,7 +12,7 @@ import json
 import logging
 import os
 from datetime import datetime, timezone
-from typing import Iterable, List
+from typing import Dict, Iterable, List
 
 from paperradar.config import DATA_ROOT
 
@@ -34,6 +35,8 @@ DEFAULT_TERMS: List[str] = [
 
 _TERMS_PATH = os.path.join(DATA_ROOT, "search_terms.json")
 _cache: List[str] | None = None
+_owners: Dict[str, List[str]] | None = None
+_owners_mtime: float = -1.0
 
 
 def _normalize(raw_terms: Iterable[str]) -> List[str]:
@@ -103,24 +106,109 @@ def _save_terms(terms: List[str]) -> None:
     os.makedirs(DATA_ROOT, exist_ok=True)
     payload = {
         "terms": terms,
+        "owners": _load_owners(),
         "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
     }
     with open(_TERMS_PATH, "w", encoding="utf-8") as fh:
         json.dump(payload, fh, ensure_ascii=False, indent=2)
 
 
-def get_search_terms() -> List[str]:
-    """
-    Return the active search terms for fetchers.
+def _load_owners() -> Dict[str, List[str]]:
+    """Per-owner terms, re-read whenever another process rewrote the file."""
+    global _owners, _owners_mtime
+    try:
+        mtime = os.path.getmtime(_TERMS_PATH)
+    except OSError:
+        mtime = 0.0
+    if _owners is None or mtime != _owners_mtime:
+        _owners = {}
+        if mtime:
+            try:
+                with open(_TERMS_PATH, "r", encoding="utf-8") as fh:
+                    payload = json.load(fh)
+                if isinstance(payload, dict) and isinstance(payload.get("owners"), dict):
+                    _owners = {str(k): list(v or []) for k, v in payload["owners"].items()}
+            except Exception as exc:
+                logging.warning(f"[terms] failed to load owner terms: {exc}")
+        _owners_mtime = mtime
+    return _owners
+
+
+def owner_key(chat_id: int, profile: str | None) -> str:
+    return f"{chat_id}:{profile or 'default'}"
+
 
-    Falls back to DEFAULT_TERMS if no custom terms are stored.
+def owner_terms(owners: Iterable[str] | None = None) -> Dict[str, List[str]]:
+    """Registered terms per owner (optionally restricted to ``owners``)."""
+    registry = _load_owners()
+    if owners is None:
+        return {k: list(v) for k, v in registry.items()}
+    return {k: list(registry[k]) for k in owners if k in registry}
+
+
+def set_chat_terms(chat_id: int, profile: str | None, topics: Iterable[str], *, max_terms: int = 20) -> List[str]:
     """
+    Register the terms of a chat's active profile, replacing whatever that
+    chat had registered before (only active profiles are fetched for).
+    """
+    global _owners_mtime
+    owner = owner_key(chat_id, profile)
+    terms = [_quote_if_needed(t) for t in _normalize(topics)][:max_terms]
+    registry = _load_owners()
+    prefix = f"{chat_id}:"
+    stale = [k for k in registry if k.startswith(prefix) and k != owner]
+    if registry.get(owner) == terms and not stale:
+        return terms
+    for k in stale:
+        registry.pop(k, None)
+    if terms:
+        registry[owner] = terms
+    else:
+        registry.pop(owner, None)
+    _save_terms(get_legacy_terms())
+    _owners_mtime = os.path.getmtime(_TERMS_PATH)
+    return terms
+
+
+def get_legacy_terms() -> List[str]:
     global _cache
     if _cache is None:
         _cache = _load_terms()
     return list(_cache)
 
 
+def get_search_terms() -> List[str]:
+    """
+    Return the active search terms for fetchers.
+
+    Union of every owner's terms (interleaved so each owner is represented
+    near the top) followed by the defaults; falls back to the legacy global
+    list when no owner has registered terms.
+    """
+    registry = _load_owners()
+    if not registry:
+        return get_legacy_terms()
+    pools = [list(v) for _, v in sorted(registry.items())] + [list(DEFAULT_TERMS)]
+    return interleave(pools)
+
+
+def interleave(pools: List[List[str]]) -> List[str]:
+    """Round-robin merge of term lists, deduplicated case-insensitively."""
+    out: List[str] = []
+    seen = set()
+    pools = [list(p) for p in pools]
+    while any(pools):
+        for pool in pools:
+            if not pool:
+                continue
+            term = str(pool.pop(0) or "").strip()
+            key = term.lower().replace('"', "")
+            if term and key not in seen:
+                seen.add(key)
+                out.append(term)
+    return out
+
+
 def set_custom_terms(topics: Iterable[str], *, include_defaults: bool = True, max_terms: int = 20) -> List[str]:
     """
     Persist normalized search terms derived from profile topics and return them.
@@ -143,20 +231,22 @@ def set_custom_terms(topics: Iterable[str], *, include_defaults: bool = True, ma
         combined = custom or list(DEFAULT_TERMS)
     if not combined:
         combined = list(DEFAULT_TERMS)
-    global _cache
+    global _cache, _owners_mtime
     if _cache is None:
         _cache = _load_terms()
     if _cache == combined:
         return list(_cache)
     _cache = combined
     _save_terms(combined)
+    _owners_mtime = os.path.getmtime(_TERMS_PATH)
     return list(_cache)
 
 
 def reset_terms() -> None:
     """Remove any persisted custom terms and revert to defaults."""
-    global _cache
+    global _cache, _owners
     _cache = list(DEFAULT_TERMS)
+    _owners = None
     try:
         if os.path.exists(_TERMS_PATH):
             os.remove(_TERMS_PATH)
@@ -1,4 +1,5 @@
-import requests, logging
+import logging
+from paperradar.core import http
 from paperradar.core.filters import english_only, sanitize_text, year_from_date
 from paperradar.core.model import Item
 from paperradar.config import SEMANTIC_SCHOLAR_API_KEY
@@ -7,44 +8,64 @@ from paperradar.fetchers.search_terms import get_search_terms, DEFAULT_TERMS
 BASE_URL = "https://api.semanticscholar.org/graph/v1/paper/search"
 
 
-def fetch(max_results=60):
+FIELDS = "title,abstract,year,publicationDate,venue,url,authors"
+
+
+def available():
+    return bool(SEMANTIC_SCHOLAR_API_KEY)
+
+
+def queries():
+    if not available():
+        return []
+    return get_search_terms() or list(DEFAULT_TERMS)
+
+
+def fetch_query(term, max_results=60):
     if not SEMANTIC_SCHOLAR_API_KEY:
         return []
     headers = {"x-api-key": SEMANTIC_SCHOLAR_API_KEY}
-    fields = "title,abstract,year,publicationDate,venue,url,authors"
+    params = {"query": term, "limit": max_results, "fields": FIELDS, "offset": 0}
+    r = http.get(BASE_URL, headers=headers, params=params, timeout=20, cache="semantic")
+    r.raise_for_status()
+    data = r.json()
+    out = []
+    for it in data.get("data", []) or []:
+        title = sanitize_text(it.get("title", ""))
+        abstr = sanitize_text(it.get("abstract", ""))
+        if not title:
+            continue
+        if not english_only(f"{title} {abstr}"):
+            continue
+        url = sanitize_text(it.get("url", ""))
+        year = str(it.get("year") or "")
+        published = sanitize_text(it.get("publicationDate", ""))
+        if not year and published:
+            year = str(year_from_date(published))
+        authors = []
+        for a in it.get("authors", []) or []:
+            nm = sanitize_text(a.get("name", ""))
+            if nm:
+                authors.append(nm)
+        out.append(Item(
+            id=url or title, title=title, abstract=abstr, url=url,
+            published=published, source="semantic", authors=authors,
+            venue=sanitize_text(it.get("venue", "")), year=year
+        ).__dict__)
+    return out
+
+
+def fetch(max_results=60):
+    if not SEMANTIC_SCHOLAR_API_KEY:
+        return []
     out = []
-    terms = get_search_terms() or list(DEFAULT_TERMS)
+    terms = queries()
     logging.debug(f"[semantic] using {len(terms)} search terms")
     for term in terms:
-        params = {"query": term, "limit": max_results, "fields": fields, "offset": 0}
         try:
-            r = requests.get(BASE_URL, headers=headers, params=params, timeout=20)
-            r.raise_for_status()
-            data = r.json()
+            out.extend(fetch_query(term, max_results))
         except Exception as ex:
             logging.warning(f"[semantic] fail {term}: {ex}")
             continue
-        for it in data.get("data", []) or []:
-            title = sanitize_text(it.get("title", ""))
-            abstr = sanitize_text(it.get("abstract", ""))
-            if not title:
-                continue
-            if not english_only(f"{title} {abstr}"):
-                continue
-            url = sanitize_text(it.get("url", ""))
-            year = str(it.get("year") or "")
-            published = sanitize_text(it.get("publicationDate", ""))
-            if not year and published:
-                year = str(year_from_date(published))
-            authors = []
-            for a in it.get("authors", []) or []:
-                nm = sanitize_text(a.get("name", ""))
-                if nm:
-                    authors.append(nm)
-            out.append(Item(
-                id=url or title, title=title, abstract=abstr, url=url,
-                published=published, source="semantic", authors=authors,
-                venue=sanitize_text(it.get("venue", "")), year=year
-            ).__dict__)
     logging.info(f"[semantic] total={len(out)}")
     return out
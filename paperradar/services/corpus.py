@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from paperradar.config import (
+    CORPUS_MAX_ITEMS,
+    CORPUS_RETENTION_DAYS,
+    FETCH_DEADLINE_SEC,
+    OPENAI_API_KEY,
+    PAPER_EMBED_INGEST_MAX,
+    RANK_EMBED_WEIGHT,
+    STORE_STALE_MIN,
+)
+from paperradar.core.llm_executor import LLM_EXECUTOR
+from paperradar.core.openai_client import BACKGROUND
+from paperradar.fetchers.canonical import canonicalize, merge_key
+from paperradar.fetchers.merge import fetch_entries
+from paperradar.fetchers.planner import term_owners
+from paperradar.fetchers.search_terms import owner_key, set_chat_terms
+from paperradar.services.near_dupes import assign_clusters
+from paperradar.services.paper_embeddings import ensure_paper_embeddings
+from paperradar.storage import paper_store, watermarks
+
+
+@dataclass
+class CorpusSnapshot:
+    """Normalized, deduplicated paper corpus shared by every chat in a tick."""
+
+    version: str
+    created_at: str
+    items: List[dict] = field(default_factory=list)
+    terms: List[str] = field(default_factory=list)
+    store_version: int = 0
+
+    def label(self) -> str:
+        return f"{self.version}@{self.created_at}"
+
+
+_LOCK = threading.Lock()
+_CURRENT: Optional[CorpusSnapshot] = None
+_INGESTING = False
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _version(items: Iterable[dict]) -> str:
+    h = hashlib.sha1()
+    for key in sorted(merge_key(it) for it in items):
+        h.update(key.encode("utf-8", "ignore"))
+        h.update(b"\0")
+    return h.hexdigest()[:12]
+
+
+def _retention_cutoff() -> str:
+    if CORPUS_RETENTION_DAYS <= 0:
+        return ""
+    return (datetime.now(timezone.utc) - timedelta(days=CORPUS_RETENTION_DAYS)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def register_chats(chats: Iterable[Tuple[int, dict]]) -> List[str]:
+    """
+    Register the topics of each chat's active profile with the query planner
+    (a chat without a profile drops its terms) and return the owner keys of
+    the chats that have one, for ``refresh_snapshot``.
+    """
+    owners = []
+    for cid, u in chats:
+        profile = u.get("active_profile", "default")
+        try:
+            set_chat_terms(cid, profile, u.get("profile_topics", []) if u.get("profile") else [])
+        except Exception as exc:
+            logging.warning("[corpus] cid=%s term registration failed: %s", cid, exc)
+        if u.get("profile"):
+            owners.append(owner_key(cid, profile))
+    return owners
+
+
+def ingest(owners: Iterable[str] | None = None) -> Dict[str, int]:
+    """
+    Fetch every enabled source once and store the results in the paper store.
+
+    ``owners`` restricts the planned terms to those chats/profiles (all
+    registered owners by default). Fetchers only return records newer than
+    their watermarks; an empty store resets the watermarks to force a full
+    download. Stored papers without an embedding get one in the background
+    (``_embed_stored``).
+    """
+    owners = list(owners) if owners is not None else None
+    terms = list(term_owners(owners))
+    if paper_store.count() == 0:
+        watermarks.reset()
+    fresh = fetch_entries(owners)
+    counts = paper_store.ingest(
+        {merge_key(it): it for it in fresh},
+        cutoff=_retention_cutoff(),
+        max_items=CORPUS_MAX_ITEMS,
+    )
+    if PAPER_EMBED_INGEST_MAX > 0 and RANK_EMBED_WEIGHT > 0 and OPENAI_API_KEY:
+        # en segundo plano: el tick no espera las llamadas de embeddings
+        LLM_EXECUTOR.submit("paper-emb:ingest", _embed_stored, time.monotonic() + FETCH_DEADLINE_SEC,
+                            priority=BACKGROUND)
+    logging.info(
+        "[corpus] ingest fetched=%d new=%d removed=%d terms=%d",
+        len(fresh),
+        counts["added"],
+        counts["removed"],
+        len(terms),
+    )
+    return counts
+
+
+def _embed_stored(deadline: float) -> int:
+    """
+    Embed stored papers that have no vector yet, newest first, at most
+    PAPER_EMBED_INGEST_MAX per call and none past ``deadline``, so hybrid
+    ranking covers the corpus rather than only the papers someone happened
+    to view.
+    """
+    try:
+        items = canonicalize(paper_store.all_items())
+        created = ensure_paper_embeddings(reversed(items), max_new=PAPER_EMBED_INGEST_MAX, deadline=deadline)["created"]
+    except Exception as exc:
+        logging.warning("[corpus] paper embeddings failed: %s", exc)
+        return 0
+    if created:
+        logging.info("[corpus] embedded %d stored papers", created)
+    return created
+
+
+def load_snapshot() -> CorpusSnapshot:
+    """Freeze the local paper store into a snapshot (no network access)."""
+    # the store is read oldest first, so a paper keeps the id it was first seen with
+    items = assign_clusters(canonicalize(paper_store.all_items()))
+    snapshot = CorpusSnapshot(
+        version=_version(items),
+        created_at=_now_iso(),
+        items=items,
+        store_version=paper_store.version(),
+    )
+    logging.info("[corpus] snapshot %s items=%d", snapshot.label(), len(items))
+    return snapshot
+
+
+def build_snapshot(owners: Iterable[str] | None = None) -> CorpusSnapshot:
+    """Ingest from upstream, then snapshot the store."""
+    owners = list(owners) if owners is not None else None
+    ingest(owners)
+    snapshot = load_snapshot()
+    snapshot.terms = list(term_owners(owners))
+    return snapshot
+
+
+def refresh_snapshot(owners: Iterable[str] | None = None) -> CorpusSnapshot:
+    """Build a new snapshot and publish it as the current one."""
+    global _CURRENT
+    snapshot = build_snapshot(owners)
+    with _LOCK:
+        _CURRENT = snapshot
+    return snapshot
+
+
+def current_snapshot() -> Optional[CorpusSnapshot]:
+    with _LOCK:
+        return _CURRENT
+
+
+def _ingest_in_background() -> None:
+    global _INGESTING
+    try:
+        ingest()
+    except Exception as exc:
+        logging.warning("[corpus] background ingest failed: %s", exc)
+    finally:
+        with _LOCK:
+            _INGESTING = False
+
+
+def local_snapshot() -> CorpusSnapshot:
+    """
+    Snapshot for interactive commands, served from the local store.
+
+    The published snapshot is reused while the store has not changed. An
+    empty store is filled synchronously once; a store whose last ingest is
+    older than STORE_STALE_MIN is refreshed in the background and the current
+    data is served meanwhile.
+    """
+    global _CURRENT, _INGESTING
+    if paper_store.count() == 0:
+        ingest()
+    elif STORE_STALE_MIN > 0:
+        last = paper_store.last_ingest()
+        stale_before = (datetime.now(timezone.utc) - timedelta(minutes=STORE_STALE_MIN)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        with _LOCK:
+            start = (not last or last < stale_before) and not _INGESTING
+            if start:
+                _INGESTING = True
+        if start:
+            threading.Thread(target=_ingest_in_background, name="ingest", daemon=True).start()
+    store_version = paper_store.version()
+    with _LOCK:
+        if _CURRENT is not None and _CURRENT.store_version == store_version:
+            return _CURRENT
+    snapshot = load_snapshot()
+    with _LOCK:
+        _CURRENT = snapshot
+    return snapshot
@@ -1,13 +1,11 @@
 from __future__ import annotations
 
 import hashlib
-import json
 import logging
 from typing import Dict, List, Optional
 
-import requests
-
 from paperradar.config import OPENAI_API_KEY, OPENAI_EMBEDDING_MODEL
+from paperradar.core import openai_client
 
 EMBED_CACHE: Dict[str, List[float]] = {}
 
@@ -41,21 +39,8 @@ def embed_text(
     key = _fingerprint(snippet, target_model)
     if key in EMBED_CACHE:
         return EMBED_CACHE[key]
-    headers = {
-        "Authorization": f"Bearer {OPENAI_API_KEY}",
-        "Content-Type": "application/json",
-    }
-    body = {"input": snippet, "model": target_model}
     try:
-        resp = requests.post(
-            "https://api.openai.com/v1/embeddings",
-            headers=headers,
-            data=json.dumps(body),
-            timeout=timeout,
-        )
-        resp.raise_for_status()
-        payload = resp.json()
-        vector = payload["data"][0]["embedding"]
+        vector = openai_client.embedding(snippet, target_model, timeout=timeout)
         if not isinstance(vector, list):
             raise EmbeddingError("Respuesta de embedding invalida.")
         EMBED_CACHE[key] = vector
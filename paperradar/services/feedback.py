@@ -0,0 +1,95 @@
+"""
+Likes / dislikes as precomputed vectors.
+
+The id lists in the user state stay the source of truth; this module
+reconciles them with the feedback-vector store (resolving each new id to
+its paper text through the local store, once) and hands ranking the mean
+TF rows and mean embeddings of both sets. Ids not in the local store yet
+are left out of the centroids and retried when the store changes.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from paperradar.core.features import FEATURES
+from paperradar.core.ranking import FeedbackVectors, item_text
+from paperradar.core.vectors import unit
+from paperradar.services.paper_embeddings import ann_index, paper_key
+from paperradar.storage import feedback_vectors, paper_store
+
+GLOBAL_SCOPE = "*"
+
+_LOCK = threading.Lock()
+# (chat_id, scope) -> (likes, dislikes, store version to retry at or None, unresolved ids, vectors)
+_MEMO: Dict[Tuple[int, str], Tuple[tuple, tuple, Optional[int], int, FeedbackVectors]] = {}
+
+
+def feedback_lists(u: dict) -> Tuple[str, List[str], List[str]]:
+    """(scope, likes, dislikes) that apply to the active profile."""
+    if len(u.get("profiles", {})) > 1:
+        act = u.get("active_profile", "default")
+        return act, u.get("likes_by_profile", {}).get(act, []), u.get("dislikes_by_profile", {}).get(act, [])
+    return GLOBAL_SCOPE, u.get("likes_global", []), u.get("dislikes_global", [])
+
+
+def _resolve(pid: str):
+    paper = paper_store.find_paper(pid)
+    if not paper:
+        logging.info("[feedback] %s not in the local store yet; retried after the next ingest", pid)
+        return None
+    tf = FEATURES.transform([item_text(paper)])
+    emb = None
+    try:
+        emb = unit(ann_index().vector_of(paper_key(paper) or ""))
+    except Exception as exc:
+        logging.warning("[feedback] embedding lookup failed for %s: %s", pid, exc)
+    return tf, emb
+
+
+def _reconcile(chat_id: int, scope: str, polarity: str, ids: List[str]) -> int:
+    """Bring the stored vectors in line with ``ids``; returns how many ids could not be resolved."""
+    wanted = set(ids)
+    stored = feedback_vectors.members(chat_id, scope, polarity)
+    missing = wanted - stored
+    extra = stored - wanted
+    if not (missing or extra):
+        return 0
+    add = {}
+    for pid in missing:
+        resolved = _resolve(pid)
+        if resolved is not None:
+            add[pid] = resolved
+    if add or extra:
+        feedback_vectors.update(chat_id, scope, polarity, FEATURES.n_features, add, extra)
+    return len(missing) - len(add)
+
+
+def feedback_for(u: dict) -> Optional[FeedbackVectors]:
+    """Centroids for the active profile; resolves only ids added since the last call."""
+    chat_id = u.get("chat_id")
+    if chat_id is None:
+        return None
+    scope, likes, dislikes = feedback_lists(u)
+    sig_l, sig_d = tuple(likes), tuple(dislikes)
+    with _LOCK:
+        memo = _MEMO.get((chat_id, scope))
+        if memo and memo[0] == sig_l and memo[1] == sig_d and (memo[2] is None or memo[2] == paper_store.version()):
+            return memo[4]
+        unresolved = _reconcile(chat_id, scope, "like", likes) + _reconcile(chat_id, scope, "dislike", dislikes)
+        like_tf, like_emb = feedback_vectors.centroid(chat_id, scope, "like", FEATURES.n_features)
+        dislike_tf, _ = feedback_vectors.centroid(chat_id, scope, "dislike", FEATURES.n_features)
+        vectors = FeedbackVectors(like_tf, dislike_tf, like_emb)
+        retry = paper_store.version() if unresolved else None
+        _MEMO[(chat_id, scope)] = (sig_l, sig_d, retry, unresolved, vectors)
+        return vectors
+
+
+def unresolved_feedback(u: dict) -> int:
+    """Feedback ids of the active profile still missing from the centroids (as of the last ``feedback_for``)."""
+    scope, _, _ = feedback_lists(u)
+    with _LOCK:
+        memo = _MEMO.get((u.get("chat_id"), scope))
+    return memo[3] if memo else 0
+
@@ -3,31 +3,26 @@ from __future__ import annotations
 import hashlib
 import json
 import logging
-import random
 import re
-import time
 from datetime import datetime
 from typing import Dict, List, Sequence, Tuple
 
 import numpy as np
-import requests
 
 from paperradar.config import (
     DEFAULT_JOURNAL_LLM_TOP,
     DEFAULT_JOURNAL_TOPN,
-    LLM_MODEL,
     OPENAI_API_KEY,
     OPENAI_EMBEDDING_MODEL,
 )
+from paperradar.core.llm_executor import LLM_EXECUTOR, deadline
+from paperradar.core.openai_client import INTERACTIVE, chat_json
+from paperradar.core.vectors import VectorMatrix
 from paperradar.services.embeddings import EmbeddingError, embed_text
 from paperradar.storage import journals as journal_store
 from paperradar.storage import journal_analysis
 
 
-LLM_MAX_RETRIES = 3
-LLM_BACKOFF_BASE = 0.9
-LLM_BACKOFF_JITTER = (0.0, 0.5)
-
 
 def _now_iso() -> str:
     return datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
@@ -78,15 +73,6 @@ def _journal_text(record: Dict[str, object]) -> str:
     return "\n".join(p for p in parts if p).strip()
 
 
-def _cosine(a: np.ndarray, b: np.ndarray) -> float:
-    if a is None or b is None:
-        return 0.0
-    denom = float(np.linalg.norm(a) * np.linalg.norm(b))
-    if denom == 0:
-        return 0.0
-    return float(np.dot(a, b) / denom)
-
-
 def _affinity_score(sim: float, topic_ratio: float) -> float:
     return float(sim + 0.25 * topic_ratio)
 
@@ -124,7 +110,8 @@ def _heuristic_analysis(
     }
 
 
-def _llm_analysis(summary: str, topics: Sequence[str], journal: Dict[str, object]) -> Dict[str, object]:
+def _llm_analysis(summary: str, topics: Sequence[str], journal: Dict[str, object],
+                  chat_id: int | None = None, priority: int = INTERACTIVE) -> Dict[str, object]:
     if not OPENAI_API_KEY:
         raise RuntimeError("OPENAI_API_KEY requerido para analisis de journals.")
     topics_str = ", ".join(_listify(topics)) or "n/a"
@@ -144,59 +131,25 @@ Temas clave: {topics_str}
 Revista (datos):
 {context}
 """
-    headers = {
-        "Authorization": f"Bearer {OPENAI_API_KEY}",
-        "Content-Type": "application/json",
-    }
-    body = {
-        "model": LLM_MODEL,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.25,
-        "response_format": {"type": "json_object"},
+    parsed = json.loads(chat_json(prompt, temperature=0.25, timeout=40, priority=priority, chat_id=chat_id, purpose="journals"))
+    reasons = parsed.get("reasons") or []
+    risks = parsed.get("risks") or []
+    return {
+        "fit_summary": (parsed.get("fit_summary") or "").strip()[:280],
+        "reasons": [str(r).strip() for r in reasons if str(r).strip()][:3],
+        "risks": [str(r).strip() for r in risks if str(r).strip()][:3],
+        "fit_score": float(parsed.get("fit_score") or 0.0),
+        "tag": "llm",
     }
-    last_error = None
-    for attempt in range(LLM_MAX_RETRIES):
-        try:
-            resp = requests.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers=headers,
-                data=json.dumps(body),
-                timeout=40,
-            )
-            if resp.status_code == 429 or resp.status_code >= 500:
-                raise RuntimeError(f"{resp.status_code} {resp.text[:120]}")
-            resp.raise_for_status()
-            parsed = json.loads(resp.json()["choices"][0]["message"]["content"])
-            reasons = parsed.get("reasons") or []
-            risks = parsed.get("risks") or []
-            result = {
-                "fit_summary": (parsed.get("fit_summary") or "").strip()[:280],
-                "reasons": [str(r).strip() for r in reasons if str(r).strip()][:3],
-                "risks": [str(r).strip() for r in risks if str(r).strip()][:3],
-                "fit_score": float(parsed.get("fit_score") or 0.0),
-                "tag": "llm",
-            }
-            return result
-        except Exception as exc:
-            last_error = exc
-            delay = LLM_BACKOFF_BASE * (2**attempt) + random.uniform(*LLM_BACKOFF_JITTER)
-            time.sleep(delay)
-    raise RuntimeError(str(last_error))
 
 
-def _analysis_dispatch(
-    profile_summary: str,
-    topics: Sequence[str],
-    journal: Dict[str, object],
-    overlap_terms: Sequence[str],
-    allow_llm: bool,
-) -> Dict[str, object]:
-    try:
-        if allow_llm:
-            return _llm_analysis(profile_summary, topics, journal)
-    except Exception as exc:
-        logging.warning("[journals] LLM analysis failed: %s", exc)
-    return _heuristic_analysis(profile_summary, topics, journal, overlap_terms)
+def _submit_analysis(profile_summary: str, topics: Sequence[str], item: Dict[str, object], chat_id: int | None = None):
+    """Queue the LLM analysis on the shared executor (identical requests in flight are shared)."""
+    key = hashlib.sha1(
+        json.dumps([profile_summary, list(topics or []), item["journal_id"]], ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+    return LLM_EXECUTOR.submit(f"journal:{key}", _llm_analysis, profile_summary, topics, item["journal"], chat_id,
+                               INTERACTIVE, priority=INTERACTIVE)
 
 
 def recommend_journals_for_user(
@@ -259,18 +212,20 @@ def recommend_journals_for_user(
         if vector_list:
             vectors[jid] = np.array(vector_list, dtype=float)
 
+    matrix = VectorMatrix.from_mapping(vectors, embedding_model)
+    sims = matrix.cosine(profile_vector) if profile_vector is not None else None
     scored = []
     for record in catalog:
         jid = journal_store.journal_identifier(record)
-        journal_vector = vectors.get(jid)
-        similarity = _cosine(profile_vector, journal_vector)
+        row = matrix.row_of(jid)
+        similarity = float(sims[row]) if sims is not None and row >= 0 else 0.0
         overlap_ratio, overlap_terms = _topic_overlap(topics, record.get("topics") or record.get("keywords") or [])
         score = _affinity_score(similarity, overlap_ratio)
         scored.append(
             {
                 "journal_id": jid,
                 "journal": record,
-                "vector_used": journal_vector is not None and profile_vector is not None,
+                "vector_used": row >= 0 and profile_vector is not None,
                 "similarity": similarity,
                 "topic_overlap": overlap_ratio,
                 "overlap_terms": overlap_terms,
@@ -288,22 +243,35 @@ def recommend_journals_for_user(
     llm_enabled = bool(user_state.get("llm_enabled"))
     chat_id = user_state.get("chat_id")
     results = []
+    # análisis LLM de todas las revistas en paralelo; se esperan hasta LLM_DEADLINE_SEC
+    analyses: Dict[int, Dict[str, object]] = {}
+    pending = {}
     for idx, item in enumerate(top_items):
-        allow_llm = llm_enabled and idx < llm_limit
         cache_hit = None
         if chat_id is not None:
             cache_hit = journal_analysis.get_analysis(chat_id, item["journal_id"])
         if cache_hit:
-            analysis = cache_hit
-        else:
-            analysis = _analysis_dispatch(
-                summary,
-                topics,
-                item["journal"],
-                item["overlap_terms"],
-                allow_llm=allow_llm,
-            )
-            if chat_id is not None:
+            analyses[idx] = cache_hit
+        elif llm_enabled and idx < llm_limit and OPENAI_API_KEY:
+            pending[idx] = _submit_analysis(summary, topics, item, chat_id)
+    wait_until = deadline()
+    for idx, item in enumerate(top_items):
+        analysis = analyses.get(idx)
+        if analysis is None:
+            keep = True
+            if idx in pending:
+                ok, value = LLM_EXECUTOR.wait(pending[idx], wait_until)
+                if ok:
+                    analysis = value
+                elif value is None:
+                    # sigue en curso: no se cachea la heurística para reintentar con el LLM
+                    logging.warning("[journals] LLM analysis timed out (%s)", item["journal_id"])
+                    keep = False
+                else:
+                    logging.warning("[journals] LLM analysis failed: %s", value)
+            if analysis is None:
+                analysis = _heuristic_analysis(summary, topics, item["journal"], item["overlap_terms"])
+            if chat_id is not None and keep:
                 journal_analysis.set_analysis(chat_id, item["journal_id"], analysis)
         results.append(
             {
@@ -0,0 +1,102 @@
+"""
+Near-duplicate clustering across ticks.
+
+Every paper in the corpus gets a MinHash signature over title + abstract.
+New papers are looked up through the LSH band buckets only (no pairwise
+scan); a candidate whose estimated Jaccard similarity reaches
+NEAR_DUP_THRESHOLD lends its ``cluster_id``, otherwise the paper starts a
+new cluster. Signatures and cluster ids persist between ticks, so a
+journal version fetched weeks after its preprint still joins its cluster.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from paperradar.config import MINHASH_BANDS, MINHASH_PERMUTATIONS, NEAR_DUP_ENABLED, NEAR_DUP_THRESHOLD
+from paperradar.core.minhash import MinHasher
+from paperradar.fetchers.canonical import merge_key
+from paperradar.storage.near_dup_index import load_index, save_index
+
+_LOCK = threading.Lock()
+_HASHER = MinHasher(MINHASH_PERMUTATIONS, MINHASH_BANDS)
+
+
+def _new_cluster_id(key: str) -> str:
+    return "c" + hashlib.sha1(key.encode("utf-8", "ignore")).hexdigest()[:12]
+
+
+def _text(it: dict) -> str:
+    return f"{it.get('title', '')} {it.get('abstract', '')}"
+
+
+def assign_clusters(items: List[dict]) -> List[dict]:
+    """Set ``cluster_id`` on every item (in place) and persist the index."""
+    if not NEAR_DUP_ENABLED or not items:
+        return items
+    with _LOCK:
+        keys, sigs, clusters = load_index(MINHASH_PERMUTATIONS)
+        row_of: Dict[str, int] = {k: i for i, k in enumerate(keys)}
+        buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        for row in range(len(keys)):
+            for band_key in _HASHER.band_keys(sigs[row]):
+                buckets.setdefault(band_key, []).append(row)
+
+        new_sigs = []
+        joined = 0
+        for it in items:
+            key = merge_key(it)
+            row = row_of.get(key)
+            if row is not None:
+                it["cluster_id"] = clusters[row]
+                continue
+            sig = _HASHER.signature(_text(it))
+            if sig is None:
+                it["cluster_id"] = _new_cluster_id(key)
+                continue
+            best, best_sim = None, NEAR_DUP_THRESHOLD
+            candidates = {r for band_key in _HASHER.band_keys(sig) for r in buckets.get(band_key, [])}
+            for cand in candidates:
+                cand_sig = sigs[cand] if cand < len(sigs) else new_sigs[cand - len(sigs)]
+                sim = MinHasher.similarity(sig, cand_sig)
+                if sim >= best_sim:
+                    best, best_sim = cand, sim
+            cluster = clusters[best] if best is not None else _new_cluster_id(key)
+            joined += best is not None
+            row = len(keys)
+            keys.append(key)
+            clusters.append(cluster)
+            new_sigs.append(sig)
+            row_of[key] = row
+            for band_key in _HASHER.band_keys(sig):
+                buckets.setdefault(band_key, []).append(row)
+            it["cluster_id"] = cluster
+
+        if new_sigs:
+            sigs = np.vstack([sigs] + new_sigs) if len(sigs) else np.vstack(new_sigs)
+        # the index follows the retained corpus: drop papers that left it
+        live = {merge_key(it) for it in items}
+        keep = [i for i, k in enumerate(keys) if k in live]
+        if new_sigs or len(keep) != len(keys):
+            save_index([keys[i] for i in keep], sigs[keep] if len(sigs) else sigs, [clusters[i] for i in keep])
+    if joined:
+        logging.info("[near_dup] %d new papers joined existing clusters", joined)
+    return items
+
+
+def collapse_clusters(ranked: List[Tuple[dict, float]]) -> List[Tuple[dict, float]]:
+    """Keep only the best-scoring paper of each cluster (ranked is sorted desc)."""
+    seen = set()
+    out = []
+    for it, sc in ranked:
+        cluster = it.get("cluster_id")
+        if cluster:
+            if cluster in seen:
+                continue
+            seen.add(cluster)
+        out.append((it, sc))
+    return out
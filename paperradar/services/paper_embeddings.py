@@ -2,19 +2,42 @@ from __future__ import annotations
 
 import hashlib
 import logging
+import os
+import threading
+import time
 from datetime import datetime
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from paperradar.config import DEFAULT_PAPER_EMBED_MAX, OPENAI_EMBEDDING_MODEL
+import numpy as np
+
+from paperradar.config import (
+    ANN_MIN_ITEMS,
+    ANN_NLIST,
+    ANN_NPROBE,
+    DEFAULT_PAPER_EMBED_MAX,
+    OPENAI_API_KEY,
+    OPENAI_EMBEDDING_MODEL,
+)
+from paperradar.core.ann import IVFIndex
+from paperradar.core.llm_executor import LLM_EXECUTOR
+from paperradar.core.openai_client import BACKGROUND
+from paperradar.core.vectors import VectorMatrix, unit
 from paperradar.services.embeddings import embed_text, EmbeddingError
 from paperradar.storage import paper_embeddings as store_mod
+from paperradar.storage import paper_store
+
+_MATRIX_LOCK = threading.Lock()
+_MATRIX: Dict[str, object] = {"mtime": None, "matrix": None, "ann": None}
+_PROFILE_LOCK = threading.Lock()
+_PROFILES: Dict[str, np.ndarray] | None = None  # hash(modelo + texto) -> vector unitario del perfil
+_PROFILES_MAX = 1000
 
 
 def _now_iso() -> str:
     return datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
 
 
-def _paper_key(item: Dict[str, object]) -> str | None:
+def paper_key(item: Dict[str, object]) -> str | None:
     key = (item.get("id") or item.get("url") or item.get("title") or "") if item else ""
     key = str(key).strip()
     if not key:
@@ -40,8 +63,12 @@ def ensure_paper_embeddings(
     papers: Iterable[Dict[str, object]],
     *,
     max_new: int | None = None,
+    deadline: float | None = None,
 ) -> Dict[str, int]:
-    """Ensure embeddings exist for the provided papers."""
+    """
+    Ensure embeddings exist for the provided papers; no new ones are requested
+    past ``deadline`` (a ``time.monotonic()`` value).
+    """
     papers = list(papers or [])
     if not papers:
         return {"processed": 0, "created": 0}
@@ -53,7 +80,7 @@ def ensure_paper_embeddings(
     processed = 0
     dirty = False
     for paper in papers:
-        key = _paper_key(paper)
+        key = paper_key(paper)
         if not key:
             continue
         processed += 1
@@ -64,7 +91,7 @@ def ensure_paper_embeddings(
         payload = store_items.get(key)
         if payload and payload.get("fingerprint") == fingerprint:
             continue
-        if created >= max_budget:
+        if created >= max_budget or (deadline is not None and time.monotonic() >= deadline):
             continue
         try:
             vector = embed_text(text, model=embedding_model)
@@ -84,3 +111,143 @@ def ensure_paper_embeddings(
     if dirty:
         store_mod.save_store(store)
     return {"processed": processed, "created": created}
+
+
+def _store_mtime() -> float:
+    try:
+        return os.path.getmtime(store_mod.PAPER_EMB_PATH)
+    except OSError:
+        return 0.0
+
+
+def _sync_locked() -> None:
+    """Bring the persisted ANN index in line with the embedding store (incremental)."""
+    store = store_mod.load_store()
+    model = store.get("model") or OPENAI_EMBEDDING_MODEL
+    fresh: Dict[str, Tuple[np.ndarray, str]] = {}
+    for key, payload in (store.get("items") or {}).items():
+        if (payload.get("model") or model) != model:
+            continue
+        vector = unit(payload.get("vector"))
+        if vector is not None:
+            fresh[key] = (vector, payload.get("fingerprint") or "")
+    ann = _MATRIX["ann"] or store_mod.load_ann()
+    dim = next(iter(fresh.values()))[0].size if fresh else (ann.dim if ann else 0)
+    if ann is None or ann.dim != dim:
+        ann = IVFIndex(dim, ANN_NLIST, ANN_MIN_ITEMS)
+    changed = [k for k, (v, fp) in fresh.items() if v.size == dim and ann.tag_of(k) != fp]
+    removed = [k for k in ann.ids if k not in fresh]
+    if removed:
+        ann.remove(removed)
+    if changed:
+        ann.add(changed, np.vstack([fresh[k][0] for k in changed]), [fresh[k][1] for k in changed])
+    if changed or removed:
+        store_mod.save_ann(ann)
+        logging.info("[papers-emb] ANN index: +%d / -%d (%d vectors)", len(changed), len(removed), len(ann))
+    # la matriz comparte los vectores del índice ANN (sin copia)
+    _MATRIX.update(matrix=VectorMatrix(list(ann.ids), ann.vectors, model), ann=ann)
+
+
+def _synced() -> Tuple[VectorMatrix, IVFIndex]:
+    mtime = _store_mtime()
+    with _MATRIX_LOCK:
+        if _MATRIX["matrix"] is None or _MATRIX["mtime"] != mtime:
+            _sync_locked()
+            _MATRIX["mtime"] = mtime
+        return _MATRIX["matrix"], _MATRIX["ann"]
+
+
+def load_matrix() -> VectorMatrix:
+    """Stored paper vectors as one normalized float32 matrix; rebuilt when the store file changes."""
+    return _synced()[0]
+
+
+def ann_index() -> IVFIndex:
+    """IVF index over the stored paper vectors (persisted next to paper_embeddings.json)."""
+    return _synced()[1]
+
+
+def similar_papers(pid: str, limit: int = 10) -> Tuple[Optional[dict], List[Tuple[dict, float]]]:
+    """
+    Papers closest to ``pid`` by embedding. Returns (paper, [(neighbour, cosine)]);
+    paper is None when the id is not in the local store, the list is empty when
+    no embedding is available for it.
+    """
+    paper = paper_store.find_paper(pid)
+    if not paper:
+        return None, []
+    key = paper_key(paper)
+    ann = ann_index()
+    vector = ann.vector_of(key)
+    if vector is None:
+        ensure_paper_embeddings([paper], max_new=1)
+        ann = ann_index()
+        vector = ann.vector_of(key)
+    if vector is None:
+        return paper, []
+    out: List[Tuple[dict, float]] = []
+    for other, score in ann.search(vector, limit + 5, ANN_NPROBE, exclude=[key]):
+        found = paper_store.find_paper(other)
+        if found and paper_key(found) != key:
+            out.append((found, score))
+        if len(out) >= limit:
+            break
+    return paper, out
+
+
+def profile_vector(text: str, model: str | None = None) -> Optional[np.ndarray]:
+    """Unit embedding of a profile text, or None when embeddings are unavailable."""
+    if not OPENAI_API_KEY or not (text or "").strip():
+        return None
+    try:
+        return unit(embed_text(text, model=model or OPENAI_EMBEDDING_MODEL))
+    except EmbeddingError as exc:
+        logging.warning("[papers-emb] profile embedding skipped: %s", exc)
+        return None
+
+
+def _profile_key(text: str, model: str) -> str:
+    return hashlib.sha1(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _profiles_locked() -> Dict[str, np.ndarray]:
+    global _PROFILES
+    if _PROFILES is None:
+        _PROFILES = {}
+        for key, raw in store_mod.load_profile_vectors().items():
+            vector = unit(raw)
+            if vector is not None:
+                _PROFILES[key] = vector
+    return _PROFILES
+
+
+def _embed_profile(key: str, text: str, model: str) -> Optional[np.ndarray]:
+    vector = profile_vector(text, model)
+    if vector is None:
+        return None
+    with _PROFILE_LOCK:
+        profiles = _profiles_locked()
+        profiles[key] = vector
+        for old in list(profiles)[:-_PROFILES_MAX]:
+            del profiles[old]
+        store_mod.save_profile_vectors({k: v.tolist() for k, v in profiles.items()})
+    return vector
+
+
+def cached_profile_vector(text: str, model: str | None = None) -> Optional[np.ndarray]:
+    """
+    Unit embedding of a profile text from the local cache (keyed by a hash of
+    model and text). A miss queues the embedding at background priority and
+    returns None, so ranking never waits on the network; the profile is
+    ranked lexically until its vector is stored.
+    """
+    text = (text or "").strip()
+    if not OPENAI_API_KEY or not text:
+        return None
+    model = model or OPENAI_EMBEDDING_MODEL
+    key = _profile_key(text, model)
+    with _PROFILE_LOCK:
+        vector = _profiles_locked().get(key)
+    if vector is None:
+        LLM_EXECUTOR.submit(f"profile-emb:{key}", _embed_profile, key, text, model, priority=BACKGROUND)
+    return vector
@@ -1,31 +1,328 @@
-from paperradar.fetchers.merge import fetch_entries
-from paperradar.fetchers.search_terms import set_custom_terms
+import hashlib
+import json
+import threading
+from datetime import datetime, timezone
+
+from paperradar.config import (
+    RANK_EMBED_SHORTLIST,
+    RANK_EMBED_WEIGHT,
+    RANK_INCREMENTAL,
+    RANK_INCREMENTAL_DRIFT,
+    RANK_SHORTLIST_SIZE,
+)
 from paperradar.core.filters import is_recent
-from paperradar.core.ranking import rank_items_for_user
-from paperradar.core.llm import ideas as llm_ideas, heuristics as llm_heur
-
-def build_ranked(u:dict):
-    set_custom_terms(u.get("profile_topics", []))
-    items = fetch_entries()
-    if u.get("max_age_hours",0):
-        items = [it for it in items if is_recent(it.get("published",""), u["max_age_hours"])]
-    likes = (u.get("likes_by_profile",{}).get(u.get("active_profile","default"), [])
-             if len(u.get("profiles",{}))>1 else u.get("likes_global",[]))
-    dislikes = (u.get("dislikes_by_profile",{}).get(u.get("active_profile","default"), [])
-             if len(u.get("profiles",{}))>1 else u.get("dislikes_global",[]))
-    ranked = rank_items_for_user(
+from paperradar.core.ranking import ItemIndex, RankRequest, profile_document, rank_batch
+from paperradar.core.llm import IdeasBatch, ideas as llm_ideas, heuristics as llm_heur
+from paperradar.core.openai_client import BACKGROUND
+from paperradar.services.corpus import local_snapshot
+from paperradar.services.feedback import feedback_for, feedback_lists, unresolved_feedback
+from paperradar.services.near_dupes import collapse_clusters
+from paperradar.services.paper_embeddings import ann_index, cached_profile_vector, load_matrix, paper_key
+from paperradar.storage.users import profile_view
+
+_INDEX_LOCK = threading.Lock()
+_INDEX = {"label": None, "index": None, "vectors": None, "epoch": 0, "rows": {}, "keys": frozenset()}
+_RANKED_LOCK = threading.Lock()
+_RANKED = {}  # (chat_id, perfil) -> {"key", "version", "label", "keys", "drift", "ranked", "finished", "by_key"}
+_RANKED_STATS = {"hits": 0, "misses": 0, "incremental": 0, "full": 0}
+_FINISHED_MAX = 8  # variantes (collapse/edad) guardadas por perfil
+
+
+def _item_key(it:dict) -> str:
+    return (it.get("id") or it.get("url") or "")[:200]
+
+
+def _indexed(snapshot):
+    """
+    (ItemIndex, versión, fila por clave de item, claves) del snapshot; la
+    versión cambia con el snapshot o con los embeddings enlazados.
+    """
+    with _INDEX_LOCK:
+        if _INDEX["label"] != snapshot.label():
+            _INDEX["index"] = ItemIndex(snapshot.items, retain=True)
+            _INDEX["label"] = snapshot.label()
+            _INDEX["vectors"] = None
+            _INDEX["epoch"] += 1
+            _INDEX["rows"] = {}
+            for i, it in enumerate(snapshot.items):
+                _INDEX["rows"].setdefault(_item_key(it), i)
+            _INDEX["keys"] = frozenset(_INDEX["rows"])
+        index = _INDEX["index"]
+        if RANK_EMBED_WEIGHT > 0:
+            # embeddings guardados: se re-enlazan solo si cambió el store
+            vectors = load_matrix()
+            if vectors is not _INDEX["vectors"]:
+                index.attach_vectors(vectors, [paper_key(it) or "" for it in index.items], ann_index())
+                _INDEX["vectors"] = vectors
+                _INDEX["epoch"] += 1
+        return index, f"{_INDEX['label']}#{_INDEX['epoch']}", _INDEX["rows"], _INDEX["keys"]
+
+
+def item_index(snapshot) -> ItemIndex:
+    """Matriz TF-IDF del snapshot; se ajusta una sola vez por snapshot."""
+    return _indexed(snapshot)[0]
+
+
+def _profile_embedding(u:dict):
+    """Vector del perfil desde la caché local; si falta se pide en segundo plano y se rankea sin él."""
+    if RANK_EMBED_WEIGHT <= 0:
+        return None
+    vectors = load_matrix()
+    if not len(vectors):
+        return None
+    return cached_profile_vector(u.get("profile_summary") or u.get("profile", ""), vectors.model)
+
+
+def rank_request(u:dict) -> RankRequest:
+    # likes/dislikes: centroides precalculados (se resuelven una vez por id, no en cada ranking)
+    _, likes, dislikes = feedback_lists(u)
+    return RankRequest(
         u.get("profile", ""),
         likes,
         dislikes,
-        items,
-        topic_weights=u.get("profile_topic_weights", {}),
+        u.get("profile_topic_weights", {}) or {},
+        _profile_embedding(u),
+        feedback_for(u),
     )
-    return ranked
 
-def make_bullets(u:dict, item:dict, use_llm:bool):
+
+def _finish(u:dict, ranked, collapse=True, apply_age=True):
+    if apply_age and u.get("max_age_hours",0):
+        ranked = [(it, sc) for it, sc in ranked if is_recent(it.get("published",""), u["max_age_hours"])]
+    # un solo candidato por cluster de casi-duplicados (el de mayor score)
+    return collapse_clusters(ranked) if collapse else ranked
+
+
+def _digest(obj) -> str:
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def profile_hash(u:dict) -> str:
+    """Huella del perfil activo: texto, resumen (base del embedding) y pesos de topics."""
+    return _digest([u.get("profile", ""), u.get("profile_summary", ""), u.get("profile_topic_weights") or {}])
+
+
+def feedback_version(u:dict) -> str:
+    """
+    Huella de los likes/dislikes que aplican al perfil activo; incluye cuántos
+    siguen sin resolver, así el ranking se rehace cuando alguno entra al store.
+    """
+    return _digest(list(feedback_lists(u)) + [unresolved_feedback(u)])
+
+
+def ranked_cache_stats() -> dict:
+    with _RANKED_LOCK:
+        st = dict(_RANKED_STATS)
+        st["entries"] = len(_RANKED)
+    return st
+
+
+def _merge(entry:dict, fresh:list, index:ItemIndex, rows:dict) -> list:
+    """Lista guardada sin los papers expirados (con el item del snapshot actual) + los nuevos puntuados."""
+    kept = []
+    for it, sc in entry["ranked"]:
+        row = rows.get(_item_key(it))
+        if row is not None:
+            kept.append((index.items[row], sc))
+    merged = sorted(kept + fresh, key=lambda x: x[1], reverse=True)
+    if RANK_SHORTLIST_SIZE > 0:
+        # mismo tope que una lista corta completa (candidatos léxicos + vecinos por embedding)
+        merged = merged[:RANK_SHORTLIST_SIZE + RANK_EMBED_SHORTLIST]
+    return merged
+
+
+def rank_profiles(users:list, snapshot=None) -> dict:
+    """
+    Rankea todos los perfiles (no solo el activo) de todos los usuarios en una
+    sola llamada a rank_batch y deja cada lista en cache por (chat_id, perfil).
+
+    La entrada vale mientras no cambie la versión del índice (snapshot,
+    embeddings o generación del IDF), ni la huella del perfil, ni la de
+    likes/dislikes, ni la disponibilidad del vector del perfil; las huellas
+    se calculan sin tocar el índice, así un acierto no arma el request.
+
+    Con RANK_INCREMENTAL, si solo cambió el snapshot se puntúan únicamente los
+    papers nuevos y se mezclan con la lista guardada (quitando los expirados).
+    La fracción de papers nuevos+expirados (calculada una vez por snapshot
+    anterior, no por perfil) se acumula como deriva; al pasar
+    RANK_INCREMENTAL_DRIFT (o si cambió el perfil o el feedback) se re-rankea
+    contra el snapshot completo. Es una aproximación: los scores guardados
+    usan el IDF del snapshot en que se calcularon y la deriva no mide cuánto
+    cambió el IDF, solo cuántos papers entraron o salieron.
+    """
+    if snapshot is None:
+        snapshot = local_snapshot()
+    index, version, rows, keys = _indexed(snapshot)
+    # los perfiles cuentan en el DF, como en el ranker original; si traen features
+    # nuevas el índice se re-pondera y sube de generación (invalida las listas)
+    views = [[profile_view(u, name) for name, text in (u.get("profiles") or {}).items() if text] for u in users]
+    index.include_profiles([profile_document(v.get("profile", ""), v.get("profile_topic_weights") or {})
+                            for vs in views for v in vs])
+    version = f"{version}.{index.generation}"
+    label = snapshot.label()
+    out, full, partial = {}, [], {}
+    churn = {}  # id(claves del snapshot anterior) -> fracción de papers nuevos+expirados
+    for u, vs in zip(users, views):
+        cid = u.get("chat_id")
+        profiles = u.get("profiles") or {}
+        with _RANKED_LOCK:
+            # perfiles borrados: fuera del cache
+            for stale in [k for k in _RANKED if k[0] == cid and k[1] not in profiles]:
+                del _RANKED[stale]
+        for view in vs:
+            name = view.get("active_profile", "default")
+            # el vector del perfil puede llegar después: la lista se rehace cuando aparece
+            key = (profile_hash(view), feedback_version(view), _profile_embedding(view) is not None)
+            with _RANKED_LOCK:
+                entry = _RANKED.get((cid, name))
+                hit = entry is not None and entry["key"] == key and entry["version"] == version
+                _RANKED_STATS["hits" if hit else "misses"] += 1
+            if hit:
+                out[(cid, name)] = entry
+                continue
+            req = rank_request(view)
+            if RANK_INCREMENTAL and entry is not None and entry["key"] == key and entry["label"] != label:
+                old = entry["keys"]
+                if id(old) not in churn:
+                    churn[id(old)] = (len(keys - old) + len(old - keys)) / max(1, len(keys))
+                drift = entry["drift"] + churn[id(old)]
+                if drift <= RANK_INCREMENTAL_DRIFT:
+                    # los perfiles que vienen del mismo snapshot comparten las filas nuevas
+                    partial.setdefault(id(old), (old, []))[1].append(((cid, name), key, req, entry, drift))
+                    continue
+            full.append(((cid, name), key, req))
+    fresh = {}
+    for old, group in partial.values():
+        new_rows = sorted(rows[k] for k in keys - old)
+        for (slot, key, _, entry, drift), scored in zip(group, rank_batch(index, [g[2] for g in group], rows=new_rows)):
+            fresh[slot] = {"key": key, "version": version, "label": label, "keys": keys, "drift": drift,
+                           "ranked": _merge(entry, scored, index, rows), "finished": {}, "by_key": None}
+    if full:
+        for (slot, key, _), ranked in zip(full, rank_batch(index, [req for _, _, req in full])):
+            fresh[slot] = {"key": key, "version": version, "label": label, "keys": keys, "drift": 0.0,
+                           "ranked": ranked, "finished": {}, "by_key": None}
+    if fresh:
+        with _RANKED_LOCK:
+            _RANKED.update(fresh)
+            _RANKED_STATS["incremental"] += sum(len(group) for _, group in partial.values())
+            _RANKED_STATS["full"] += len(full)
+        out.update(fresh)
+    return out
+
+
+def _finished(u:dict, entry:dict, collapse=True, apply_age=True):
+    max_h = u.get("max_age_hours", 0) if apply_age else 0
+    # el filtro de edad depende de la hora: la variante filtrada se rehace cada minuto
+    variant = (collapse, max_h, datetime.now(timezone.utc).strftime("%Y%m%d%H%M") if max_h else "")
+    with _RANKED_LOCK:
+        done = entry["finished"].get(variant)
+    if done is None:
+        done = _finish(u, entry["ranked"], collapse=collapse, apply_age=apply_age)
+        with _RANKED_LOCK:
+            if len(entry["finished"]) >= _FINISHED_MAX:
+                entry["finished"].clear()
+            entry["finished"][variant] = done
+    return list(done)
+
+
+def rank_users(users:list, snapshot=None) -> list:
+    """Rankea varios usuarios (todos sus perfiles) contra el mismo snapshot; devuelve el del perfil activo."""
+    ranked = rank_profiles(users, snapshot)
+    out = []
+    for u in users:
+        entry = ranked.get((u.get("chat_id"), u.get("active_profile", "default")))
+        out.append(_finished(u, entry) if entry else [])
+    return out
+
+
+def build_ranked(u:dict, snapshot=None, collapse=True, apply_age=True, profile=None):
+    # Sin snapshot compartido (comandos interactivos) se rankea contra el store local, sin red.
+    # Se rankean todos los perfiles del usuario: cambiar de perfil después no re-rankea.
+    name = profile or u.get("active_profile", "default")
+    if not (u.get("profiles") or {}).get(name):
+        return []
+    entry = rank_profiles([u], snapshot).get((u.get("chat_id"), name))
+    return _finished(profile_view(u, name), entry, collapse=collapse, apply_age=apply_age) if entry else []
+
+
+def find_ranked(u:dict, pid:str, snapshot=None):
+    """(item, score) de ``pid`` en el ranking completo del perfil activo (sin filtros), o None."""
+    entry = rank_profiles([u], snapshot).get((u.get("chat_id"), u.get("active_profile", "default")))
+    if not entry:
+        return None
+    with _RANKED_LOCK:
+        by_key = entry["by_key"]
+    if by_key is None:
+        by_key = {}
+        for it, sc in entry["ranked"]:
+            for k in [(it.get("id") or it.get("url") or "")[:200]] + list(it.get("alt_ids") or []):
+                by_key.setdefault(k, (it, sc))
+        with _RANKED_LOCK:
+            entry["by_key"] = by_key
+    return by_key.get(pid[:200])
+
+def make_bullets(u:dict, item:dict, use_llm:bool, priority:int=BACKGROUND):
     summary = u.get("profile_summary") or u.get("profile", "")
     topics = u.get("profile_topics", [])
     if use_llm:
-        return llm_ideas(summary, topics, item["title"], item.get("abstract",""))
+        return llm_ideas(summary, topics, item["title"], item.get("abstract",""),
+                         chat_id=u.get("chat_id"), priority=priority)
     # FORZAR heurística cuando use_llm es False (no llamar al LLM)
     return llm_heur(summary, topics, item["title"], item.get("abstract",""))
+
+class BulletsBatch:
+    """
+    make_bullets_batch en pasos (ver llm.IdeasBatch): al crearlo se encolan
+    los digests, ``submit`` encola los bullets y ``result`` espera las
+    respuestas y completa con heurística los items que no van al LLM. Así el
+    tick encola el trabajo de todos los chats antes de esperar el primero.
+
+    ``eligible`` marca los items que pueden ir al LLM y ``budget`` cuántos
+    bullets LLM se quieren: el lote pide los primeros ``budget`` elegibles y,
+    si alguno vuelve sin bullets del LLM (fallo o cuota), ``result`` sigue con
+    los elegibles restantes de a uno hasta completar el presupuesto, como
+    cuando se pedían de a uno.
+    """
+
+    def __init__(self, u:dict, items:list, eligible:list, budget:int, priority:int=BACKGROUND):
+        self.u = u
+        self.priority = priority
+        self.summary = u.get("profile_summary") or u.get("profile", "")
+        self.topics = u.get("profile_topics", [])
+        self.items = list(items)
+        self.budget = max(0, int(budget or 0))
+        rows = [i for i, flag in enumerate(eligible) if flag]
+        self.llm_rows, self.spare_rows = rows[:self.budget], rows[self.budget:]
+        self._batch = None
+        if self.llm_rows:
+            papers = [(self.items[i]["title"], self.items[i].get("abstract","")) for i in self.llm_rows]
+            self._batch = IdeasBatch(self.summary, self.topics, papers, chat_id=u.get("chat_id"), priority=priority)
+
+    def submit(self):
+        if self._batch is not None:
+            self._batch.submit()
+
+    def result(self) -> list:
+        out = [None] * len(self.items)
+        if self._batch is not None:
+            for i, bullets in zip(self.llm_rows, self._batch.result()):
+                out[i] = bullets
+        used = sum(1 for b in out if b is not None and b.get("tag") in ("llm", "llm_cache"))
+        for i in self.spare_rows:
+            if used >= self.budget:
+                break
+            out[i] = make_bullets(self.u, self.items[i], use_llm=True, priority=self.priority)
+            if out[i].get("tag") in ("llm", "llm_cache"):
+                used += 1
+        for i, it in enumerate(self.items):
+            if out[i] is None:
+                out[i] = llm_heur(self.summary, self.topics, it["title"], it.get("abstract",""))
+        return out
+
+
+def make_bullets_batch(u:dict, items:list, eligible:list, budget:int, priority:int=BACKGROUND):
+    """
+    Como make_bullets para varios items: hasta ``budget`` de los elegibles
+    reciben bullets del LLM, pedidos juntos (LLM_BATCH_SIZE por llamada).
+    """
+    return BulletsBatch(u, items, eligible, budget, priority).result()
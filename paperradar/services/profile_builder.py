@@ -6,10 +6,10 @@ import re
 from typing import Dict, List, Optional
 
 import numpy as np
-import requests
 from pypdf import PdfReader
 from sklearn.feature_extraction.text import TfidfVectorizer
-from paperradar.config import OPENAI_API_KEY, LLM_MODEL
+from paperradar.config import OPENAI_API_KEY
+from paperradar.core.openai_client import INTERACTIVE, chat_json
 
 
 _STOPWORDS = {
@@ -118,18 +118,8 @@ Use the same language as the input text. If the text is too short or noisy, stil
 
 TEXT:
 \"\"\"{snippet}\"\"\""""
-    headers = {"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"}
-    body = {
-        "model": LLM_MODEL,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.15,
-        "response_format": {"type": "json_object"},
-    }
     try:
-        resp = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, data=json.dumps(body), timeout=45)
-        resp.raise_for_status()
-        payload = resp.json()
-        content = payload["choices"][0]["message"]["content"]
+        content = chat_json(prompt, temperature=0.15, timeout=45, priority=INTERACTIVE, purpose="profile")
         parsed = json.loads(content)
         summary = (parsed.get("summary") or "").strip()
         topics = parsed.get("topics") or []
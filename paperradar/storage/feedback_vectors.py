@@ -0,0 +1,183 @@
+"""
+Feedback vectors: liked / disliked papers resolved once to their hashed TF
+row (and embedding when one exists), plus running sums per (chat, scope,
+polarity) so ranking reads a ready centroid instead of re-vectorizing ids.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from typing import Optional, Set, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from paperradar.config import DATA_ROOT
+
+FEEDBACK_VECTORS_PATH = os.path.join(DATA_ROOT, "feedback_vectors.sqlite3")
+
+_LOCK = threading.RLock()
+_CONN: sqlite3.Connection | None = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vectors (
+    chat_id  INTEGER NOT NULL,
+    scope    TEXT NOT NULL,
+    polarity TEXT NOT NULL,
+    pid      TEXT NOT NULL,
+    indices  BLOB NOT NULL,
+    data     BLOB NOT NULL,
+    emb      BLOB,
+    PRIMARY KEY (chat_id, scope, polarity, pid)
+);
+CREATE TABLE IF NOT EXISTS centroids (
+    chat_id  INTEGER NOT NULL,
+    scope    TEXT NOT NULL,
+    polarity TEXT NOT NULL,
+    n        INTEGER NOT NULL,
+    indices  BLOB NOT NULL,
+    data     BLOB NOT NULL,
+    emb_n    INTEGER NOT NULL,
+    emb      BLOB,
+    PRIMARY KEY (chat_id, scope, polarity)
+);
+"""
+
+
+def _conn() -> sqlite3.Connection:
+    global _CONN
+    if _CONN is None:
+        os.makedirs(DATA_ROOT, exist_ok=True)
+        conn = sqlite3.connect(FEEDBACK_VECTORS_PATH, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        _CONN = conn
+    return _CONN
+
+
+def _pack(row: sparse.csr_matrix) -> Tuple[bytes, bytes]:
+    row = row.tocsr()
+    return row.indices.astype(np.int32).tobytes(), row.data.astype(np.float32).tobytes()
+
+
+def _unpack(indices: bytes, data: bytes, n_features: int) -> sparse.csr_matrix:
+    idx = np.frombuffer(indices, dtype=np.int32)
+    val = np.frombuffer(data, dtype=np.float32).astype(np.float64)
+    return sparse.csr_matrix((val, idx, [0, len(idx)]), shape=(1, n_features))
+
+
+def _emb(blob: Optional[bytes]) -> Optional[np.ndarray]:
+    return np.frombuffer(blob, dtype=np.float32).copy() if blob else None
+
+
+def members(chat_id: int, scope: str, polarity: str) -> Set[str]:
+    """Ids with a stored (non-empty) TF row."""
+    with _LOCK:
+        rows = _conn().execute(
+            "SELECT pid FROM vectors WHERE chat_id = ? AND scope = ? AND polarity = ? AND length(indices) > 0",
+            (chat_id, scope, polarity),
+        ).fetchall()
+    return {r[0] for r in rows}
+
+
+def _load_sum(conn, chat_id, scope, polarity, n_features):
+    row = conn.execute(
+        "SELECT n, indices, data, emb_n, emb FROM centroids WHERE chat_id = ? AND scope = ? AND polarity = ?",
+        (chat_id, scope, polarity),
+    ).fetchone()
+    if row is None:
+        return 0, sparse.csr_matrix((1, n_features)), 0, None
+    return row[0], _unpack(row[1], row[2], n_features), row[3], _emb(row[4])
+
+
+def _save_sum(conn, chat_id, scope, polarity, n, total, emb_n, emb) -> None:
+    if n <= 0:
+        conn.execute("DELETE FROM centroids WHERE chat_id = ? AND scope = ? AND polarity = ?", (chat_id, scope, polarity))
+        return
+    total = total.tocsr()
+    total.eliminate_zeros()
+    indices, data = _pack(total)
+    conn.execute(
+        "INSERT OR REPLACE INTO centroids (chat_id, scope, polarity, n, indices, data, emb_n, emb)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (chat_id, scope, polarity, n, indices, data, emb_n,
+         emb.astype(np.float32).tobytes() if emb is not None and emb_n > 0 else None),
+    )
+
+
+def update(chat_id: int, scope: str, polarity: str, n_features: int,
+           add: dict, remove: Set[str]) -> None:
+    """
+    Apply {pid: (tf row, embedding or None)} additions and pid removals,
+    keeping the running sums in step. Callers leave out papers they could
+    not resolve, so those are looked up again later; empty rows stored by
+    older versions are dropped.
+    """
+    with _LOCK:
+        conn = _conn()
+        with conn:
+            n, total, emb_n, emb = _load_sum(conn, chat_id, scope, polarity, n_features)
+            for pid in remove:
+                row = conn.execute(
+                    "SELECT indices, data, emb FROM vectors WHERE chat_id = ? AND scope = ? AND polarity = ? AND pid = ?",
+                    (chat_id, scope, polarity, pid),
+                ).fetchone()
+                if row is None:
+                    continue
+                conn.execute(
+                    "DELETE FROM vectors WHERE chat_id = ? AND scope = ? AND polarity = ? AND pid = ?",
+                    (chat_id, scope, polarity, pid),
+                )
+                vec = _unpack(row[0], row[1], n_features)
+                if vec.nnz:
+                    n -= 1
+                    total = total - vec
+                e = _emb(row[2])
+                if e is not None and emb is not None and e.size == emb.size:
+                    emb_n -= 1
+                    emb = emb - e
+            for pid, (vec, e) in add.items():
+                exists = conn.execute(
+                    "SELECT length(indices) FROM vectors WHERE chat_id = ? AND scope = ? AND polarity = ? AND pid = ?",
+                    (chat_id, scope, polarity, pid),
+                ).fetchone()
+                if exists and exists[0]:
+                    continue  # otro proceso ya lo registró
+                indices, data = _pack(vec)
+                conn.execute(
+                    "INSERT OR REPLACE INTO vectors (chat_id, scope, polarity, pid, indices, data, emb)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (chat_id, scope, polarity, pid, indices, data,
+                     e.astype(np.float32).tobytes() if e is not None else None),
+                )
+                if vec.nnz:
+                    n += 1
+                    total = total + vec
+                if e is not None and (emb is None or emb.size == e.size):
+                    emb = e.astype(np.float64) if emb is None else emb + e
+                    emb_n += 1
+            # filas vacías (papers sin resolver de versiones anteriores) no aportan al centroide
+            conn.execute(
+                "DELETE FROM vectors WHERE chat_id = ? AND scope = ? AND polarity = ? AND length(indices) = 0"
+                " AND emb IS NULL",
+                (chat_id, scope, polarity),
+            )
+            _save_sum(conn, chat_id, scope, polarity, n, total, emb_n, emb)
+
+
+def centroid(chat_id: int, scope: str, polarity: str, n_features: int
+             ) -> Tuple[Optional[sparse.csr_matrix], Optional[np.ndarray]]:
+    """Mean TF row and mean embedding of a feedback set (None when empty)."""
+    with _LOCK:
+        n, total, emb_n, emb = _load_sum(_conn(), chat_id, scope, polarity, n_features)
+    tf = (total / n).tocsr() if n > 0 else None
+    return tf, (emb / emb_n if emb is not None and emb_n > 0 else None)
+
+
+def forget(chat_id: int) -> None:
+    with _LOCK:
+        conn = _conn()
+        with conn:
+            conn.execute("DELETE FROM vectors WHERE chat_id = ?", (chat_id,))
+            conn.execute("DELETE FROM centroids WHERE chat_id = ?", (chat_id,))
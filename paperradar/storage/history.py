@@ -64,6 +64,7 @@ def upsert_history_record(chat_id: int, item: dict, score: float, bullets: dict,
         "authors": item.get("authors", []),
         "note": note,
         "tag": bullets.get("tag", ""),
+        "cluster_id": item.get("cluster_id", ""),
     }
     jpath = user_history_json(chat_id, profile)
     data = load_history(chat_id, profile)
@@ -79,7 +80,7 @@ def upsert_history_record(chat_id: int, item: dict, score: float, bullets: dict,
     csv_path = user_history_csv(chat_id, profile)
     with open(csv_path, "w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
-        w.writerow(["ts", "profile", "id", "source", "title", "url", "published", "score", "venue", "year", "authors", "similarities", "ideas", "note", "tag"])
+        w.writerow(["ts", "profile", "id", "source", "title", "url", "published", "score", "venue", "year", "authors", "similarities", "ideas", "note", "tag", "cluster_id"])
         for r in data:
             w.writerow([
                 r.get("ts", ""),
@@ -97,4 +98,5 @@ def upsert_history_record(chat_id: int, item: dict, score: float, bullets: dict,
                 "; ".join(r.get("ideas", [])),
                 r.get("note", ""),
                 r.get("tag", ""),
+                r.get("cluster_id", ""),
             ])
@@ -0,0 +1,173 @@
+"""
+Persistent HTTP response cache (SQLite under DATA_ROOT).
+
+Entries are keyed by method + normalized URL (query string and ``params``
+merged and sorted, credential parameters such as ``api_key`` removed so
+keys never reach the database). Each entry keeps the body, a few headers and the
+validators (ETag / Last-Modified) so stale entries can be revalidated with
+a conditional request instead of downloaded again. Total body size is
+bounded; the least recently used entries are evicted first.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from paperradar.config import DATA_ROOT, HTTP_CACHE_MAX_MB
+
+HTTP_CACHE_PATH = os.path.join(DATA_ROOT, "http_cache.sqlite3")
+_KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+_CREDENTIAL_PARAMS = frozenset({"api_key", "apikey", "key", "token", "access_token"})
+
+_LOCK = threading.Lock()
+_CONN: sqlite3.Connection | None = None
+_STATS: Dict[str, Dict[str, int]] = {}
+
+
+def _has_credentials(url: str) -> bool:
+    return any(name.lower() in _CREDENTIAL_PARAMS for name, _ in parse_qsl(urlsplit(url).query, keep_blank_values=True))
+
+
+def _conn() -> sqlite3.Connection:
+    global _CONN
+    if _CONN is None:
+        os.makedirs(DATA_ROOT, exist_ok=True)
+        conn = sqlite3.connect(HTTP_CACHE_PATH, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key         TEXT PRIMARY KEY,
+                source      TEXT NOT NULL,
+                url         TEXT NOT NULL,
+                status      INTEGER NOT NULL,
+                headers     TEXT NOT NULL,
+                body        BLOB NOT NULL,
+                size        INTEGER NOT NULL,
+                stored_at   REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        # entradas antiguas guardadas con la API key en la URL
+        stale = [(key,) for key, url in conn.execute("SELECT key, url FROM responses") if _has_credentials(url)]
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+        _CONN = conn
+    return _CONN
+
+
+def normalize_url(url: str, params: Optional[dict] = None) -> str:
+    """Lower-case scheme/host, merge + sort query parameters and drop credentials."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    for name, value in (params or {}).items():
+        if value is None:
+            continue
+        values = value if isinstance(value, (list, tuple)) else [value]
+        query.extend((str(name), str(v)) for v in values)
+    query = sorted((name, value) for name, value in query if name.lower() not in _CREDENTIAL_PARAMS)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", urlencode(query), ""))
+
+
+def cache_key(method: str, url: str, params: Optional[dict] = None) -> str:
+    raw = f"{method.upper()} {normalize_url(url, params)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _bump(source: str, counter: str, n: int = 1) -> None:
+    st = _STATS.setdefault(source, {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0})
+    st[counter] += n
+
+
+def record(source: str, counter: str) -> None:
+    with _LOCK:
+        _bump(source, counter)
+
+
+def lookup(key: str) -> Optional[dict]:
+    """Return the stored entry (body, headers, status, stored_at) or None."""
+    try:
+        with _LOCK:
+            row = _conn().execute(
+                "SELECT status, headers, body, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            _conn().execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+    except sqlite3.Error as exc:
+        logging.warning("[http_cache] lookup failed: %s", exc)
+        return None
+    status, headers, body, stored_at = row
+    return {"status": status, "headers": json.loads(headers or "{}"), "body": bytes(body), "stored_at": stored_at}
+
+
+def store(key: str, source: str, url: str, status: int, headers, body: bytes) -> None:
+    kept = {h: headers.get(h) for h in _KEPT_HEADERS if headers.get(h)}
+    now = time.time()
+    try:
+        with _LOCK:
+            _conn().execute(
+                "INSERT OR REPLACE INTO responses (key, source, url, status, headers, body, size, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, source, url, status, json.dumps(kept), sqlite3.Binary(body), len(body), now, now),
+            )
+            _bump(source, "stores")
+            _evict_locked()
+    except sqlite3.Error as exc:
+        logging.warning("[http_cache] store failed: %s", exc)
+
+
+def touch(key: str) -> None:
+    """Mark a revalidated (304) entry as fresh again."""
+    now = time.time()
+    try:
+        with _LOCK:
+            _conn().execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+    except sqlite3.Error as exc:
+        logging.warning("[http_cache] touch failed: %s", exc)
+
+
+def _evict_locked() -> None:
+    limit = int(HTTP_CACHE_MAX_MB * 1024 * 1024)
+    conn = _conn()
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    if total <= limit:
+        return
+    for key, source, size in conn.execute(
+        "SELECT key, source, size FROM responses ORDER BY accessed_at ASC"
+    ).fetchall():
+        conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        _bump(source, "evictions")
+        total -= size
+        if total <= limit:
+            break
+
+
+def clear() -> int:
+    with _LOCK:
+        cur = _conn().execute("DELETE FROM responses")
+        return cur.rowcount or 0
+
+
+def stats() -> Dict[str, object]:
+    """Per-source counters plus current entry count and stored bytes."""
+    with _LOCK:
+        sources = {name: dict(st) for name, st in _STATS.items()}
+        try:
+            entries, size = _conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        except sqlite3.Error:
+            entries, size = 0, 0
+    for st in sources.values():
+        served = st["hits"] + st["revalidated"]
+        lookups = served + st["misses"]
+        st["hit_rate"] = round(served / lookups, 3) if lookups else 0.0
+    return {"entries": entries, "bytes": size, "max_bytes": int(HTTP_CACHE_MAX_MB * 1024 * 1024), "sources": sources}
@@ -0,0 +1,163 @@
+"""
+Persistent LLM bullet cache (SQLite under DATA_ROOT, WAL mode).
+
+One row per prompt key, written with a single INSERT, so the bot and the
+web process share the same cache instead of rewriting a JSON file over each
+other. Entries older than LLM_CACHE_TTL_DAYS are treated as misses and
+dropped; past LLM_CACHE_MAX_ENTRIES the least recently used are evicted.
+The legacy ``llm_cache.json`` is imported once, on first use.
+Profile-independent paper digests live in the same table under keys with
+the ``digest:`` prefix, so they share TTL, eviction and ``clear()``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from paperradar.config import DATA_ROOT, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_DAYS
+from paperradar.storage.paths import LLM_CACHE_PATH
+
+LLM_CACHE_DB_PATH = os.path.join(DATA_ROOT, "llm_cache.sqlite3")
+_EVICT_EVERY = 64  # inserts entre pasadas de evicción
+DIGEST_PREFIX = "digest:"
+
+_LOCK = threading.Lock()
+_CONN: sqlite3.Connection | None = None
+_STATS = {"hits": 0, "misses": 0, "stores": 0, "expired": 0, "evictions": 0}
+_PENDING = {"inserts": 0}
+
+
+def _ttl_seconds() -> float:
+    return LLM_CACHE_TTL_DAYS * 86400.0
+
+
+def _conn() -> sqlite3.Connection:
+    global _CONN
+    if _CONN is None:
+        os.makedirs(DATA_ROOT, exist_ok=True)
+        conn = sqlite3.connect(LLM_CACHE_DB_PATH, check_same_thread=False, isolation_level=None, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS bullets (
+                key         TEXT PRIMARY KEY,
+                value       TEXT NOT NULL,
+                stored_at   REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_bullets_accessed ON bullets(accessed_at)")
+        _migrate_json(conn)
+        _CONN = conn
+        _evict_locked()
+    return _CONN
+
+
+def _migrate_json(conn: sqlite3.Connection) -> None:
+    if not os.path.exists(LLM_CACHE_PATH):
+        return
+    try:
+        with open(LLM_CACHE_PATH, "r", encoding="utf-8") as fh:
+            legacy = json.load(fh)
+        now = time.time()
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT OR IGNORE INTO bullets (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+            [(key, json.dumps(value, ensure_ascii=False), now, now) for key, value in legacy.items()
+             if isinstance(value, dict)],
+        )
+        conn.execute("COMMIT")
+        os.replace(LLM_CACHE_PATH, LLM_CACHE_PATH + ".migrated")
+        logging.info("[llm_cache] imported %d entries from %s", len(legacy), LLM_CACHE_PATH)
+    except Exception as exc:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        logging.warning("[llm_cache] legacy import failed: %s", exc)
+
+
+def get(key: str) -> Optional[dict]:
+    """Cached bullets for ``key`` or None (missing or expired)."""
+    now = time.time()
+    try:
+        with _LOCK:
+            conn = _conn()
+            row = conn.execute("SELECT value, stored_at FROM bullets WHERE key = ?", (key,)).fetchone()
+            if row is not None and LLM_CACHE_TTL_DAYS > 0 and now - row[1] > _ttl_seconds():
+                conn.execute("DELETE FROM bullets WHERE key = ?", (key,))
+                _STATS["expired"] += 1
+                row = None
+            if row is None:
+                _STATS["misses"] += 1
+                return None
+            conn.execute("UPDATE bullets SET accessed_at = ? WHERE key = ?", (now, key))
+            _STATS["hits"] += 1
+    except sqlite3.Error as exc:
+        logging.warning("[llm_cache] lookup failed: %s", exc)
+        return None
+    try:
+        return json.loads(row[0])
+    except ValueError:
+        return None
+
+
+def put(key: str, value: dict) -> None:
+    now = time.time()
+    try:
+        with _LOCK:
+            _conn().execute(
+                "INSERT OR REPLACE INTO bullets (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            _STATS["stores"] += 1
+            _PENDING["inserts"] += 1
+            if _PENDING["inserts"] >= _EVICT_EVERY:
+                _evict_locked()
+    except sqlite3.Error as exc:
+        logging.warning("[llm_cache] store failed: %s", exc)
+
+
+def _evict_locked() -> None:
+    _PENDING["inserts"] = 0
+    conn = _conn()
+    if LLM_CACHE_TTL_DAYS > 0:
+        cur = conn.execute("DELETE FROM bullets WHERE stored_at < ?", (time.time() - _ttl_seconds(),))
+        _STATS["expired"] += max(cur.rowcount, 0)
+    if LLM_CACHE_MAX_ENTRIES > 0:
+        total = conn.execute("SELECT COUNT(*) FROM bullets").fetchone()[0]
+        extra = total - LLM_CACHE_MAX_ENTRIES
+        if extra > 0:
+            conn.execute(
+                "DELETE FROM bullets WHERE key IN (SELECT key FROM bullets ORDER BY accessed_at ASC LIMIT ?)", (extra,)
+            )
+            _STATS["evictions"] += extra
+
+
+def clear() -> int:
+    with _LOCK:
+        cur = _conn().execute("DELETE FROM bullets")
+        return cur.rowcount or 0
+
+
+def stats() -> Dict[str, object]:
+    with _LOCK:
+        st = dict(_STATS)
+        try:
+            conn = _conn()
+            st["entries"] = conn.execute("SELECT COUNT(*) FROM bullets").fetchone()[0]
+            st["digests"] = conn.execute(
+                "SELECT COUNT(*) FROM bullets WHERE key LIKE ?", (DIGEST_PREFIX + "%",)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            st["entries"] = st["digests"] = 0
+    lookups = st["hits"] + st["misses"]
+    st["hit_rate"] = round(st["hits"] / lookups, 3) if lookups else 0.0
+    st["max_entries"] = LLM_CACHE_MAX_ENTRIES
+    st["ttl_days"] = LLM_CACHE_TTL_DAYS
+    return st
@@ -0,0 +1,41 @@
+import logging
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+from paperradar.config import DATA_ROOT
+
+NEAR_DUP_INDEX_PATH = os.path.join(DATA_ROOT, "near_dup_index.npz")
+
+
+def load_index(num_perm: int) -> Tuple[List[str], np.ndarray, List[str]]:
+    """Return (paper keys, signature matrix, cluster ids); empty when missing or stale."""
+    empty = ([], np.zeros((0, num_perm), dtype=np.uint32), [])
+    if not os.path.exists(NEAR_DUP_INDEX_PATH):
+        return empty
+    try:
+        with np.load(NEAR_DUP_INDEX_PATH) as data:
+            keys = [str(k) for k in data["keys"]]
+            sigs = data["sigs"].astype(np.uint32)
+            clusters = [str(c) for c in data["clusters"]]
+    except Exception as exc:
+        logging.warning("[near_dup] index load failed: %s", exc)
+        return empty
+    if sigs.ndim != 2 or sigs.shape[1] != num_perm or not (len(keys) == len(clusters) == sigs.shape[0]):
+        logging.warning("[near_dup] index shape mismatch, rebuilding")
+        return empty
+    return keys, sigs, clusters
+
+
+def save_index(keys: List[str], sigs: np.ndarray, clusters: List[str]) -> None:
+    os.makedirs(DATA_ROOT, exist_ok=True)
+    tmp = NEAR_DUP_INDEX_PATH + ".tmp"
+    with open(tmp, "wb") as fh:
+        np.savez_compressed(
+            fh,
+            keys=np.array(keys, dtype=str),
+            sigs=sigs.astype(np.uint32),
+            clusters=np.array(clusters, dtype=str),
+        )
+    os.replace(tmp, NEAR_DUP_INDEX_PATH)
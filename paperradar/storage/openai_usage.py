@@ -0,0 +1,109 @@
+"""
+OpenAI usage ledger (SQLite under DATA_ROOT, WAL mode).
+
+One row per (UTC day, chat, purpose) with request and token counters, so
+the bot and the web process account into the same place and both can read
+today's totals for quotas, ``/status`` and ``GET /stats``. Calls that are
+not tied to a chat are booked under chat 0.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from paperradar.config import DATA_ROOT
+
+OPENAI_USAGE_PATH = os.path.join(DATA_ROOT, "openai_usage.sqlite3")
+NO_CHAT = 0
+
+_LOCK = threading.Lock()
+_CONN: sqlite3.Connection | None = None
+
+
+def _conn() -> sqlite3.Connection:
+    global _CONN
+    if _CONN is None:
+        os.makedirs(DATA_ROOT, exist_ok=True)
+        conn = sqlite3.connect(OPENAI_USAGE_PATH, check_same_thread=False, isolation_level=None, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS usage (
+                day               TEXT NOT NULL,
+                chat_id           INTEGER NOT NULL,
+                purpose           TEXT NOT NULL,
+                requests          INTEGER NOT NULL DEFAULT 0,
+                prompt_tokens     INTEGER NOT NULL DEFAULT 0,
+                completion_tokens INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, chat_id, purpose)
+            )
+            """
+        )
+        _CONN = conn
+    return _CONN
+
+
+def today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def record(chat_id: Optional[int], purpose: str, prompt_tokens: int, completion_tokens: int) -> None:
+    try:
+        with _LOCK:
+            _conn().execute(
+                "INSERT INTO usage (day, chat_id, purpose, requests, prompt_tokens, completion_tokens)"
+                " VALUES (?, ?, ?, 1, ?, ?)"
+                " ON CONFLICT(day, chat_id, purpose) DO UPDATE SET requests = requests + 1,"
+                " prompt_tokens = prompt_tokens + excluded.prompt_tokens,"
+                " completion_tokens = completion_tokens + excluded.completion_tokens",
+                (today(), NO_CHAT if chat_id is None else int(chat_id), purpose, int(prompt_tokens), int(completion_tokens)),
+            )
+    except sqlite3.Error as exc:
+        logging.warning("[openai_usage] record failed: %s", exc)
+
+
+def tokens_today(chat_id: Optional[int] = None) -> int:
+    """Tokens spent today, by one chat or (``None``) by everyone."""
+    sql = "SELECT COALESCE(SUM(prompt_tokens + completion_tokens), 0) FROM usage WHERE day = ?"
+    args: tuple = (today(),)
+    if chat_id is not None:
+        sql += " AND chat_id = ?"
+        args += (int(chat_id),)
+    try:
+        with _LOCK:
+            return int(_conn().execute(sql, args).fetchone()[0])
+    except sqlite3.Error as exc:
+        logging.warning("[openai_usage] read failed: %s", exc)
+        return 0
+
+
+def summary(chat_id: Optional[int] = None, day: Optional[str] = None) -> Dict[str, object]:
+    """Requests and tokens of a day (today by default), split by purpose."""
+    sql = ("SELECT purpose, SUM(requests), SUM(prompt_tokens), SUM(completion_tokens)"
+           " FROM usage WHERE day = ?")
+    args: tuple = (day or today(),)
+    if chat_id is not None:
+        sql += " AND chat_id = ?"
+        args += (int(chat_id),)
+    sql += " GROUP BY purpose"
+    try:
+        with _LOCK:
+            rows = _conn().execute(sql, args).fetchall()
+    except sqlite3.Error as exc:
+        logging.warning("[openai_usage] read failed: %s", exc)
+        rows = []
+    by_purpose = {
+        purpose: {"requests": req, "prompt_tokens": pt, "completion_tokens": ct}
+        for purpose, req, pt, ct in rows
+    }
+    return {
+        "day": day or today(),
+        "requests": sum(v["requests"] for v in by_purpose.values()),
+        "tokens": sum(v["prompt_tokens"] + v["completion_tokens"] for v in by_purpose.values()),
+        "by_purpose": by_purpose,
+    }
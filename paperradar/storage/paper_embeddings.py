@@ -1,10 +1,16 @@
 import json
+import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+import numpy as np
 
 from paperradar.config import DATA_ROOT, OPENAI_EMBEDDING_MODEL
+from paperradar.core.ann import IVFIndex
 
 PAPER_EMB_PATH = os.path.join(DATA_ROOT, "paper_embeddings.json")
+PAPER_ANN_PATH = os.path.join(DATA_ROOT, "paper_embeddings_ivf.npz")
+PROFILE_EMB_PATH = os.path.join(DATA_ROOT, "profile_embeddings.json")
 
 
 def _ensure_parent(path: str) -> None:
@@ -35,3 +41,41 @@ def save_store(store: Dict[str, Any]) -> None:
     _ensure_parent(PAPER_EMB_PATH)
     with open(PAPER_EMB_PATH, "w", encoding="utf-8") as fh:
         json.dump(payload, fh, ensure_ascii=False)
+
+
+def load_ann() -> Optional[IVFIndex]:
+    if not os.path.exists(PAPER_ANN_PATH):
+        return None
+    try:
+        with np.load(PAPER_ANN_PATH) as data:
+            return IVFIndex.from_arrays(data)
+    except Exception as exc:
+        logging.warning("[papers-emb] ANN index load failed, rebuilding: %s", exc)
+        return None
+
+
+def save_ann(index: IVFIndex) -> None:
+    _ensure_parent(PAPER_ANN_PATH)
+    tmp = PAPER_ANN_PATH + ".tmp"
+    with open(tmp, "wb") as fh:
+        np.savez(fh, **index.to_arrays())
+    os.replace(tmp, PAPER_ANN_PATH)
+
+
+def load_profile_vectors() -> Dict[str, Any]:
+    if not os.path.exists(PROFILE_EMB_PATH):
+        return {}
+    try:
+        with open(PROFILE_EMB_PATH, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+            if isinstance(data, dict):
+                return data
+    except Exception:
+        pass
+    return {}
+
+
+def save_profile_vectors(vectors: Dict[str, Any]) -> None:
+    _ensure_parent(PROFILE_EMB_PATH)
+    with open(PROFILE_EMB_PATH, "w", encoding="utf-8") as fh:
+        json.dump(vectors, fh)
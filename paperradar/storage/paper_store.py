@@ -0,0 +1,262 @@
+"""
+Local paper store: SQLite table + FTS5 index over title/abstract/venue/authors.
+
+The fetchers ingest into it; ranking, ``/llm <id>`` lookup and diagnostics
+read from it, so user-facing commands never wait on upstream APIs. Every
+ingest bumps a version counter in ``meta`` so other processes (bot / web)
+can tell when their in-memory snapshot is stale.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from paperradar.config import DATA_ROOT
+
+PAPER_STORE_PATH = os.path.join(DATA_ROOT, "papers.sqlite3")
+LEGACY_POOL_PATH = os.path.join(DATA_ROOT, "corpus_pool.json")
+
+_LOCK = threading.RLock()
+_CONN: sqlite3.Connection | None = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    key        TEXT PRIMARY KEY,
+    id         TEXT NOT NULL,
+    title      TEXT NOT NULL,
+    abstract   TEXT NOT NULL,
+    venue      TEXT NOT NULL,
+    authors    TEXT NOT NULL,
+    url        TEXT NOT NULL,
+    published  TEXT NOT NULL,
+    source     TEXT NOT NULL,
+    data       TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_papers_first_seen ON papers(first_seen);
+CREATE INDEX IF NOT EXISTS idx_papers_id ON papers(id);
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+    title, abstract, venue, authors, content='papers', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+    INSERT INTO papers_fts(rowid, title, abstract, venue, authors)
+    VALUES (new.rowid, new.title, new.abstract, new.venue, new.authors);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, abstract, venue, authors)
+    VALUES ('delete', old.rowid, old.title, old.abstract, old.venue, old.authors);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, abstract, venue, authors)
+    VALUES ('delete', old.rowid, old.title, old.abstract, old.venue, old.authors);
+    INSERT INTO papers_fts(rowid, title, abstract, venue, authors)
+    VALUES (new.rowid, new.title, new.abstract, new.venue, new.authors);
+END;
+CREATE TABLE IF NOT EXISTS paper_aliases (
+    alias TEXT NOT NULL,
+    key   TEXT NOT NULL,
+    PRIMARY KEY (alias, key)
+);
+CREATE INDEX IF NOT EXISTS idx_paper_aliases_key ON paper_aliases(key);
+CREATE TRIGGER IF NOT EXISTS papers_alias_ad AFTER DELETE ON papers BEGIN
+    DELETE FROM paper_aliases WHERE key = old.key;
+END;
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _conn() -> sqlite3.Connection:
+    global _CONN
+    if _CONN is None:
+        os.makedirs(DATA_ROOT, exist_ok=True)
+        conn = sqlite3.connect(PAPER_STORE_PATH, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _CONN = conn
+        _migrate_pool(conn)
+    return _CONN
+
+
+def _migrate_pool(conn: sqlite3.Connection) -> None:
+    """Import the retained pool from the old JSON file once."""
+    if not os.path.exists(LEGACY_POOL_PATH):
+        return
+    try:
+        with open(LEGACY_POOL_PATH, "r", encoding="utf-8") as fh:
+            pool = (json.load(fh) or {}).get("items", {}) or {}
+        for key, entry in pool.items():
+            _upsert(conn, key, entry.get("item") or {}, entry.get("first_seen") or _now_iso())
+        _bump_version(conn)
+        conn.commit()
+        os.replace(LEGACY_POOL_PATH, LEGACY_POOL_PATH + ".migrated")
+        logging.info("[paper_store] migrated %d papers from %s", len(pool), LEGACY_POOL_PATH)
+    except Exception as exc:
+        logging.warning("[paper_store] pool migration failed: %s", exc)
+
+
+def _authors_text(item: dict) -> str:
+    return ", ".join(str(a) for a in (item.get("authors") or []) if a)
+
+
+def _aliases(item: dict) -> List[str]:
+    """Ids the paper is known by besides its key: its id, url and the ids merged into it."""
+    out = [item.get("id") or "", item.get("url") or ""] + [str(a) for a in (item.get("alt_ids") or [])]
+    return [a for a in dict.fromkeys(out) if a]
+
+
+def _upsert(conn: sqlite3.Connection, key: str, item: dict, now: str) -> bool:
+    prev = conn.execute("SELECT data FROM papers WHERE key = ?", (key,)).fetchone()
+    if prev is not None:
+        owners = set(json.loads(prev[0]).get("query_owners") or []) | set(item.get("query_owners") or [])
+        if owners:
+            item = {**item, "query_owners": sorted(owners)}
+    row = (
+        item.get("id") or "",
+        item.get("title") or "",
+        item.get("abstract") or "",
+        item.get("venue") or "",
+        _authors_text(item),
+        item.get("url") or "",
+        item.get("published") or "",
+        item.get("source") or "",
+        json.dumps(item, ensure_ascii=False),
+    )
+    conn.execute("DELETE FROM paper_aliases WHERE key = ?", (key,))
+    conn.executemany("INSERT OR IGNORE INTO paper_aliases (alias, key) VALUES (?, ?)", [(a, key) for a in _aliases(item)])
+    cur = conn.execute(
+        "UPDATE papers SET id=?, title=?, abstract=?, venue=?, authors=?, url=?, published=?, source=?, data=?,"
+        " last_seen=? WHERE key=?",
+        row + (now, key),
+    )
+    if cur.rowcount:
+        return False
+    conn.execute(
+        "INSERT INTO papers (key, id, title, abstract, venue, authors, url, published, source, data, first_seen, last_seen)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (key,) + row + (now, now),
+    )
+    return True
+
+
+def _bump_version(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "INSERT INTO meta(name, value) VALUES ('version', '1')"
+        " ON CONFLICT(name) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+    )
+    conn.execute(
+        "INSERT INTO meta(name, value) VALUES ('last_ingest', ?) ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+        (_now_iso(),),
+    )
+
+
+def ingest(records: Dict[str, dict], *, cutoff: str = "", max_items: int = 0) -> Dict[str, int]:
+    """
+    Upsert {key: item}, then drop papers first seen before ``cutoff`` and keep
+    at most ``max_items`` (newest by first_seen). Returns counters.
+    """
+    now = _now_iso()
+    with _LOCK:
+        conn = _conn()
+        with conn:
+            added = sum(1 for key, item in records.items() if _upsert(conn, key, item, now))
+            removed = 0
+            if cutoff:
+                removed += conn.execute("DELETE FROM papers WHERE first_seen < ?", (cutoff,)).rowcount
+            if max_items > 0:
+                removed += conn.execute(
+                    "DELETE FROM papers WHERE key NOT IN"
+                    " (SELECT key FROM papers ORDER BY first_seen DESC, rowid DESC LIMIT ?)",
+                    (max_items,),
+                ).rowcount
+            _bump_version(conn)
+    return {"added": added, "updated": len(records) - added, "removed": removed}
+
+
+def all_items() -> List[dict]:
+    """Every stored paper, oldest first (so canonical ids stay stable)."""
+    with _LOCK:
+        rows = _conn().execute("SELECT data FROM papers ORDER BY first_seen ASC, rowid ASC").fetchall()
+    return [json.loads(r[0]) for r in rows]
+
+
+def count() -> int:
+    with _LOCK:
+        return _conn().execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+
+def _meta(name: str) -> str:
+    with _LOCK:
+        row = _conn().execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else ""
+
+
+def version() -> int:
+    return int(_meta("version") or 0)
+
+
+def last_ingest() -> str:
+    return _meta("last_ingest")
+
+
+def find_paper(pid: str) -> Optional[dict]:
+    """
+    Look a paper up by key, id, url or alt_id, or by a fragment of them (as
+    shown to users). Titles and abstracts are never matched.
+    """
+    pid = (pid or "").strip()
+    if not pid:
+        return None
+    with _LOCK:
+        conn = _conn()
+        row = conn.execute(
+            "SELECT data FROM papers WHERE key = ?"
+            " OR key IN (SELECT key FROM paper_aliases WHERE alias = ?) LIMIT 1",
+            (pid, pid),
+        ).fetchone()
+        if row is None:
+            escaped = pid.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            like = "%" + escaped + "%"
+            row = conn.execute(
+                "SELECT data FROM papers WHERE key LIKE ? ESCAPE '\\'"
+                " OR key IN (SELECT key FROM paper_aliases WHERE alias LIKE ? ESCAPE '\\')"
+                " ORDER BY first_seen DESC LIMIT 1",
+                (like, like),
+            ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def search(query: str, limit: int = 20) -> List[dict]:
+    """Full-text search (FTS5 syntax) ranked by bm25."""
+    with _LOCK:
+        try:
+            rows = _conn().execute(
+                "SELECT p.data FROM papers_fts f JOIN papers p ON p.rowid = f.rowid"
+                " WHERE papers_fts MATCH ? ORDER BY bm25(papers_fts) LIMIT ?",
+                (query, limit),
+            ).fetchall()
+        except sqlite3.OperationalError as exc:
+            logging.warning("[paper_store] bad search %r: %s", query, exc)
+            return []
+    return [json.loads(r[0]) for r in rows]
+
+
+def stats() -> Dict[str, object]:
+    with _LOCK:
+        conn = _conn()
+        total = conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+        by_source = dict(conn.execute("SELECT source, COUNT(*) FROM papers GROUP BY source").fetchall())
+    return {"papers": total, "by_source": by_source, "version": version(), "last_ingest": last_ingest()}
@@ -18,6 +18,7 @@ from paperradar.config import (
 )
 from .paths import user_path, user_dir, KNOWN_CHATS_PATH
 from paperradar.storage.list_users import list_all_user_ids
+from paperradar.storage import feedback_vectors
 
 USERS = {}
 _USER_MTIMES = {}
@@ -63,13 +64,60 @@ def default_user_state(chat_id:int)->dict:
         "profile_summary": "",
         "profile_topics": [],
         "profile_topic_weights": {},
+        "profile_analyses": {},                 # análisis por perfil (summary/topics/pesos) para cambiar sin re-analizar
         "web_passcode": "",
+        "last_corpus_snapshot": "",
     }
 
 def _sync_active_profile_text(u:dict):
     act = u.get("active_profile","default")
     u["profile"] = u.get("profiles",{}).get(act, "")
 
+def remember_profile_analysis(u: dict, name: str, source: str, summary: str, topics: list, weights: dict) -> None:
+    """Guarda el análisis de un perfil (no necesariamente el activo) junto al texto del que salió."""
+    u.setdefault("profile_analyses", {})[name] = {
+        "source": source or "",
+        "summary": summary or "",
+        "topics": list(topics or []),
+        "topic_weights": dict(weights or {}),
+    }
+
+def _remember_active_analysis(u: dict):
+    act = u.get("active_profile", "default")
+    profiles = u.get("profiles", {})
+    analyses = u.setdefault("profile_analyses", {})
+    for name in [k for k in analyses if k not in profiles]:
+        analyses.pop(name, None)
+    if act in profiles:
+        remember_profile_analysis(u, act, profiles.get(act, ""), u.get("profile_summary", ""),
+                                  u.get("profile_topics", []), u.get("profile_topic_weights", {}))
+
+def restore_profile_analysis(u: dict, name: str) -> bool:
+    """Activa el análisis guardado de ``name`` si sigue vigente (mismo texto, sin overrides)."""
+    entry = (u.get("profile_analyses") or {}).get(name)
+    source = u.get("profiles", {}).get(name)
+    if not entry or source is None or entry.get("source") != source or name in (u.get("profile_overrides") or {}):
+        return False
+    u["profile"] = source
+    u["profile_summary"] = entry.get("summary", "")
+    u["profile_topics"] = list(entry.get("topics", []))
+    u["profile_topic_weights"] = dict(entry.get("topic_weights", {}))
+    return True
+
+def profile_view(u: dict, name: str) -> dict:
+    """Copia superficial del estado con ``name`` como perfil activo (para rankear perfiles inactivos)."""
+    if name == u.get("active_profile", "default"):
+        return u
+    view = dict(u)
+    view["active_profile"] = name
+    source = u.get("profiles", {}).get(name, "")
+    entry = (u.get("profile_analyses") or {}).get(name) or {}
+    view["profile"] = source
+    view["profile_summary"] = entry.get("summary") or source
+    view["profile_topics"] = list(entry.get("topics", []))
+    view["profile_topic_weights"] = dict(entry.get("topic_weights", {}))
+    return view
+
 def _ensure_passcode(u: dict, persist: bool = False, chat_id: int | None = None) -> None:
     if not u.get("web_passcode"):
         u["web_passcode"] = _random_passcode()
@@ -107,7 +155,9 @@ def load_user(chat_id:int)->dict:
                 "profile_summary": obj.get("profile_summary", state["profile_summary"]),
                 "profile_topics": obj.get("profile_topics", state["profile_topics"]),
                 "profile_topic_weights": obj.get("profile_topic_weights", state["profile_topic_weights"]),
+                "profile_analyses": obj.get("profile_analyses", {}) or {},
                 "web_passcode": obj.get("web_passcode", state["web_passcode"]),
+                "last_corpus_snapshot": obj.get("last_corpus_snapshot", ""),
             })
             # NEW: cargar enviados por perfil (listas -> sets)
             sidp = obj.get("sent_ids_by_profile", {})
@@ -163,6 +213,7 @@ def save_user(chat_id:int):
     if not u:
         return
     _sync_active_profile_text(u)
+    _remember_active_analysis(u)
 
     # Serializar sent_ids_by_profile (sets -> listas)
     sidp_serializable = {
@@ -192,9 +243,11 @@ def save_user(chat_id:int):
         "profile_summary": u.get("profile_summary",""),
         "profile_topics": u.get("profile_topics", []),
         "profile_topic_weights": u.get("profile_topic_weights", {}),
+        "profile_analyses": u.get("profile_analyses", {}),
         # NEW: guardar enviados por perfil dentro de meta.json
         "sent_ids_by_profile": sidp_serializable,
         "web_passcode": u.get("web_passcode", ""),
+        "last_corpus_snapshot": u.get("last_corpus_snapshot", ""),
     }
 
     # Guardar meta.json
@@ -244,6 +297,10 @@ def forgetme(chat_id:int):
         pass
     USERS.pop(chat_id, None)
     _USER_MTIMES.pop(chat_id, None)
+    try:
+        feedback_vectors.forget(chat_id)
+    except Exception as ex:
+        logging.warning(f"[user] forget feedback vectors {chat_id} failed: {ex}")
     try:
         data = json.load(open(KNOWN_CHATS_PATH,"r",encoding="utf-8"))
     except Exception:
@@ -271,6 +328,33 @@ def get_active_sent_ids(u: dict) -> set:
 def add_sent_id(u: dict, item_key: str) -> None:
     get_active_sent_ids(u).add(item_key)
 
+_CLUSTER_PREFIX = "cluster:"
+_ALT_PREFIX = "alt:"
+
+def item_sent_keys(it: dict) -> list:
+    """Ids con que se reconoce un paper ya enviado: el suyo y los de otras fuentes (alt_ids)."""
+    keys = [(it.get("id") or it.get("url") or "")[:200]]
+    keys.extend(k for k in (it.get("alt_ids") or []) if k and k not in keys)
+    return keys
+
+def is_item_sent(already: set, it: dict) -> bool:
+    if it.get("cluster_id") and f"{_CLUSTER_PREFIX}{it['cluster_id']}" in already:
+        return True
+    return any(k in already or f"{_ALT_PREFIX}{k}" in already for k in item_sent_keys(it))
+
+def mark_item_sent(u: dict, it: dict) -> None:
+    # id principal + marcas de sus alt_ids y de su cluster de casi-duplicados (las marcas no cuentan como papers)
+    sent = get_active_sent_ids(u)
+    keys = item_sent_keys(it)
+    sent.add(keys[0])
+    sent.update(f"{_ALT_PREFIX}{k}" for k in keys[1:])
+    if it.get("cluster_id"):
+        sent.add(f"{_CLUSTER_PREFIX}{it['cluster_id']}")
+
+def sent_paper_count(sent: set) -> int:
+    """Papers enviados, sin contar las marcas de alt_ids ni de cluster."""
+    return sum(1 for k in sent if not k.startswith((_ALT_PREFIX, _CLUSTER_PREFIX)))
+
 def clear_sent_ids_for_active_profile(u: dict) -> None:
     prof = u.get("active_profile", "default")
     u.setdefault("sent_ids_by_profile", {})[prof] = set()
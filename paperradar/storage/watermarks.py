@@ -0,0 +1,199 @@
+"""
+Per-(source, query) fetch watermarks.
+
+A watermark is the newest timestamp (``stamp``) a query has returned so far
+plus the ids seen at exactly that timestamp (to break ties). What the stamp
+means is up to the source: arXiv uses the submission date, Crossref the
+``indexed`` date. Watermarks are stored per
+search term: an OR-packed query (``register_query``) reads the oldest mark of
+its terms and, once completed, advances every one of them, so repacking the
+terms when some chat changes its topics does not drop the marks. Fetchers *propose* new
+watermarks while parsing; they only become effective once the fetch run
+``commit``s the queries whose results were actually kept, so an abandoned
+query never advances past papers we did not store. Proposals are tagged with
+the run that made them (``begin_run``/``in_run``): a query abandoned at the
+deadline keeps running in the background, and whatever it proposes late is
+ignored by the next run's commit.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from paperradar.config import DATA_ROOT
+
+WATERMARKS_PATH = os.path.join(DATA_ROOT, "fetch_watermarks.json")
+MAX_TIE_IDS = 50
+
+_T = TypeVar("_T")
+
+_LOCK = threading.Lock()
+_STORE: Dict[str, Dict[str, dict]] | None = None
+_PENDING: Dict[Tuple[int, str, str], dict] = {}  # (run, source, query) -> proposal
+_TERMS: Dict[Tuple[str, str], List[str]] = {}  # (source, query) -> terms of a packed query
+_RUN = 0
+_LOCAL = threading.local()
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _query_key(query: str) -> str:
+    return " ".join((query or "").split()).lower()
+
+
+def _load() -> Dict[str, Dict[str, dict]]:
+    global _STORE
+    if _STORE is None:
+        _STORE = {}
+        if os.path.exists(WATERMARKS_PATH):
+            try:
+                with open(WATERMARKS_PATH, "r", encoding="utf-8") as fh:
+                    data = json.load(fh)
+                if isinstance(data, dict):
+                    _STORE = data
+            except Exception as exc:
+                logging.warning("[watermarks] load failed: %s", exc)
+    return _STORE
+
+
+def _save(store: Dict[str, Dict[str, dict]]) -> None:
+    os.makedirs(DATA_ROOT, exist_ok=True)
+    with open(WATERMARKS_PATH, "w", encoding="utf-8") as fh:
+        json.dump(store, fh, ensure_ascii=False, indent=2)
+
+
+def _term_key(term: str) -> str:
+    return _query_key((term or "").replace('"', ""))
+
+
+def register_query(source: str, query: str, terms: Iterable[str]) -> None:
+    """Declare the search terms an (OR-packed) query fetches; its watermark is kept per term."""
+    keys = list(dict.fromkeys(_term_key(t) for t in terms if _term_key(t)))
+    with _LOCK:
+        if keys:
+            _TERMS[(source, _query_key(query))] = keys
+        else:
+            _TERMS.pop((source, _query_key(query)), None)
+
+
+def _terms_of(source: str, query_key: str) -> List[str]:
+    return _TERMS.get((source, query_key)) or [query_key]
+
+
+def get_watermark(source: str, query: str) -> Optional[dict]:
+    """Watermark of a query: the oldest of its terms' marks (None if any term has none)."""
+    with _LOCK:
+        bucket = _load().get(source, {})
+        marks = [bucket.get(t) for t in _terms_of(source, _query_key(query))]
+    if not all(marks):
+        return None
+    oldest = min(m.get("stamp") or "" for m in marks)
+    ids = [i for m in marks if (m.get("stamp") or "") == oldest for i in (m.get("ids") or [])]
+    return {"stamp": oldest, "ids": list(dict.fromkeys(ids))}
+
+
+def is_seen(watermark: Optional[dict], stamp: str, item_id: str) -> bool:
+    """True when a record at ``stamp`` is already covered by the watermark."""
+    if not watermark or not stamp:
+        return False
+    mark = watermark.get("stamp") or ""
+    if stamp < mark:
+        return True
+    return stamp == mark and item_id in set(watermark.get("ids") or [])
+
+
+def begin_run() -> int:
+    """Start a fetch run; proposals left over from earlier runs are dropped."""
+    global _RUN
+    with _LOCK:
+        _RUN += 1
+        _PENDING.clear()
+        return _RUN
+
+
+def in_run(run: int, fn: Callable[[], _T]) -> _T:
+    """Call ``fn`` with its proposals tagged as belonging to ``run``."""
+    previous = getattr(_LOCAL, "run", None)
+    _LOCAL.run = run
+    try:
+        return fn()
+    finally:
+        _LOCAL.run = previous
+
+
+def _current_run() -> int:
+    run = getattr(_LOCAL, "run", None)
+    return _RUN if run is None else run
+
+
+def propose(source: str, query: str, records: Iterable[Tuple[str, str]]) -> None:
+    """Offer (stamp, id) pairs seen by a query; keeps the newest stamp."""
+    newest = ""
+    ids = []
+    for stamp, item_id in records:
+        if not stamp:
+            continue
+        if stamp > newest:
+            newest, ids = stamp, [item_id]
+        elif stamp == newest:
+            ids.append(item_id)
+    if not newest:
+        return
+    with _LOCK:
+        key = (_current_run(), source, _query_key(query))
+        current = _PENDING.get(key)
+        if current and current["stamp"] > newest:
+            return
+        if current and current["stamp"] == newest:
+            ids = list(dict.fromkeys(current["ids"] + ids))
+        _PENDING[key] = {"stamp": newest, "ids": ids[:MAX_TIE_IDS]}
+
+
+def commit(completed: Iterable[Tuple[str, str]], run: Optional[int] = None) -> int:
+    """
+    Persist pending watermarks for the (source, query) pairs that completed.
+
+    Only proposals made under ``run`` (the current run by default) count.
+    """
+    updated = 0
+    with _LOCK:
+        run = _RUN if run is None else run
+        store = _load()
+        for source, query in completed:
+            qkey = _query_key(query)
+            pending = _PENDING.pop((run, source, qkey), None)
+            if not pending:
+                continue
+            bucket = store.setdefault(source, {})
+            for term in _terms_of(source, qkey):
+                current = bucket.get(term) or {}
+                if (current.get("stamp") or "") > pending["stamp"]:
+                    continue
+                ids = pending["ids"]
+                if current.get("stamp") == pending["stamp"]:
+                    ids = list(dict.fromkeys((current.get("ids") or []) + ids))[:MAX_TIE_IDS]
+                bucket[term] = {"stamp": pending["stamp"], "ids": ids, "updated_at": _now_iso()}
+                updated += 1
+        if updated:
+            _save(store)
+    return updated
+
+
+def reset() -> None:
+    """Forget every watermark (next fetch downloads full windows again)."""
+    global _STORE
+    with _LOCK:
+        _STORE = {}
+        _PENDING.clear()
+        _TERMS.clear()
+        try:
+            if os.path.exists(WATERMARKS_PATH):
+                os.remove(WATERMARKS_PATH)
+        except Exception as exc:
+            logging.warning("[watermarks] failed to remove %s: %s", WATERMARKS_PATH, exc)
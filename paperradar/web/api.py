@@ -3,7 +3,6 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Dict, List
 
-import logging
 import os
 from fastapi import FastAPI, HTTPException, Query, Request, UploadFile, File, Form, Body
 from fastapi.responses import HTMLResponse
@@ -13,22 +12,27 @@ from pydantic import BaseModel, ValidationError
 import tempfile
 
 from paperradar.config import POLL_DAILY_TIME
-from paperradar.services.pipeline import build_ranked, make_bullets
+from paperradar.core import http, openai_client, ranking
+from paperradar.core.llm_executor import LLM_EXECUTOR
+from paperradar.services.pipeline import build_ranked, make_bullets_batch, ranked_cache_stats
 from paperradar.services.profile_builder import build_profile_from_pdf, analyze_text
 from paperradar.services.journal_search import recommend_journals_for_user
 from paperradar.services.journal_ingest import refresh_journals_from_crossref
-from paperradar.services.paper_embeddings import ensure_paper_embeddings
-from paperradar.fetchers.search_terms import set_custom_terms
+from paperradar.services.paper_embeddings import similar_papers
+from paperradar.services.feedback import feedback_for
 from paperradar.storage.history import load_history, upsert_history_record, user_history_json, user_history_csv, now_iso
 from paperradar.storage.list_users import list_all_user_ids
 from paperradar.storage import journals as journal_store
-from paperradar.storage import email_index, magic_links, journal_analysis
+from paperradar.storage import email_index, magic_links, journal_analysis, http_cache, llm_cache, paper_store
 from paperradar.storage.users import (
     get_user,
     save_user,
     clear_sent_ids_for_active_profile,
     create_user,
     get_web_passcode,
+    profile_view,
+    remember_profile_analysis,
+    restore_profile_analysis,
 )
 from paperradar.bot.commands_profiles import _apply_profile_analysis
 
@@ -87,9 +91,11 @@ def _remove_profile_history(chat_id: int, profile: str) -> None:
             pass
 
 
-def _build_papers_payload(chat_id: int, limit: int, offset: int, *, use_live: bool):
+def _build_papers_payload(chat_id: int, limit: int, offset: int, *, use_live: bool, profile: str | None = None):
     user_state = _ensure_user(chat_id)
-    profile_name = user_state.get("active_profile", "default")
+    profile_name = (profile or "").strip() or user_state.get("active_profile", "default")
+    if profile_name not in user_state.get("profiles", {}):
+        raise HTTPException(status_code=404, detail=f"Perfil '{profile_name}' no encontrado")
     if not use_live:
         records = _history_records(chat_id, profile_name)
         sorted_records = sorted(records, key=lambda r: r.get("ts", ""), reverse=True)
@@ -133,31 +139,30 @@ def _build_papers_payload(chat_id: int, limit: int, offset: int, *, use_live: bo
             "items": items,
         }
 
-    ranked = build_ranked(user_state)
+    # cada perfil tiene su ranking cacheado: ver el feed de otro perfil no re-rankea
+    ranked = build_ranked(user_state, profile=profile_name)
+    view = profile_view(user_state, profile_name)
     history_map = _history_index(chat_id, profile_name)
     llm_enabled = bool(user_state.get("llm_enabled"))
     llm_threshold = float(user_state.get("llm_threshold", 0.70) or 0.70)
     llm_budget = int(user_state.get("llm_max_per_tick", 2) or 0)
-    used_llm = 0
     items: List[dict] = []
-    embed_candidates: List[dict] = []
     known_keys = set(history_map.keys())
+    fresh: List[tuple] = []
+    llm_flags: List[bool] = []
     for it, score in ranked:
         pk = (it.get("id") or it.get("url") or "")[:200]
         if not pk or pk in known_keys:
             continue
         known_keys.add(pk)
-        display_slot_available = len(items) < limit
-        use_llm = (
-            display_slot_available
-            and llm_enabled
-            and llm_budget > 0
-            and used_llm < llm_budget
-            and score >= llm_threshold
-        )
-        bullets = make_bullets(user_state, it, use_llm=use_llm)
-        if use_llm and bullets.get("tag") in ("llm", "llm_cache"):
-            used_llm += 1
+        display_slot_available = len(fresh) < limit
+        use_llm = display_slot_available and llm_enabled and score >= llm_threshold
+        fresh.append((it, score, pk, display_slot_available))
+        llm_flags.append(use_llm)
+    # los bullets LLM de los papers visibles se piden en lote
+    bullets_all = make_bullets_batch(view, [f[0] for f in fresh], llm_flags, llm_budget,
+                                     priority=openai_client.INTERACTIVE)
+    for (it, score, pk, display_slot_available), bullets in zip(fresh, bullets_all):
         upsert_history_record(chat_id, it, score, bullets, note="web", profile=profile_name)
         if not display_slot_available:
             continue
@@ -173,12 +178,6 @@ def _build_papers_payload(chat_id: int, limit: int, offset: int, *, use_live: bo
                 "disliked": _is_disliked(user_state, pk),
             }
         )
-        embed_candidates.append(it)
-    if embed_candidates:
-        try:
-            ensure_paper_embeddings(embed_candidates)
-        except Exception as exc:
-            logging.warning("[papers] embedding preload failed: %s", exc)
     return {
         "chat_id": chat_id,
         "limit": limit,
@@ -194,6 +193,30 @@ def health():
     return {"ok": True}
 
 
+@app.get("/stats")
+def stats():
+    return {"http": http.host_stats(), "http_cache": http_cache.stats(), "paper_store": paper_store.stats(),
+            "ranking": ranking.shortlist_stats(), "ranked_cache": ranked_cache_stats(), "llm_cache": llm_cache.stats(),
+            "llm_executor": LLM_EXECUTOR.stats(), "openai": openai_client.stats()}
+
+
+@app.get("/papers/search")
+def papers_search(q: str = Query(..., min_length=1), limit: int = Query(20, ge=1, le=200)):
+    return {"query": q, "items": paper_store.search(q, limit)}
+
+
+@app.get("/papers/similar")
+def papers_similar(paper_id: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=100)):
+    paper, neighbours = similar_papers(paper_id, limit)
+    if not paper:
+        raise HTTPException(status_code=404, detail="Paper no encontrado en el store local")
+    return {
+        "paper": paper,
+        "used_embeddings": bool(neighbours),
+        "items": [{"score": round(score, 4), "item": it} for it, score in neighbours],
+    }
+
+
 @app.get("/", response_class=HTMLResponse)
 def dashboard(request: Request):
     chat_ids = list_all_user_ids()
@@ -248,6 +271,7 @@ def user_config(chat_id: int):
         "llm_threshold": state.get("llm_threshold"),
         "llm_max_per_tick": state.get("llm_max_per_tick"),
         "llm_ondemand_max_per_hour": state.get("llm_ondemand_max_per_hour"),
+        "llm_usage": openai_client.usage_for(state, chat_id),
         "last_lucky_ts": state.get("last_lucky_ts"),
         "likes_total": len(state.get("likes_global", [])),
         "dislikes_total": len(state.get("dislikes_global", [])),
@@ -405,7 +429,8 @@ def profile_create(chat_id: int, payload: ProfileCreatePayload):
         user_state["profile_topics"] = topics
         user_state["profile_topic_weights"] = weights
         clear_sent_ids_for_active_profile(user_state)
-        set_custom_terms(topics)
+    else:
+        remember_profile_analysis(user_state, name, profile_text, summary, topics, weights)
     save_user(chat_id)
     return user_config(chat_id)
 
@@ -418,12 +443,12 @@ def profile_use(chat_id: int, payload: ProfileSwitchPayload):
     if name not in profiles:
         raise HTTPException(status_code=404, detail=f"Perfil '{name}' no encontrado")
     user_state["active_profile"] = name
-    stored = profiles.get(name, "")
-    applied = _apply_profile_analysis(user_state, stored, summary_override=stored)
-    profiles[name] = applied
-    user_state["profile"] = applied
+    if not restore_profile_analysis(user_state, name):
+        stored = profiles.get(name, "")
+        applied = _apply_profile_analysis(user_state, stored, summary_override=stored)
+        profiles[name] = applied
+        user_state["profile"] = applied
     clear_sent_ids_for_active_profile(user_state)
-    set_custom_terms(user_state.get("profile_topics", []))
     save_user(chat_id)
     return user_config(chat_id)
 
@@ -497,7 +522,6 @@ def profile_update(chat_id: int, profile_name: str, payload: ProfileUpdatePayloa
         if is_active:
             user_state["profile_topics"] = topics
             user_state["profile_topic_weights"] = weights
-            set_custom_terms(topics)
 
     overrides[name] = entry
 
@@ -524,12 +548,12 @@ def profile_delete(chat_id: int, profile_name: str):
     if user_state.get("active_profile") == name:
         new_active = next(iter(profiles.keys()))
         user_state["active_profile"] = new_active
-        stored = profiles.get(new_active, "")
-        applied = _apply_profile_analysis(user_state, stored, summary_override=stored)
-        profiles[new_active] = applied
-        user_state["profile"] = applied
+        if not restore_profile_analysis(user_state, new_active):
+            stored = profiles.get(new_active, "")
+            applied = _apply_profile_analysis(user_state, stored, summary_override=stored)
+            profiles[new_active] = applied
+            user_state["profile"] = applied
         clear_sent_ids_for_active_profile(user_state)
-        set_custom_terms(user_state.get("profile_topics", []))
     save_user(chat_id)
     return user_config(chat_id)
 
@@ -550,7 +574,6 @@ def profile_ingest_text(chat_id: int, payload: ProfileIngestPayload):
     profiles[target] = applied
     user_state["profile"] = applied
     clear_sent_ids_for_active_profile(user_state)
-    set_custom_terms(user_state.get("profile_topics", []))
     save_user(chat_id)
     return user_config(chat_id)
 
@@ -603,6 +626,7 @@ def user_feedback(chat_id: int, payload: FeedbackPayload):
     user_state = _ensure_user(chat_id)
     result = _toggle_feedback(user_state, pid, action)
     save_user(chat_id)
+    feedback_for(user_state)
     return {
         "paper_id": pid,
         "liked": result["liked"],
@@ -657,7 +681,6 @@ async def profile_upload_pdf(
     user_state["profile_topic_weights"] = analysis.get("topic_weights", {})
 
     clear_sent_ids_for_active_profile(user_state)
-    set_custom_terms(user_state.get("profile_topics", []))
     save_user(chat_id)
 
     return user_config(chat_id)
@@ -728,9 +751,10 @@ def user_papers(
     limit: int = Query(20, ge=1, le=200),
     offset: int = Query(0, ge=0),
     mode: str = Query("history", pattern="^(history|live)$"),
+    profile: str | None = Query(None),
 ):
     use_live = mode == "live"
-    return _build_papers_payload(chat_id, limit, offset, use_live=use_live)
+    return _build_papers_payload(chat_id, limit, offset, use_live=use_live, profile=profile)
 
 
 @app.get("/sample/{chat_id}")
@@ -7,6 +7,7 @@ mods = [
     "paperradar.core.ranking",
     "paperradar.core.llm",
     "paperradar.fetchers.merge",
+    "paperradar.services.corpus",
     "paperradar.services.pipeline",
     "paperradar.bot.main",
     "paperradar.web.api",
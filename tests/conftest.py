@@ -0,0 +1,47 @@
+import os
+import random
+import tempfile
+
+# el paquete lee DATA_ROOT y OPENAI_API_KEY al importarse: se fijan antes de cualquier import
+os.environ["DATA_ROOT"] = tempfile.mkdtemp(prefix="paperradar-tests-")
+os.environ["OPENAI_API_KEY"] = ""
+
+import pytest
+
+PROFILES = [
+    ("structural health monitoring of bridges with stochastic subspace identification and kalman filter",
+     {"structural health monitoring": 0.3, "stochastic subspace": 0.15, "kalman filter": 0.08, "bridge": 0.05}),
+    ("deep learning graph neural networks for damage detection in concrete with digital twin",
+     {"damage detection": 0.25, "graph neural": 0.12, "digital twin": 0.06}),
+    ("seismic response of buildings with soil structure interaction and magnetorheological dampers",
+     {"seismic": 0.2, "soil structure interaction": 0.1, "magnetorheological": 0.04}),
+]
+
+_VOCAB = ("bridge bridges damage detection modal analysis stochastic subspace identification structural health "
+          "monitoring seismic response building soil structure interaction vibration sensor network deep learning "
+          "neural graph convolution finite element model updating uncertainty bayesian inference wind load fatigue "
+          "crack concrete steel cable stayed suspension frequency mode shape damping ambient excitation operational "
+          "wireless accelerometer data fusion anomaly transformer attention traffic pavement tunnel dam offshore "
+          "turbine blade composite laminate corrosion ultrasonic guided lamb").split()
+
+
+def make_items(n, seed=0, prefix="p"):
+    """Synthetic papers; about a third borrow words and topics from one of PROFILES."""
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        words = [rng.choice(_VOCAB) for _ in range(rng.randint(60, 160))]
+        if rng.random() < 0.3:
+            text, tw = PROFILES[rng.randrange(len(PROFILES))]
+            pool = text.split() + [t for t in tw for _ in range(2)]
+            k = rng.randint(10, 60)
+            words[:k] = [rng.choice(pool) for _ in range(k)]
+        title = " ".join(rng.choice(_VOCAB) for _ in range(8))
+        items.append({"id": f"{prefix}{i}", "title": title, "abstract": " ".join(words),
+                      "published": "2024-01-01T00:00:00Z"})
+    return items
+
+
+@pytest.fixture
+def items():
+    return make_items(400)
@@ -0,0 +1,39 @@
+import numpy as np
+
+from paperradar.core.ann import IVFIndex
+
+
+def _clustered(n, dim, centers, seed=0):
+    rng = np.random.default_rng(seed)
+    C = rng.normal(size=(centers, dim))
+    X = C[rng.integers(0, centers, n)] + 0.3 * rng.normal(size=(n, dim))
+    return (X / np.linalg.norm(X, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_ivf_recall_against_exhaustive_search():
+    X = _clustered(3000, 32, 40)
+    ids = [f"v{i}" for i in range(len(X))]
+    index = IVFIndex(32, nlist=50, min_train=500)
+    index.add(ids, X)
+    assert index.trained
+    queries = _clustered(50, 32, 40, seed=1)
+    recall = []
+    for q in queries:
+        exact = {ids[i] for i in np.argsort(-(X @ q))[:10]}
+        found = {key for key, _ in index.search(q, 10, nprobe=8)}
+        recall.append(len(exact & found) / 10)
+    assert np.mean(recall) >= 0.9
+
+
+def test_ivf_add_remove_and_round_trip():
+    X = _clustered(600, 16, 8)
+    ids = [f"v{i}" for i in range(len(X))]
+    index = IVFIndex(16, nlist=8, min_train=100)
+    index.add(ids, X, tags=["t"] * len(ids))
+    index.remove(ids[:10])
+    assert len(index) == 590
+    assert index.vector_of("v0") is None
+    assert index.search(X[20], 1, nprobe=8)[0][0] == "v20"
+    copy = IVFIndex.from_arrays(index.to_arrays())
+    assert copy.search(X[20], 5, nprobe=8) == index.search(X[20], 5, nprobe=8)
+    assert copy.tag_of("v20") == "t"
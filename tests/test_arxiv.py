@@ -0,0 +1,71 @@
+from paperradar.fetchers import arxiv
+from paperradar.storage import watermarks
+
+
+def _feed(entries):
+    body = "".join(
+        f"<entry><id>http://arxiv.org/abs/{eid}</id><published>{published}</published>"
+        f"<title>Operational modal analysis of the bridge {eid}</title>"
+        f"<summary>We study the response of a bridge with ambient vibration and the deck.</summary>"
+        f'<author><name>A. Author</name></author><link href="http://arxiv.org/abs/{eid}" type="text/html"/>'
+        f"</entry>"
+        for eid, published in entries
+    )
+    return f'<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom">{body}</feed>'.encode()
+
+
+def test_entries_are_yielded_while_the_feed_streams():
+    data = _feed([(f"2401.{n:05d}", "2024-01-01T00:00:00Z") for n in range(5)])
+    read = []
+
+    def chunks():
+        for start in range(0, len(data), 50):
+            read.append(start)
+            yield data[start:start + 50]
+
+    ids = []
+    for entry in arxiv._iter_entries(chunks()):
+        ids.append(entry.findtext(arxiv._A + "id"))
+        if len(ids) == 1:
+            first_at = len(read)
+    assert ids == [f"http://arxiv.org/abs/2401.{n:05d}" for n in range(5)]
+    assert first_at < len(read)  # el primer entry sale antes de leer todo el cuerpo
+
+
+class _Stream:
+    def __init__(self, data):
+        self.data = data
+        self.closed = False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.data), 64):
+            yield self.data[start:start + 64]
+
+    def close(self):
+        self.closed = True
+
+
+def test_fetch_pages_down_to_the_watermark(monkeypatch):
+    watermarks.reset()
+    feed = [(f"2401.{n:05d}", f"2024-01-{30 - n:02d}T00:00:00Z") for n in range(20)]
+    pages = []
+
+    def get(url, **kwargs):
+        start = int(url.split("start=")[1].split("&")[0])
+        size = int(url.split("max_results=")[1].split("&")[0])
+        pages.append((start, size))
+        return _Stream(_feed(feed[start:start + size]))
+
+    monkeypatch.setattr(arxiv.http, "get", get)
+    monkeypatch.setattr(arxiv, "ARXIV_PAGE_SIZE", 4)
+    watermarks.begin_run()
+    watermarks.propose("arxiv", "q", [(feed[9][1], "x")])
+    watermarks.commit([("arxiv", "q")])
+
+    items = arxiv.fetch_query("q", max_results=20)
+    assert [it["id"] for it in items] == [f"http://arxiv.org/abs/2401.{n:05d}" for n in range(10)]
+    assert pages == [(0, 4), (4, 4), (8, 4)]  # se detiene en la página donde aparece la marca
+    watermarks.reset()
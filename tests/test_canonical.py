@@ -0,0 +1,38 @@
+from paperradar.fetchers.canonical import canonicalize, extract_arxiv_id, extract_doi
+
+TITLE = "Operational Modal Analysis of a Cable-Stayed Bridge under Traffic"
+
+
+def test_the_same_paper_from_several_sources_collapses():
+    records = [
+        {"id": "http://arxiv.org/abs/2401.01234v2", "title": TITLE, "abstract": "short", "source": "arxiv",
+         "authors": ["Ana Pérez", "B. Smith"]},
+        {"id": "10.48550/arXiv.2401.01234", "title": TITLE.upper(), "abstract": "", "source": "crossref",
+         "authors": ["A. Perez"]},
+        {"id": "https://doi.org/10.1016/j.engstruct.2024.1", "title": TITLE + ".", "source": "springer",
+         "abstract": "a much longer abstract of the journal version", "authors": ["Ana Pérez"], "venue": "Eng. Struct."},
+        {"id": "10.1016/J.ENGSTRUCT.2024.1", "title": "Other title", "source": "semantic", "authors": []},
+        {"id": "2402.00001", "title": TITLE + " (part two)", "source": "arxiv", "authors": ["Ana Pérez"]},
+    ]
+    out = canonicalize(records)
+    assert len(out) == 2
+    paper = out[0]
+    assert paper["id"] == "http://arxiv.org/abs/2401.01234v2"  # el primero conserva su id
+    assert paper["sources"] == ["arxiv", "crossref", "springer", "semantic"]
+    assert set(paper["alt_ids"]) == {r["id"] for r in records[1:4]}
+    assert paper["abstract"] == records[2]["abstract"]
+    assert paper["venue"] == "Eng. Struct."
+    assert paper["arxiv_id"] == "2401.01234"
+    assert out[1]["id"] == "2402.00001"
+
+
+def test_identifier_extraction():
+    assert extract_doi({"url": "https://doi.org/10.1109/TSP.2020.1)."}) == "10.1109/tsp.2020.1"
+    assert extract_arxiv_id({"url": "https://arxiv.org/pdf/2301.00042v3.pdf"}) == "2301.00042"
+    assert extract_arxiv_id({"id": "math.NA/0601001"}) == "math.na/0601001"
+
+
+def test_short_titles_are_not_fingerprinted():
+    records = [{"id": "a", "title": "Editorial", "authors": ["X. Li"]},
+               {"id": "b", "title": "Editorial", "authors": ["X. Li"]}]
+    assert len(canonicalize(records)) == 2
@@ -0,0 +1,44 @@
+import numpy as np
+from scipy import sparse
+
+from paperradar.services import feedback
+from paperradar.storage import feedback_vectors, paper_store
+
+N = 64
+
+
+def _row(values):
+    return sparse.csr_matrix(np.array([values], dtype=np.float64))
+
+
+def test_centroid_follows_additions_and_removals():
+    a, b = [1.0] + [0.0] * (N - 1), [0.0, 3.0] + [0.0] * (N - 2)
+    feedback_vectors.update(1, "*", "like", N, {"a": (_row(a), np.array([1, 0], dtype=np.float32)),
+                                                 "b": (_row(b), None)}, set())
+    tf, emb = feedback_vectors.centroid(1, "*", "like", N)
+    assert np.allclose(tf.toarray().ravel()[:2], [0.5, 1.5])
+    assert np.allclose(emb, [1, 0])
+    assert feedback_vectors.members(1, "*", "like") == {"a", "b"}
+
+    feedback_vectors.update(1, "*", "like", N, {}, {"a"})
+    tf, emb = feedback_vectors.centroid(1, "*", "like", N)
+    assert np.allclose(tf.toarray().ravel()[:2], [0.0, 3.0])
+    assert emb is None
+
+    feedback_vectors.update(1, "*", "like", N, {}, {"b"})
+    assert feedback_vectors.centroid(1, "*", "like", N) == (None, None)
+
+
+def test_unresolved_ids_join_once_ingested():
+    u = {"chat_id": 2, "profiles": {"default": "x"}, "likes_global": ["fb-1", "fb-2"], "dislikes_global": []}
+    paper_store.ingest({"fb-1": {"id": "fb-1", "title": "kalman filter bridges", "abstract": "modal analysis"}})
+    first = feedback.feedback_for(u)
+    assert feedback_vectors.members(2, "*", "like") == {"fb-1"}
+    assert feedback.unresolved_feedback(u) == 1
+    assert feedback.feedback_for(u) is first  # sin cambios en el store: memo
+
+    paper_store.ingest({"fb-2": {"id": "fb-2", "title": "seismic dampers", "abstract": "magnetorheological"}})
+    second = feedback.feedback_for(u)
+    assert feedback_vectors.members(2, "*", "like") == {"fb-1", "fb-2"}
+    assert feedback.unresolved_feedback(u) == 0
+    assert second.likes.nnz > first.likes.nnz
@@ -0,0 +1,53 @@
+import threading
+import time
+
+from paperradar.fetchers.engine import FetchTask, run_tasks
+
+
+def test_results_follow_task_order_within_source_limits():
+    lock = threading.Lock()
+    running = {"a": 0, "b": 0}
+    peak = {"a": 0, "b": 0}
+
+    def task(source, n, delay):
+        def fn():
+            with lock:
+                running[source] += 1
+                peak[source] = max(peak[source], running[source])
+            time.sleep(delay)
+            with lock:
+                running[source] -= 1
+            return [{"id": f"{source}{n}"}]
+        return fn
+
+    tasks = [FetchTask("a", f"q{i}", task("a", i, 0.05 - 0.01 * i)) for i in range(4)]
+    tasks += [FetchTask("b", f"q{i}", task("b", i, 0.01)) for i in range(4)]
+    items, stats = run_tasks(tasks, max_workers=8, source_limits={"a": 1, "b": 3})
+    assert [it["id"] for it in items] == ["a0", "a1", "a2", "a3", "b0", "b1", "b2", "b3"]
+    assert peak["a"] == 1 and peak["b"] <= 3
+    assert not stats["partial"]
+    assert stats["sources"]["a"]["done"] == 4
+    assert len(stats["completed"]) == 8
+
+
+def test_deadline_returns_what_finished():
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return [{"id": "slow"}]
+
+    def broken():
+        raise RuntimeError("upstream down")
+
+    tasks = [FetchTask("a", "fast", lambda: [{"id": "fast"}]), FetchTask("a", "slow", slow),
+             FetchTask("b", "broken", broken)]
+    started = time.monotonic()
+    items, stats = run_tasks(tasks, max_workers=3, deadline_sec=0.3)
+    release.set()
+    assert time.monotonic() - started < 2
+    assert [it["id"] for it in items] == ["fast"]
+    assert stats["partial"]
+    assert stats["completed"] == [("a", "fast")]
+    assert stats["sources"]["a"]["timed_out"] == 1
+    assert stats["sources"]["b"]["failed"] == 1
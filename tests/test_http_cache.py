@@ -0,0 +1,57 @@
+import requests
+
+from paperradar.core import http
+from paperradar.storage import http_cache
+
+
+def test_credentials_never_reach_the_cache():
+    url = http_cache.normalize_url("HTTPS://Api.Example.org/v1?b=2&api_key=SECRET", {"key": "S2", "monkey": "m", "a": 1})
+    assert url == "https://api.example.org/v1?a=1&b=2&monkey=m"
+    assert http_cache.cache_key("GET", "https://api.example.org/v1?apikey=one", {"q": "x"}) == \
+        http_cache.cache_key("get", "https://api.example.org/v1", {"q": "x", "apikey": "two"})
+
+
+def test_startup_purge_drops_only_urls_with_credentials(monkeypatch, tmp_path):
+    monkeypatch.setattr(http_cache, "HTTP_CACHE_PATH", str(tmp_path / "http_cache.sqlite3"))
+    monkeypatch.setattr(http_cache, "_CONN", None)
+    urls = ["https://x.org/a?key=1", "https://x.org/b?q=1&api_key=2", "https://x.org/c?monkey=1",
+            "https://x.org/d?sortkey=date", "https://x.org/e?token=3"]
+    for n, url in enumerate(urls):
+        http_cache._conn().execute(
+            "INSERT INTO responses VALUES (?, 'test', ?, 200, '{}', x'00', 1, 0, 0)", (f"k{n}", url))
+    monkeypatch.setattr(http_cache, "_CONN", None)
+    kept = [row[0] for row in http_cache._conn().execute("SELECT url FROM responses ORDER BY key")]
+    assert kept == ["https://x.org/c?monkey=1", "https://x.org/d?sortkey=date"]
+
+
+class _Response(requests.Response):
+    def __init__(self, status, body=b"", headers=None):
+        super().__init__()
+        self.status_code = status
+        self._content = body
+        self.headers.update(headers or {})
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_stale_entry_is_revalidated_and_the_304_released(monkeypatch):
+    sent = []
+    answers = [_Response(200, b"<feed/>", {"ETag": '"v1"'}), _Response(304)]
+
+    def request(method, url, headers=None, **kwargs):
+        sent.append(dict(headers or {}))
+        return answers.pop(0)
+
+    monkeypatch.setattr(http, "request", request)
+    url = "https://export.example.org/api/query?q=revalidate"
+    assert http.get(url, cache="arxiv").content == b"<feed/>"
+    assert http.get(url, cache="arxiv").content == b"<feed/>"  # fresco: no sale a la red
+    assert len(sent) == 1
+    http_cache._conn().execute("UPDATE responses SET stored_at = 0")
+    not_modified = answers[0]
+    again = http.get(url, cache="arxiv")
+    assert again.content == b"<feed/>" and again.status_code == 200
+    assert sent[1]["If-None-Match"] == '"v1"'
+    assert not_modified.closed
@@ -0,0 +1,94 @@
+import json
+import re
+
+import pytest
+
+from paperradar.core import llm, openai_client
+from paperradar.core.openai_client import Scheduler
+from paperradar.services import pipeline
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Stubbed completions; a batch answer leaves out its last paper."""
+    prompts = []
+
+    def post(url, body, timeout):
+        prompt = body["messages"][0]["content"]
+        prompts.append(prompt)
+        n = len(re.findall(r"^\[\d+\] Title:", prompt, re.M))
+        if prompt.startswith("You summarize"):
+            content = {"papers": [{"id": i + 1, "findings": [f"finding {i}"], "methods": ["m"], "keywords": ["k"]}
+                                  for i in range(n)]}
+        elif n:
+            content = {"papers": [{"id": i + 1, "similarities": [f"s{i}"], "ideas": ["i"]} for i in range(n - 1)]}
+        else:
+            content = {"similarities": ["single"], "ideas": ["i"]}
+        return {"choices": [{"message": {"content": json.dumps(content)}}], "usage": {}}
+
+    monkeypatch.setattr(openai_client, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(openai_client, "SCHEDULER", Scheduler(0, 0))
+    monkeypatch.setattr(openai_client, "_post", post)
+    monkeypatch.setattr(llm, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(llm, "LLM_PAPER_DIGEST", False)
+    return prompts
+
+
+def test_batch_falls_back_to_single_calls(fake_llm):
+    papers = [(f"Batch title {i}", f"abstract {i}") for i in range(3)]
+    out = llm.ideas_batch("profile summary", ["topic"], papers, batch_size=3)
+    assert [b["tag"] for b in out] == ["llm"] * 3
+    assert out[0]["similarities"] == ["s0"]
+    assert out[2]["similarities"] == ["single"]
+    assert len(fake_llm) == 2  # un lote + una llamada para el paper que faltó
+    again = llm.ideas_batch("profile summary", ["topic"], papers, batch_size=3)
+    assert [b["tag"] for b in again] == ["llm_cache"] * 3
+    assert len(fake_llm) == 2
+
+
+def test_batches_can_be_submitted_together(fake_llm):
+    batches = [llm.IdeasBatch(f"profile {k}", [], [(f"Together {k}-{i}", "abstract") for i in range(2)])
+               for k in range(3)]
+    for batch in batches:
+        batch.submit()
+    results = [batch.result() for batch in batches]
+    assert all(b["tag"] == "llm" for out in results for b in out)
+
+
+def test_digests_are_shared_across_profiles(fake_llm, monkeypatch):
+    monkeypatch.setattr(llm, "LLM_PAPER_DIGEST", True)
+    papers = [(f"Digest title {i}", f"long abstract {i}") for i in range(2)]
+    llm.ideas_batch("first profile", ["topic"], papers, batch_size=2)
+    digest_calls = [p for p in fake_llm if p.startswith("You summarize")]
+    assert len(digest_calls) == 1
+    bullets = [p for p in fake_llm if not p.startswith("You summarize")]
+    assert "Key findings: finding 0" in bullets[0] and "long abstract" not in bullets[0]
+
+    llm.ideas_batch("second profile", ["other"], papers, batch_size=2)
+    assert len([p for p in fake_llm if p.startswith("You summarize")]) == 1  # el digest ya estaba en cache
+    assert [d["findings"] for d in llm.digests(papers)] == [["finding 0"], ["finding 1"]]
+
+
+def test_llm_budget_is_topped_up_after_failures(monkeypatch):
+    class Batch:
+        def __init__(self, summary, topics, papers, **kwargs):
+            self.papers = papers
+
+        def submit(self):
+            pass
+
+        def result(self):
+            return [{"tag": "llm_fail" if title == "p0" else "llm"} for title, _ in self.papers]
+
+    singles = []
+
+    def single(summary, topics, title, abstract, **kwargs):
+        singles.append(title)
+        return {"tag": "llm"}
+
+    monkeypatch.setattr(pipeline, "IdeasBatch", Batch)
+    monkeypatch.setattr(pipeline, "llm_ideas", single)
+    items = [{"title": f"p{i}", "abstract": ""} for i in range(5)]
+    out = pipeline.make_bullets_batch({"profile": "x"}, items, [True, True, False, True, True], 2)
+    assert singles == ["p3"]  # el fallo de p0 se repone con el siguiente elegible
+    assert [b["tag"] for b in out] == ["llm_fail", "llm", "heur", "llm", "heur"]
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from paperradar.storage import llm_cache
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_DB_PATH", str(tmp_path / "llm_cache.sqlite3"))
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_PATH", str(tmp_path / "llm_cache.json"))
+    monkeypatch.setattr(llm_cache, "_CONN", None)
+    monkeypatch.setattr(llm_cache, "_STATS", dict.fromkeys(llm_cache._STATS, 0))
+    monkeypatch.setattr(llm_cache, "_PENDING", {"inserts": 0})
+    return llm_cache
+
+
+def test_legacy_json_is_imported_once(cache, tmp_path):
+    legacy = tmp_path / "llm_cache.json"
+    legacy.write_text(json.dumps({"k1": {"ideas": ["a"]}, "bad": "not a dict"}), encoding="utf-8")
+    assert cache.get("k1") == {"ideas": ["a"]}
+    assert cache.get("bad") is None
+    assert not legacy.exists() and (tmp_path / "llm_cache.json.migrated").exists()
+
+
+def test_expired_entries_are_misses(cache, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    monkeypatch.setattr(cache, "LLM_CACHE_TTL_DAYS", 1)
+    cache.put("k", {"ideas": ["a"]})
+    now[0] += 3600
+    assert cache.get("k") == {"ideas": ["a"]}
+    now[0] += 2 * 86400
+    assert cache.get("k") is None
+    st = cache.stats()
+    assert (st["hits"], st["misses"], st["expired"], st["entries"]) == (1, 1, 1, 0)
+
+
+def test_least_recently_used_are_evicted(cache, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    monkeypatch.setattr(cache, "LLM_CACHE_MAX_ENTRIES", 2)
+    monkeypatch.setattr(cache, "_EVICT_EVERY", 1)
+    for key in ("a", "b"):
+        now[0] += 1
+        cache.put(key, {"k": key})
+    now[0] += 1
+    cache.get("a")  # "b" queda como el menos usado
+    now[0] += 1
+    cache.put(cache.DIGEST_PREFIX + "c", {"k": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"k": "a"}
+    st = cache.stats()
+    assert (st["entries"], st["digests"], st["evictions"]) == (2, 1, 1)
+    assert cache.clear() == 2
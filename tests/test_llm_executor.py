@@ -0,0 +1,39 @@
+import threading
+
+from paperradar.core.llm_executor import LLMExecutor, deadline
+
+
+def test_singleflight_runs_a_key_once():
+    executor = LLMExecutor(2)
+    release = threading.Event()
+    calls = []
+
+    def slow(x):
+        calls.append(x)
+        release.wait(5)
+        return {"x": x}
+
+    first = executor.submit("k", slow, 1, aliases=["a1", "a2"])
+    assert executor.submit("k", slow, 2) is first
+    assert executor.submit("a2", slow, 3) is first  # un paper del lote espera esa misma llamada
+    assert executor.in_flight("a1") is first
+    release.set()
+    assert first.result(5) == {"x": 1}
+    assert executor.in_flight("k") is None
+    assert calls == [1]
+    assert executor.stats()["coalesced"] == 2
+
+
+def test_wait_reports_deadline_and_errors():
+    executor = LLMExecutor(1)
+    release = threading.Event()
+    slow = executor.submit("slow", release.wait, 5)
+    ok, value = executor.wait(slow, 0)
+    assert not ok and value is None
+    release.set()
+
+    def fail():
+        raise ValueError("bad answer")
+
+    ok, value = executor.wait(executor.submit("fail", fail), deadline(5))
+    assert not ok and isinstance(value, ValueError)
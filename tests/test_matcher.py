@@ -0,0 +1,29 @@
+from paperradar.core.matcher import TopicMatcher, matcher_for
+
+from conftest import PROFILES, make_items
+
+TOPICS = sorted({t for _, tw in PROFILES for t in tw} | {"he", "she", "hers", "his", "a", "seismic response"})
+
+
+def test_matches_equal_naive_substring_search():
+    m = TopicMatcher(TOPICS)
+    texts = [f"{it['title']} {it['abstract']}" for it in make_items(120, seed=3)] + ["ushers", "", "SEISMIC Response"]
+    for text in texts:
+        low = text.lower()
+        assert m.find(text) == tuple(i for i, t in enumerate(TOPICS) if t.lower() in low)
+
+
+def test_hit_matrix_and_memo():
+    m = TopicMatcher(["bridge", "damping", "wind"])
+    texts = ["Bridge damping under wind", "no hits here", "bridges"]
+    mat = m.hit_matrix(texts, keys=["a", "b", "c"])
+    assert mat.toarray().tolist() == [[1, 1, 1], [0, 0, 0], [1, 0, 0]]
+    # la clave manda: un texto ya visto no se vuelve a escanear
+    assert m.hit_matrix(["something else"], keys=["a"]).toarray().tolist() == [[1, 1, 1]]
+
+
+def test_matcher_for_reuses_the_compiled_matcher():
+    a = matcher_for(["Bridge", "wind"])
+    assert matcher_for(["Bridge", "wind"]) is a
+    assert matcher_for(["wind", "Bridge"]) is not a
+    assert a.matched_topics("WIND tunnel tests of a bridge deck") == ["Bridge", "wind"]
@@ -0,0 +1,46 @@
+from paperradar.core.minhash import MinHasher
+from paperradar.services.near_dupes import assign_clusters, collapse_clusters
+from paperradar.storage.users import is_item_sent, mark_item_sent, sent_paper_count
+
+ABSTRACT = ("We identify the modal parameters of a long span cable stayed bridge from ambient vibration records "
+            "collected by a dense wireless accelerometer network over twelve months of continuous monitoring, "
+            "and track the natural frequencies against temperature and traffic loading.")
+
+
+def test_signature_similarity_estimates_jaccard():
+    hasher = MinHasher(64, 16)
+    a = hasher.signature(ABSTRACT)
+    near = hasher.signature(ABSTRACT.replace("twelve", "eleven"))
+    far = hasher.signature("Graph neural networks detect cracks in concrete images with attention layers.")
+    assert MinHasher.similarity(a, near) > 0.7
+    assert MinHasher.similarity(a, far) < 0.2
+    assert hasher.signature("") is None
+
+
+def test_clusters_persist_across_calls():
+    first = [{"id": "nd-preprint", "title": "Bridge modal identification", "abstract": ABSTRACT},
+             {"id": "nd-other", "title": "Crack detection", "abstract": "Graph neural networks on concrete images."}]
+    assign_clusters(first)
+    assert first[0]["cluster_id"] != first[1]["cluster_id"]
+
+    # la versión de revista llega en otro tick y se une al cluster del preprint
+    journal = {"id": "nd-journal", "title": "Bridge modal identification.",
+               "abstract": ABSTRACT.replace("twelve months", "one year")}
+    later = [dict(first[0]), dict(first[1]), journal]
+    assign_clusters(later)
+    assert journal["cluster_id"] == first[0]["cluster_id"]
+    assert later[0]["cluster_id"] == first[0]["cluster_id"]
+
+    ranked = [(journal, 0.9), (later[1], 0.5), (later[0], 0.4)]
+    assert [it["id"] for it, _ in collapse_clusters(ranked)] == ["nd-journal", "nd-other"]
+
+
+def test_sent_marks_cover_clusters_and_alt_ids():
+    u = {"active_profile": "default"}
+    paper = {"id": "p1", "alt_ids": ["10.1/p1"], "cluster_id": "c1"}
+    mark_item_sent(u, paper)
+    sent = u["sent_ids_by_profile"]["default"]
+    assert is_item_sent(sent, {"id": "p2", "cluster_id": "c1"})
+    assert is_item_sent(sent, {"id": "10.1/p1"})
+    assert not is_item_sent(sent, {"id": "p3", "cluster_id": "c9"})
+    assert sent_paper_count(sent) == 1
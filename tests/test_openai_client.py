@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from paperradar.core import openai_client
+from paperradar.core.openai_client import BACKGROUND, INTERACTIVE, QuotaExceeded, Scheduler, TokenBucket
+from paperradar.storage import openai_usage
+
+
+def _answer(url, body, timeout):
+    return {"choices": [{"message": {"content": "{}"}}], "usage": {"prompt_tokens": 100, "completion_tokens": 20}}
+
+
+@pytest.fixture
+def online(monkeypatch):
+    monkeypatch.setattr(openai_client, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(openai_client, "SCHEDULER", Scheduler(0, 0))
+    monkeypatch.setattr(openai_client, "_post", _answer)
+
+
+def test_token_bucket_waits_for_refill(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(openai_client.time, "monotonic", lambda: clock[0])
+    bucket = TokenBucket(60)  # 1 por segundo
+    assert bucket.wait_time(60) == 0
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    clock[0] += 30
+    assert bucket.wait_time(30) == 0
+    assert bucket.wait_time(31) == pytest.approx(1.0)
+    # un pedido más grande que el balde espera uno lleno
+    assert bucket.wait_time(1000) == pytest.approx(30.0)
+    bucket.adjust(-100)  # reintegro: nunca pasa de la capacidad
+    assert bucket.level == 60
+    assert TokenBucket(0).wait_time(10 ** 9) == 0
+
+
+def test_scheduler_serves_interactive_first():
+    scheduler = Scheduler(120, 0)  # 2 pedidos por segundo
+    scheduler.requests.take(scheduler.requests.capacity)
+    order = []
+
+    def call(name, priority):
+        scheduler.acquire(1, priority)
+        order.append(name)
+
+    threads = [threading.Thread(target=call, args=(f"bg{i}", BACKGROUND)) for i in range(2)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)  # los de fondo ya esperan cuando llega el interactivo
+    threads.append(threading.Thread(target=call, args=("inter", INTERACTIVE)))
+    threads[-1].start()
+    for t in threads:
+        t.join(5)
+    assert order[0] == "inter"
+    assert scheduler.stats()["priorities"]["interactive"]["granted"] == 1
+
+
+def test_usage_is_recorded_per_chat(online):
+    openai_client.chat_json("hola", chat_id=11, purpose="bullets")
+    day = openai_usage.summary(11)
+    assert day["requests"] == 1
+    assert day["tokens"] == 120
+
+
+def test_failed_call_is_settled_and_recorded(online, monkeypatch):
+    def boom(url, body, timeout):
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(openai_client, "_post", boom)
+    with pytest.raises(RuntimeError):
+        openai_client.chat_json("hola", chat_id=12)
+    assert openai_usage.summary(12)["requests"] == 1
+    assert openai_usage.summary(12)["tokens"] == 0
+
+
+def test_chat_quota_rejects_further_calls(online, monkeypatch):
+    monkeypatch.setattr(openai_client, "OPENAI_USER_DAILY_TOKENS", 100)
+    openai_client.chat_json("hola", chat_id=13)
+    with pytest.raises(QuotaExceeded):
+        openai_client.chat_json("hola", chat_id=13)
+    openai_client.chat_json("hola", chat_id=14)  # otro chat no se ve afectado
+
+
+def test_background_share_of_the_daily_quota(online, monkeypatch):
+    spent = openai_usage.tokens_today()
+    monkeypatch.setattr(openai_client, "OPENAI_DAILY_TOKENS", 2 * (spent + 100))
+    monkeypatch.setattr(openai_client, "OPENAI_BACKGROUND_SHARE", 0.5)
+    openai_client.chat_json("hola", priority=BACKGROUND)  # queda en spent + 120, sobre la parte de fondo
+    with pytest.raises(QuotaExceeded):
+        openai_client.chat_json("hola", priority=BACKGROUND)
+    openai_client.chat_json("hola", priority=INTERACTIVE)
+
+
+def test_ondemand_limit_defaults():
+    assert openai_client.ondemand_limit({}) == openai_client.DEFAULT_LLM_ONDEMAND_MAX_PER_HOUR
+    u = {"llm_ondemand_max_per_hour": 2, "llm_ondemand_times": []}
+    openai_client.note_ondemand(u)
+    assert openai_client.ondemand_left(u) == 1
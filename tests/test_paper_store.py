@@ -0,0 +1,50 @@
+import pytest
+
+from paperradar.storage import paper_store
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    monkeypatch.setattr(paper_store, "PAPER_STORE_PATH", str(tmp_path / "papers.sqlite3"))
+    monkeypatch.setattr(paper_store, "LEGACY_POOL_PATH", str(tmp_path / "corpus_pool.json"))
+    monkeypatch.setattr(paper_store, "_CONN", None)
+    return paper_store
+
+
+def _paper(pid, title, abstract="", **extra):
+    return {"id": pid, "title": title, "abstract": abstract, "url": f"https://example.org/{pid}", **extra}
+
+
+def test_ingest_upserts_prunes_and_bumps_the_version(store):
+    counts = store.ingest({f"k{n}": _paper(f"id{n}", f"Paper {n}") for n in range(3)})
+    assert counts == {"added": 3, "updated": 0, "removed": 0}
+    version = store.version()
+    counts = store.ingest({"k1": _paper("id1", "Paper one, revised"), "k3": _paper("id3", "Paper 3")}, max_items=3)
+    assert counts == {"added": 1, "updated": 1, "removed": 1}
+    assert store.version() == version + 1
+    assert store.count() == 3
+    assert [it["title"] for it in store.all_items()] == ["Paper one, revised", "Paper 2", "Paper 3"]
+    assert store.stats()["papers"] == 3
+
+
+def test_full_text_search(store):
+    store.ingest({"a": _paper("a", "Stochastic subspace identification of bridges", "modal analysis"),
+                  "b": _paper("b", "Graph neural networks", "crack detection in concrete")})
+    assert [it["id"] for it in store.search("subspace")] == ["a"]
+    assert [it["id"] for it in store.search("crack OR bridges")] != []
+    assert store.search('"unbalanced') == []  # sintaxis FTS inválida: lista vacía, no excepción
+
+
+def test_find_paper_matches_ids_but_not_text(store):
+    store.ingest({
+        "k-arxiv": _paper("2401.01234", "Preprint", "see also 10.1016/j.x.2024.5", alt_ids=["10.48550/arXiv.2401.01234"]),
+        "k-doi": _paper("10.1016/j.x.2024.5", "Journal version"),
+    })
+    assert store.find_paper("2401.01234")["title"] == "Preprint"
+    assert store.find_paper("10.48550/arXiv.2401.01234")["title"] == "Preprint"
+    assert store.find_paper("10.1016/j.x.2024.5")["title"] == "Journal version"
+    assert store.find_paper("j.x.2024")["title"] == "Journal version"  # fragmento del id
+    assert store.find_paper("see also") is None  # el abstract no cuenta
+    assert store.find_paper("2024_5") is None  # "_" es literal, no comodín
+    store.ingest({}, max_items=1)
+    assert store.find_paper("10.48550/arXiv.2401.01234") is None
@@ -0,0 +1,37 @@
+from paperradar.fetchers import planner
+
+
+def _registry(monkeypatch, registry):
+    monkeypatch.setattr(planner, "owner_terms", lambda owners=None: registry)
+    monkeypatch.setattr(planner, "DEFAULT_TERMS", ["system identification"])
+
+
+def test_union_is_deduplicated_and_keeps_every_owner(monkeypatch):
+    _registry(monkeypatch, {
+        "1:default": ["bridges", '"Digital Twin"', "kalman filter"],
+        "2:default": ["digital twin", "dampers"],
+    })
+    union = planner.term_owners()
+    assert list(union) == ["bridges", "digital twin", "system identification", "dampers", "kalman filter"]
+    assert union["digital twin"] == ["1:default", "2:default"]
+    assert union["dampers"] == ["2:default"]
+    assert union["system identification"] == [planner.DEFAULT_OWNER]
+
+
+def test_cap_is_round_robin_across_owners(monkeypatch):
+    _registry(monkeypatch, {"1:a": ["a1", "a2", "a3"], "2:b": ["b1", "b2", "b3"]})
+    monkeypatch.setattr(planner, "QUERY_MAX_TERMS", 4)
+    # los términos por defecto entran en la ronda como un dueño más
+    assert list(planner.term_owners()) == ["a1", "b1", "system identification", "a2"]
+
+
+def test_pack_respects_the_source_limit(monkeypatch):
+    union = {f"term number {n}": [f"{n}:default"] for n in range(10)}
+    monkeypatch.setattr(planner, "QUERY_MAX_CHARS", {"arxiv": 120})
+    plans = planner.pack("arxiv", union)
+    assert 1 < len(plans) < 10
+    assert all(len(p.query) <= 120 for p in plans)
+    assert [t for p in plans for t in p.terms] == list(union)
+    assert plans[0].owners == sorted({o for t in plans[0].terms for o in union[t]})
+    # sin sintaxis OR: una consulta por término
+    assert [p.query for p in planner.pack("crossref", union)] == list(union)
@@ -0,0 +1,52 @@
+import pytest
+
+from paperradar.services import pipeline
+from paperradar.services.corpus import CorpusSnapshot
+
+from conftest import PROFILES, make_items
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(pipeline, "_RANKED", {})
+    monkeypatch.setattr(pipeline, "_RANKED_STATS", {"hits": 0, "misses": 0, "incremental": 0, "full": 0})
+
+
+def _user(cid, profiles):
+    return {"chat_id": cid, "active_profile": "default",
+            "profiles": {name: text for name, (text, _) in profiles.items()},
+            "profile": profiles["default"][0], "profile_topic_weights": profiles["default"][1]}
+
+
+def _snapshot(items, version="v1"):
+    return CorpusSnapshot(version=version, created_at="2024-01-01T00:00:00Z", items=items)
+
+
+def test_profiles_are_ranked_once_per_snapshot():
+    snap = _snapshot(make_items(200))
+    users = [_user(1, {"default": PROFILES[0], "other": PROFILES[1]}), _user(2, {"default": PROFILES[2]})]
+    first = pipeline.rank_profiles(users, snap)
+    assert set(first) == {(1, "default"), (1, "other"), (2, "default")}
+    assert pipeline.ranked_cache_stats()["misses"] == 3
+
+    again = pipeline.rank_profiles(users, snap)
+    assert all(again[k] is first[k] for k in first)
+    assert pipeline.ranked_cache_stats()["hits"] == 3
+
+    # cambiar los pesos de un perfil (sin features nuevas) invalida solo esa lista
+    users[1]["profile_topic_weights"] = dict(users[1]["profile_topic_weights"], seismic=0.19)
+    third = pipeline.rank_profiles(users, snap)
+    assert third[(1, "default")] is first[(1, "default")]
+    assert third[(2, "default")] is not first[(2, "default")]
+
+
+def test_new_snapshot_invalidates_and_deleted_profiles_leave_the_cache():
+    items = make_items(200)
+    users = [_user(1, {"default": PROFILES[0], "other": PROFILES[1]})]
+    first = pipeline.rank_profiles(users, _snapshot(items))
+    second = pipeline.rank_profiles(users, _snapshot(items + make_items(20, seed=9, prefix="n"), "v2"))
+    assert second[(1, "default")] is not first[(1, "default")]
+
+    del users[0]["profiles"]["other"]
+    pipeline.rank_profiles(users, _snapshot(items + make_items(20, seed=9, prefix="n"), "v2"))
+    assert pipeline.ranked_cache_stats()["entries"] == 1
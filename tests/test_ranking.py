@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from paperradar.core import ranking
+from paperradar.core.features import FeatureCache
+from paperradar.core.ranking import ItemIndex, RankRequest, rank_batch
+from paperradar.core.vectors import VectorMatrix, unit
+
+from conftest import PROFILES, make_items
+
+
+def _reference(profile, dislikes, items, tw):
+    """The original ranker: one vectorizer fitted on the boosted profile + boosted items."""
+    def boost_item(text):
+        lower = text.lower()
+        extra = [t for t, w in tw.items() if t.lower() in lower for _ in range(ranking._item_repeats(w))]
+        return f"{text} {' '.join(extra)}" if extra else text
+
+    texts = [boost_item(ranking.item_text(it)) for it in items]
+    vec = TfidfVectorizer(stop_words="english", ngram_range=(1, 3), sublinear_tf=True, min_df=2)
+    X = vec.fit_transform([ranking._boost_profile(profile, tw)] + texts)
+    scores = cosine_similarity(X[0], X[1:]).ravel()
+    if dislikes:
+        cent = np.asarray(vec.transform([ranking._boost_profile(t, tw) for t in dislikes]).mean(axis=0))
+        scores = scores - ranking.BETA_DISLIKE * cosine_similarity(X[1:], cent).ravel()
+    prior = [sum(w for t, w in tw.items() if t.lower() in text.lower()) for text in texts]
+    return {it["id"]: s + ranking.PRIOR_SCALE * p for it, s, p in zip(items, scores, prior)}
+
+
+def _index(items):
+    return ItemIndex(items, features=FeatureCache(1 << 20, 10000))
+
+
+@pytest.mark.parametrize("profile,tw", PROFILES)
+def test_scores_match_the_original_ranker(items, profile, tw):
+    dislikes = [items[3]["title"] + " " + items[3]["abstract"]]
+    ref = _reference(profile, dislikes, items, tw)
+    got = dict((it["id"], s) for it, s in rank_batch(_index(items), [RankRequest(profile, [], dislikes, tw)],
+                                                       shortlist_size=0)[0])
+    ids = list(ref)
+    a, b = np.array([ref[i] for i in ids]), np.array([got[i] for i in ids])
+    assert np.corrcoef(a, b)[0, 1] > 0.99
+    assert np.abs(a - b).mean() < 0.01
+    top_ref = set(sorted(ids, key=ref.get, reverse=True)[:10])
+    top_got = set(sorted(ids, key=got.get, reverse=True)[:10])
+    assert len(top_ref & top_got) >= 8
+
+
+def test_profile_terms_count_in_document_frequency():
+    # "quasiperiodic" only appears in one paper: it weighs because the profile counts as a document
+    items = make_items(50)
+    items[7]["abstract"] += " quasiperiodic"
+    index = _index(items)
+    ranked = rank_batch(index, [RankRequest("quasiperiodic lattices", [], [], {})], shortlist_size=0)[0]
+    assert ranked[0][0]["id"] == "p7"
+    assert ranked[0][1] > 0
+    assert index.generation == 1
+    assert not index.include_profiles(["quasiperiodic lattices"])
+
+
+def test_batch_matches_single_requests(items):
+    index = _index(items)
+    requests = [RankRequest(text, [], [items[5]["abstract"]] if k else [], tw) for k, (text, tw) in enumerate(PROFILES)]
+    for shortlist in (0, 150):
+        batch = rank_batch(index, requests, shortlist_size=shortlist)
+        for request, ranked in zip(requests, batch):
+            alone = rank_batch(index, [request], shortlist_size=shortlist)[0]
+            assert [it["id"] for it, _ in alone] == [it["id"] for it, _ in ranked]
+            assert np.allclose([s for _, s in alone], [s for _, s in ranked])
+
+
+def test_rows_score_like_the_full_ranking(items):
+    index = _index(items)
+    text, tw = PROFILES[0]
+    request = RankRequest(text, [], [], tw)
+    full = {it["id"]: s for it, s in rank_batch(index, [request], shortlist_size=0)[0]}
+    rows = list(range(100, 180))
+    part = rank_batch(index, [request], shortlist_size=0, rows=rows)[0]
+    assert len(part) == len(rows)
+    for it, s in part:
+        assert s == pytest.approx(full[it["id"]])
+
+
+def test_shortlist_keeps_the_top_results(items, monkeypatch):
+    monkeypatch.setattr(ranking, "RANK_RECALL_SAMPLE_EVERY", 1)
+    index = _index(items)
+    text, tw = PROFILES[1]
+    full = rank_batch(index, [RankRequest(text, [], [], tw)], shortlist_size=0)[0]
+    short = rank_batch(index, [RankRequest(text, [], [], tw)], shortlist_size=120)[0]
+    assert len(short) <= len(full)
+    assert [it["id"] for it, _ in short[:10]] == [it["id"] for it, _ in full[:10]]
+    assert ranking.shortlist_stats()["recall_samples"] >= 1
+
+
+def test_dense_term_is_calibrated_and_skips_items_without_vectors(items):
+    index = _index(items)
+    rng = np.random.default_rng(0)
+    keys = [it["id"] for it in items]
+    index.attach_vectors(VectorMatrix.from_pairs(((k, rng.normal(size=8)) for k in keys[:200]), "m"), keys)
+    text, tw = PROFILES[0]
+    lexical = {it["id"]: s for it, s in rank_batch(index, [RankRequest(text, [], [], tw)], shortlist_size=0)[0]}
+    request = RankRequest(text, [], [], tw, unit(rng.normal(size=8)))
+    hybrid = {it["id"]: s for it, s in rank_batch(index, [request], shortlist_size=0)[0]}
+    for k in keys[200:]:
+        assert hybrid[k] == pytest.approx(lexical[k])
+    # re-escalado a la media del TF-IDF: tener vector no sube ni baja el score en promedio
+    with_vectors = keys[:200]
+    assert np.mean([hybrid[k] for k in with_vectors]) == pytest.approx(np.mean([lexical[k] for k in with_vectors]))
+    assert any(abs(hybrid[k] - lexical[k]) > 1e-6 for k in with_vectors)
@@ -0,0 +1,105 @@
+import pytest
+
+from paperradar.fetchers import crossref
+from paperradar.storage import watermarks
+
+
+@pytest.fixture(autouse=True)
+def fresh_marks():
+    watermarks.reset()
+    yield
+    watermarks.reset()
+
+
+def test_commit_keeps_the_newest_stamp_and_its_ties():
+    watermarks.begin_run()
+    watermarks.propose("arxiv", "q", [("2024-01-02", "a"), ("2024-01-03", "b"), ("2024-01-03", "c")])
+    assert watermarks.get_watermark("arxiv", "q") is None  # hasta el commit no cuenta
+    assert watermarks.commit([("arxiv", "q")]) == 1
+    mark = watermarks.get_watermark("arxiv", "Q ")
+    assert mark["stamp"] == "2024-01-03" and set(mark["ids"]) == {"b", "c"}
+    assert watermarks.is_seen(mark, "2024-01-02", "x")
+    assert watermarks.is_seen(mark, "2024-01-03", "b")
+    assert not watermarks.is_seen(mark, "2024-01-03", "d")
+    assert not watermarks.is_seen(mark, "2024-01-04", "b")
+
+    watermarks.begin_run()
+    watermarks.propose("arxiv", "q", [("2024-01-01", "old")])
+    watermarks.commit([("arxiv", "q")])
+    assert watermarks.get_watermark("arxiv", "q")["stamp"] == "2024-01-03"
+
+
+def test_proposals_of_an_abandoned_run_are_ignored():
+    first = watermarks.begin_run()
+    watermarks.propose("crossref", "q", [("2024-01-01", "a")])
+    second = watermarks.begin_run()
+    # la consulta abandonada de la primera corrida termina durante la segunda
+    watermarks.in_run(first, lambda: watermarks.propose("crossref", "q", [("2024-03-01", "late")]))
+    assert watermarks.commit([("crossref", "q")], second) == 0
+    assert watermarks.get_watermark("crossref", "q") is None
+
+
+class _Response:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def _record(n, indexed):
+    return {"DOI": f"10.1/{n}", "URL": f"https://doi.org/10.1/{n}", "title": [f"Study {n} of the bridge"],
+            "abstract": "Modal analysis of the deck with ambient vibration.", "indexed": {"date-time": indexed},
+            "issued": {"date-parts": [[2024]]}}
+
+
+def test_crossref_reads_forward_from_the_indexed_mark(monkeypatch):
+    calls = []
+    newer = [_record(n, f"2024-05-01T00:00:{n:02d}Z") for n in range(7)]
+
+    def get(url, params=None, **kwargs):
+        calls.append(dict(params))
+        if "filter" not in params:
+            return _Response({"message": {"items": [_record("first", "2024-04-30T00:00:00Z")]}})
+        offset = params.get("offset", 0)
+        return _Response({"message": {"items": newer[offset:offset + params["rows"]]}})
+
+    monkeypatch.setattr(crossref.http, "get", get)
+    monkeypatch.setattr(crossref, "CROSSREF_MAX_PAGES", 2)
+    watermarks.begin_run()
+    assert [it["id"] for it in crossref.fetch_query("bridges", max_results=3)] == ["10.1/first"]
+    watermarks.commit([("crossref", "bridges")])
+
+    watermarks.begin_run()
+    got = crossref.fetch_query("bridges", max_results=3)
+    watermarks.commit([("crossref", "bridges")])
+    assert [it["id"] for it in got] == [f"10.1/{n}" for n in range(6)]
+    assert calls[1]["filter"] == "from-index-date:2024-04-30"
+    assert (calls[1]["sort"], calls[1]["order"]) == ("indexed", "asc")
+    # la marca avanza solo hasta lo leído: el registro 6 llega en el próximo tick
+    assert watermarks.get_watermark("crossref", "bridges")["stamp"] == "2024-05-01T00:00:05Z"
+
+    watermarks.begin_run()
+    assert [it["id"] for it in crossref.fetch_query("bridges", max_results=3)] == ["10.1/6"]
+
+
+def test_packed_query_reads_the_oldest_term_mark_and_advances_all():
+    watermarks.begin_run()
+    watermarks.propose("arxiv", "bridges", [("2024-01-05", "a")])
+    watermarks.propose("arxiv", "dampers", [("2024-01-02", "b")])
+    watermarks.commit([("arxiv", "bridges"), ("arxiv", "dampers")])
+
+    watermarks.register_query("arxiv", "(bridges) OR (dampers)", ["bridges", '"Dampers"'])
+    assert watermarks.get_watermark("arxiv", "(bridges) OR (dampers)")["stamp"] == "2024-01-02"
+    watermarks.register_query("arxiv", "(bridges) OR (twins)", ["bridges", "twins"])
+    assert watermarks.get_watermark("arxiv", "(bridges) OR (twins)") is None  # término sin marca
+
+    watermarks.begin_run()
+    watermarks.propose("arxiv", "(bridges) OR (dampers)", [("2024-01-04", "c")])
+    watermarks.commit([("arxiv", "(bridges) OR (dampers)")])
+    # al re-empaquetar, cada término conserva su propia marca
+    assert watermarks.get_watermark("arxiv", "dampers")["stamp"] == "2024-01-04"
+    assert watermarks.get_watermark("arxiv", "bridges")["stamp"] == "2024-01-05"